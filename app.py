@@ -1,115 +1,94 @@
 from logging import Logger, getLogger
 from logging.config import dictConfig
-from typing import Tuple
+from functools import partial
+from typing import List, Optional, Tuple
 from controller.database import Database
-from model.database.records import Records
+from model.database.records import BinaryRecords, Records
 from settings.router import API_ROUTERS
-from socket import socket, AF_INET, SOCK_STREAM
 from settings.logger import LOGGER_CONFIG
 from settings.settings import Settings
 from controller.arguments import Arguments
+from controller.bounded import POLICY_BLOCK, POLICY_COALESCE, POLICY_DROP_OLDEST, BoundedQueue
 from controller.publisher import Publisher
 from controller.server import Server
 from controller.decoder import ADSBDecoder
+from controller.dedup import Deduplicator
+from controller.ingest import AsyncIngest
+from controller.router import FrameRouter
+from controller.supervisor import SourceSupervisor
+from controller.replay import ReplaySource
+from library import ModeSMessage
+from library.extra import cache
 from _thread import start_new_thread
 from sys import exit
+from model.frame import ADSBFrame
 from model.packet import ADSBPacket
 
 
-def graceful_shutdown(sock: socket, logger: Logger) -> None:
+def graceful_shutdown(supervisors: List[SourceSupervisor], logger: Logger) -> None:
     """优雅关闭 TCP 连接
 
-    收到系统信号 SIGINT 时，关闭 TCP 连接
+    收到系统信号 SIGINT 时，停止重连并关闭所有 TCP 连接
 
     Args:
-        sock (socket): 创建好的 socket 实例
+        supervisors (List[SourceSupervisor]): 数据源连接监管者
         logger (Logger): 创建好的日志记录器
 
     Returns:
         None
     """
-    sock.close()
+    for supervisor in supervisors:
+        supervisor.stop()
     logger.info("TCP connection has been closed")
 
 
-def socket_find(sock: socket, signature: bytes, retry: int = 1) -> Tuple[bytes, bool]:
-    """从 socket 中读取数据，直到读取到指定的数据
+def reader_daemon(supervisor: SourceSupervisor, router: FrameRouter, dedup: Deduplicator, queue: BoundedQueue) -> None:
+    """从数据源中读取报文，校验并去重
+
+    每个数据源各自运行一个读取线程，连接由监管者维护，校验并去重后的报文交由解析线程处理
+    待解析报文队列已满时按其策略阻塞读取线程、丢弃或合并报文
 
     Args:
-        sock (socket): 创建好的 socket 实例
-        signature (bytes): 指定的数据
-        retry (int): 重试次数
+        supervisor (SourceSupervisor): 数据源连接监管者
+        router (FrameRouter): 报文路由器
+        dedup (Deduplicator): 跨接收机报文去重器
+        queue (BoundedQueue): 待解析报文队列
 
     Returns:
-        Tuple[bytes, bool]: 读取到的数据，读取是否失败
+        None
     """
-    for _ in range(retry):
-        try:
-            data = sock.recv(len(signature))
-            if data.startswith(signature):
-                return data, False
-        except:
-            return b"", True
+    parse = ModeSMessage.from_bytes if router.binary else ModeSMessage
+
+    def key(frame: ADSBFrame) -> Tuple[Optional[str], int, Optional[int], int]:
+        # 以解码出的 ICAO 地址、DF、类型码与 CPR 奇偶标志作为合并依据，同一飞机的同类报文仅保留最新一条
+        # DF0/4/5/16/20/21 的地址与校验位叠加，须由 CRC 还原，奇偶位置报文分别保留以供全局位置解算
+        parsed = parse(frame.message)
+        return parsed.icao, frame.df, parsed.tc, parsed.oe if parsed.tc is not None else 0
+
+    # 仅合并策略使用键，其余策略不解析报文，避免在读取线程中重复解析与 CRC 计算
+    coalesce = queue.policy == POLICY_COALESCE
 
-    return b"", True
+    def handler(frames: List[ADSBFrame], ts: int) -> None:
+        frames = dedup.filter(router.route(frames), ts)
+        if frames:
+            queue.put_many((key(frame) if coalesce else None, (frame, ts)) for frame in frames)
+    supervisor.run(handler)
 
 
-def decoder_daemon(db: Database, sock: socket, decoder: ADSBDecoder, packet: ADSBPacket) -> None:
-    """从 Socket 中读取并解析报文
+def decoder_daemon(decoder: ADSBDecoder, packet: ADSBPacket, queue: BoundedQueue) -> None:
+    """从待解析报文队列中批量取出并解析报文
 
     Args:
-        sock (socket): 创建好的已打开的 socket 实例
+        decoder (ADSBDecoder): ADS-B 报文解码器
         packet (ADSBPacket): ADS-B 报文缓冲区
+        queue (BoundedQueue): 待解析报文队列
 
     Returns:
         None
     """
     while True:
-        # 取得报文头部 *，长度为 1 字节
-        _, err = socket_find(sock, b"*")
-        if err:
-            continue
-        # 接收剩余报文内容并检查完整性
-        data_recv = sock.recv(29)
-        if data_recv[-1:] != b";":
-            continue
-        # 设定报文
-        decoder.msg = data_recv[:-1].decode("utf-8")
-        decoder.parse_typecode()
-        decoder.parse_timestamp()
-        # 解析报文
-        packet.icao = decoder.get_icao()
-        packet.callsign = decoder.get_callsign()
-        packet.altitude = decoder.get_altitude()
-        packet.heading = decoder.get_heading()
-        packet.velocity = decoder.get_velocity()
-        packet.latitude, packet.longitude = decoder.get_position()
-        # 为数据打上时标
-        packet.message = decoder.msg
-        packet.timestamp = decoder.ts
-        # 收尾工作
-        decoder.update_buffer()
-        decoder.update_queue()
-
-
-def connect_tcpserver(host: str, port: int, timeout: int) -> Tuple[socket, bool]:
-    """连接 TCP 服务器
-
-    Args:
-        host (str): 服务器地址
-        port (int): 服务器端口
-        timeout (int): 连接超时时间
-
-    Returns:
-        Tuple[socket, bool]: 已连接的 socket 实例，连接是否失败
-    """
-    sock = socket(AF_INET, SOCK_STREAM)
-    sock.settimeout(timeout)
-    try:
-        sock.connect((host, port))
-        return sock, False
-    except:
-        return sock, True
+        for frame, ts in queue.get_batch(queue.maxsize):
+            decoder.decode(frame, ts, packet)
 
 
 def main():
@@ -136,7 +115,7 @@ def main():
         password=conf.database.password,
         host=conf.database.host,
         port=conf.database.port,
-        tables=[Records],
+        tables=[Records, BinaryRecords],
     )
     err = db.connect()
     if err:
@@ -145,24 +124,10 @@ def main():
 
     # Migrating database
     logger.info("Migrating database")
-    db.migrate()
-
-    # 连接报文服务器
-    logger.info("Connecting to ADS-B server...")
-    source_host, source_port = conf.source.host, conf.source.port
-    sock, err = connect_tcpserver(
-        source_host, source_port,
-        conf.source.timeout,
-    )
+    err = db.migrate()
     if err:
-        logger.info(f"Failed to connect to {source_host}:{source_port}")
-        exit(1)
-    logger.info(f"Connected to {source_host}:{source_port}")
-
-    # 启动报文解析线程，创建发布者
-    decoder = ADSBDecoder(db)
-    packet = ADSBPacket()
-    start_new_thread(decoder_daemon, (db, sock, decoder, packet,))
+        logger.info("Failed to migrate database")
+        return
 
     # 创建 HTTP 服务器
     server_host, server_port = conf.server.host, conf.server.port
@@ -171,13 +136,57 @@ def main():
         host=server_host, port=server_port,
         cors=server_cors, debug=server_debug,
     )
+
+    # 多数据源与查询历史报文时重复的报文直接取用缓存的解码结果
+    if conf.ingest.decode_cache > 0:
+        cache.enable(conf.ingest.decode_cache)
+
+    # 创建解码器、路由器、去重器与各数据源的连接监管者
+    archive_policy = conf.queues.archive.policy
+    if conf.ingest.mode == "asyncio" and archive_policy == POLICY_BLOCK:
+        # 解析在事件循环中进行，存档队列写满时阻塞将使 HTTP 请求一同停顿，因此以丢弃最早的报文代替
+        archive_policy = POLICY_DROP_OLDEST
+    archive = BoundedQueue("archive", conf.queues.archive.size, archive_policy)
+    decoder = ADSBDecoder(db, archive, conf.ingest.binary)
+    packet = ADSBPacket()
+    router = FrameRouter(conf.ingest.binary)
+    dedup = Deduplicator(conf.ingest.dedup_window)
+    # 配置了抓包文件的数据源以回放代替网络连接，二者接口一致
+    supervisors = [
+        ReplaySource(
+            source.path, source.format, source.speed, feed_id, conf.ingest.crc_fix_bits,
+            conf.ingest.binary,
+        ) if source.path else SourceSupervisor(
+            source.host, source.port, source.format, source.timeout,
+            conf.ingest.backoff_initial, conf.ingest.backoff_max, feed_id,
+            conf.ingest.crc_fix_bits, conf.ingest.binary,
+        ) for feed_id, source in enumerate(conf.sources)
+    ]
+    if conf.ingest.mode == "asyncio":
+        # 在 HTTP 服务器事件循环中运行报文接收任务，解析结果直接推送至订阅者
+        publisher = Publisher(
+            packet, push=True,
+            maxsize=conf.queues.publish.size, policy=conf.queues.publish.policy,
+        )
+        ingest = AsyncIngest(decoder, publisher, dedup, router)
+        for supervisor in supervisors:
+            server.task(partial(supervisor.run_async, ingest.process))
+        stats = [archive.stats, publisher.stats]
+    else:
+        # 每个数据源启动一个报文读取线程
+        queue = BoundedQueue("decode", conf.queues.decode.size, conf.queues.decode.policy)
+        for supervisor in supervisors:
+            start_new_thread(reader_daemon, (supervisor, router, dedup, queue,))
+        # 启动报文解析线程
+        publisher = Publisher(packet)
+        start_new_thread(decoder_daemon, (decoder, packet, queue,))
+        stats = [queue.stats, archive.stats]
     # 注册系统信号处理函数
-    server.on("shutdown", lambda: graceful_shutdown(sock, logger))
+    server.on("shutdown", lambda: graceful_shutdown(supervisors, logger))
 
     # 注册 API 路由
-    publisher = Publisher(packet)
-    for router in API_ROUTERS:
-        server.route(router, db, publisher)
+    for item in API_ROUTERS:
+        server.route(item, db, publisher, supervisors, stats, router.stats)
     # 启动地图瓦片服务
     server.static(path="/", dir="./view")
 
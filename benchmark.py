@@ -0,0 +1,546 @@
+import os
+from argparse import ArgumentParser
+from collections import Counter
+from random import Random
+from sys import exit
+from time import perf_counter
+from typing import Callable, Dict, List
+import numpy as np
+import library as pms
+from library import py_common
+from library.extra import cache
+from library.extra.iqgen import IQGenerator
+from library.extra.rtlreader import RtlReader, check_msg
+from library.extra.tcpclient import TcpClient
+from controller.decoder import ADSBDecoder
+from controller.framer import RECV_SIZE, BeastFramer
+from controller.router import FrameRouter
+from model.packet import ADSBPacket
+
+CHUNK_SIZE = 4096
+IQ_BLOCK = 1000
+# 合成信号的脉冲与采样点不对齐，20 dB 信噪比下解调器约可解出 64% 的报文
+RTL_MIN_RATE = 0.6
+# 逐比特计算的旧版 CRC 过慢，仅测试部分报文
+LEGACY_COUNT = 10000
+# 各经度区分界纬度两侧检查的相邻浮点数个数
+NL_ULPS = 100
+# 与参考实现不一致的测试结果
+MISMATCHES: List[str] = []
+MESSAGES = [
+    "8D406B902015A678D4D220AA4BDA",
+    "8D40621D58C382D690C8AC2863A7",
+    "8D40621D58C386435CC412692AD6",
+    "8D485020994409940838175B284F",
+    "A0001838CA3E51F0A8000047A36A",
+    "5D484BA898F8C6",
+    "02E197B00179C3",
+]
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    """输出一项测试的耗时与吞吐量
+
+    Args:
+        name (str): 测试项名称
+        count (int): 处理的报文数量
+        elapsed (float): 耗时，单位为秒
+
+    Returns:
+        None
+    """
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"{name:<32}{count:>10} msgs{elapsed:>10.3f} s{rate:>14,.0f} msgs/s")
+
+
+def mismatch(message: str) -> None:
+    """输出并记录一项与参考实现不一致的结果
+
+    存在不一致的结果时，测试结束后以非零状态退出
+
+    Args:
+        message (str): 不一致的说明
+
+    Returns:
+        None
+    """
+    print(f"  {message}")
+    MISMATCHES.append(message)
+
+
+def sample_messages(count: int, seed: int = 0) -> List[str]:
+    """从样例报文中随机抽取指定数量的报文
+
+    Args:
+        count (int): 报文数量
+        seed (int): 随机数种子
+
+    Returns:
+        List[str]: 十六进制报文列表
+    """
+    rng = Random(seed)
+    return [rng.choice(MESSAGES) for _ in range(count)]
+
+
+def encode_raw(messages: List[str]) -> bytes:
+    return b"".join(b"*" + msg.encode() + b";\n" for msg in messages)
+
+
+def encode_beast(messages: List[str]) -> bytes:
+    stream = bytearray()
+    for i, msg in enumerate(messages):
+        payload = bytes.fromhex(msg)
+        # MLAT 时间戳中刻意包含 0x1A，覆盖转义路径
+        body = (i * 0x1A1A).to_bytes(6, "big") + bytes([i & 0xFF]) + payload
+        stream += b"\x1a" + (b"3" if len(payload) == 14 else b"2")
+        stream += body.replace(b"\x1a", b"\x1a\x1a")
+    return bytes(stream)
+
+
+def encode_skysense(messages: List[str]) -> bytes:
+    stream = bytearray()
+    for i, msg in enumerate(messages):
+        payload = bytes.fromhex(msg).ljust(14, b"\x00")
+        stream += b"$" + payload + bytes([0x80]) + (i & 0xFFFFFFFFFF).to_bytes(5, "big") + b"\x00\x00\x00"
+    # 以下一帧的起始符结尾，使最后一帧可被识别
+    return bytes(stream + b"$")
+
+
+def bench_tcpclient(count: int) -> None:
+    """测试 TcpClient 三种格式解析器的吞吐量
+
+    数据按 4096 字节分块送入解析器，与实际从 socket 接收数据的方式一致
+
+    Args:
+        count (int): 每种格式的报文数量
+
+    Returns:
+        None
+    """
+    messages = sample_messages(count)
+    for datatype, encode in (
+        ("raw", encode_raw),
+        ("beast", encode_beast),
+        ("skysense", encode_skysense),
+    ):
+        stream = encode(messages)
+        client = TcpClient("", 0, datatype)
+        parse = client.read_buffer
+        decoded = 0
+        start = perf_counter()
+        for i in range(0, len(stream), CHUNK_SIZE):
+            client.ring.write(stream[i:i + CHUNK_SIZE])
+            decoded += len(parse() or [])
+        report(f"tcpclient.{datatype}", decoded, perf_counter() - start)
+        if decoded != count:
+            mismatch(f"expected {count} messages, got {decoded}")
+
+
+def bench_rtlreader(count: int) -> None:
+    """测试 RtlReader 解调合成 IQ 信号的吞吐量与解码率
+
+    信号由 IQGenerator 按 2 Msps、20 dB 信噪比生成，每次生成 1000 条报文并送入解调器，生成耗时不计入
+    除报文吞吐量外，同时输出处理每秒信号所需的 CPU 时间
+    解调结果与生成的报文逐条比对，解调器可输出的报文中正确解码的比例须不低于 RTL_MIN_RATE，同时输出误码报文数量
+
+    Args:
+        count (int): 报文数量
+
+    Returns:
+        None
+    """
+    messages = sample_messages(count)
+    generator = IQGenerator(seed=0)
+    reader = RtlReader(iq_file=os.devnull)
+    decoded = []
+    reader.handle_messages = decoded.extend
+    duration, elapsed = 0.0, 0.0
+    for i in range(0, count, IQ_BLOCK):
+        samples, _ = generator.generate(messages[i:i + IQ_BLOCK])
+        duration += len(samples) / generator.sample_rate
+        start = perf_counter()
+        generator.feed(reader, samples)
+        elapsed += perf_counter() - start
+    start = perf_counter()
+    reader._flush()
+    elapsed += perf_counter() - start
+    report("rtlreader.demodulate", len(decoded), elapsed)
+    print(f"  {duration:.3f} s of signal, {elapsed / duration:.3f} s CPU per second of signal")
+
+    # 解调器仅输出 DF4/5/11/20/21 与 CRC 正确的 DF17 报文，其余报文不计入
+    expected = Counter(msg for msg in messages if check_msg(msg))
+    received = Counter(msg for msg, _ in decoded)
+    matched = sum((expected & received).values())
+    rate = matched / max(sum(expected.values()), 1)
+    print(f"  {matched}/{sum(expected.values())} expected messages decoded ({rate:.1%}), "
+          f"{sum((received - expected).values())} false positives")
+    if rate < RTL_MIN_RATE:
+        mismatch(f"rtlreader decoded {rate:.1%} of the messages, below {RTL_MIN_RATE:.0%}")
+
+
+def bench_crc(count: int) -> None:
+    """测试各种 CRC 实现的吞吐量
+
+    逐比特的 crc_legacy、逐字节查表的 crc 与 crc_bytes、以及批量计算的 crc_batch 结果须一致
+
+    Args:
+        count (int): 报文数量
+
+    Returns:
+        None
+    """
+    messages = sample_messages(count)
+    payloads = [bytes.fromhex(msg) for msg in messages]
+    long = np.frombuffer(b"".join(p for p in payloads if len(p) == 14), dtype=np.uint8).reshape(-1, 14)
+    short = np.frombuffer(b"".join(p for p in payloads if len(p) == 7), dtype=np.uint8).reshape(-1, 7)
+
+    legacy = messages[:LEGACY_COUNT]
+    start = perf_counter()
+    expected = [pms.common.crc_legacy(msg) for msg in legacy]
+    report("crc.legacy", len(legacy), perf_counter() - start)
+
+    start = perf_counter()
+    results = [pms.crc(msg) for msg in messages]
+    report("crc.hex", count, perf_counter() - start)
+
+    crc_bytes = pms.crc_bytes
+    start = perf_counter()
+    [crc_bytes(payload) for payload in payloads]
+    report("crc.bytes", count, perf_counter() - start)
+
+    start = perf_counter()
+    batch = pms.crc_batch(long).tolist() + pms.crc_batch(short).tolist()
+    report("crc.batch", count, perf_counter() - start)
+
+    if results[:len(legacy)] != expected:
+        mismatch("crc differs from crc_legacy")
+    ordered = [r for r, p in zip(results, payloads) if len(p) == 14]
+    ordered += [r for r, p in zip(results, payloads) if len(p) == 7]
+    if batch != ordered:
+        mismatch("crc_batch differs from crc")
+
+
+def decode_fields(msg) -> tuple:
+    """按 ADSBDecoder 的方式解析一条报文的各项资讯"""
+    df = pms.df(msg)
+    if df not in (17, 18):
+        return (df, pms.icao(msg))
+    tc = pms.adsb.typecode(msg)
+    if 1 <= tc <= 4:
+        return (df, tc, pms.icao(msg), pms.adsb.callsign(msg))
+    if 5 <= tc <= 18 or 20 <= tc <= 22:
+        return (df, tc, pms.icao(msg), pms.adsb.altitude(msg), pms.adsb.oe_flag(msg))
+    if tc == 19:
+        return (df, tc, pms.icao(msg), pms.adsb.velocity(msg))
+    return (df, tc, pms.icao(msg))
+
+
+def bench_cprnl(count: int) -> None:
+    """测试各种 cprNL 实现的吞吐量
+
+    cprNL 与 cprNL_batch 的结果须与 cprNL_legacy 完全一致，NaN 须与 cprNL_legacy 同样引发 ValueError
+    除随机纬度外，各经度区分界纬度两侧相邻的浮点数均须检查
+
+    Args:
+        count (int): 纬度数量
+
+    Returns:
+        None
+    """
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-90, 90, count)
+    edges = np.array(pms.NL_TRANSITIONS + (0.0, 87.0))
+    edges = np.concatenate([edges, -edges])
+    near = [edges]
+    below = above = edges
+    for _ in range(NL_ULPS):
+        below, above = np.nextafter(below, -np.inf), np.nextafter(above, np.inf)
+        near += [below, above]
+    lats = np.concatenate([lats] + near).tolist()
+
+    legacy = lats[:LEGACY_COUNT]
+    start = perf_counter()
+    expected = [pms.common.cprNL_legacy(lat) for lat in legacy]
+    report("cprnl.legacy", len(legacy), perf_counter() - start)
+
+    cprNL = pms.cprNL
+    start = perf_counter()
+    results = [cprNL(lat) for lat in lats]
+    report("cprnl.bisect", len(lats), perf_counter() - start)
+
+    array = np.array(lats)
+    start = perf_counter()
+    batch = pms.cprNL_batch(array).tolist()
+    report("cprnl.batch", len(lats), perf_counter() - start)
+
+    # 分界纬度附近的纬度全部与旧实现比较
+    checked = legacy + lats[count:]
+    expected += [pms.common.cprNL_legacy(lat) for lat in lats[count:]]
+    if [cprNL(lat) for lat in checked] != expected:
+        mismatch("cprNL differs from cprNL_legacy")
+    if batch != results:
+        mismatch("cprNL_batch differs from cprNL")
+    try:
+        cprNL(float("nan"))
+        mismatch("cprNL accepts NaN, cprNL_legacy raises ValueError")
+    except ValueError:
+        pass
+
+
+def bench_decoder(count: int) -> None:
+    """测试以字符串与 ModeSMessage 解析报文各项资讯的吞吐量
+
+    两种方式的解析结果须一致
+
+    Args:
+        count (int): 报文数量
+
+    Returns:
+        None
+    """
+    messages = sample_messages(count)
+
+    start = perf_counter()
+    expected = [decode_fields(msg) for msg in messages]
+    report("decoder.str", count, perf_counter() - start)
+
+    ModeSMessage = pms.ModeSMessage
+    start = perf_counter()
+    results = [decode_fields(ModeSMessage(msg)) for msg in messages]
+    report("decoder.message", count, perf_counter() - start)
+
+    if results != expected:
+        mismatch("ModeSMessage results differ from str")
+
+
+def bench_ingest(count: int) -> None:
+    """测试十六进制与二进制两种模式下 Beast 数据分帧、校验与解析的吞吐量
+
+    分帧与校验、解析两个环节分别计时，两种模式输出的数据包须一致
+
+    Args:
+        count (int): 报文数量
+
+    Returns:
+        None
+    """
+    stream = encode_beast(sample_messages(count))
+    results = {}
+    for binary in (False, True):
+        framer, router, decoder = BeastFramer(binary=binary), FrameRouter(binary), ADSBDecoder()
+        name = "binary" if binary else "hex"
+        frames = []
+        start = perf_counter()
+        for i in range(0, len(stream), RECV_SIZE):
+            frames += router.route(framer.feed(stream[i:i + RECV_SIZE]))
+        report(f"ingest.{name}.frame", len(frames), perf_counter() - start)
+
+        start = perf_counter()
+        packets = [decoder.decode(frame, 0, ADSBPacket()).__dict__ for frame in frames]
+        report(f"ingest.{name}.decode", len(packets), perf_counter() - start)
+        results[name] = packets
+
+    if results["binary"] != results["hex"]:
+        mismatch("binary packets differ from hex")
+
+
+def batch_fields(columns: Dict[str, np.ndarray], i: int) -> tuple:
+    """将 batch.decode 第 i 行的结果整理为 decode_fields 的格式"""
+    df, tc = int(columns["df"][i]), int(columns["typecode"][i])
+    icao = "%06X" % columns["icao"][i] if columns["icao"][i] >= 0 else None
+    if df not in (17, 18):
+        return (df, icao)
+    if 1 <= tc <= 4:
+        return (df, tc, icao, str(columns["callsign"][i]))
+    if 5 <= tc <= 18 or 20 <= tc <= 22:
+        alt = columns["altitude"][i]
+        return (df, tc, icao, None if np.isnan(alt) else alt, int(columns["oe"][i]))
+    if tc == 19:
+        velocity = [columns[key][i] for key in ("speed", "angle", "vertical_rate")]
+        return (df, tc, icao, tuple(None if np.isnan(v) else v for v in velocity))
+    return (df, tc, icao)
+
+
+def bench_batch(count: int) -> None:
+    """测试逐条解析与 batch 列式解析及位置解算的吞吐量
+
+    列式解析的结果须与逐条解析一致，速度类型等列式解析不输出的资讯不参与比较
+
+    Args:
+        count (int): 报文数量
+
+    Returns:
+        None
+    """
+    messages = sample_messages(count)
+
+    start = perf_counter()
+    expected = [decode_fields(msg) for msg in messages]
+    report("batch.scalar", count, perf_counter() - start)
+
+    start = perf_counter()
+    pms.batch.decode(messages)
+    report("batch.str", count, perf_counter() - start)
+
+    array = pms.batch.to_array(messages)
+    start = perf_counter()
+    columns = pms.batch.decode(array)
+    report("batch.array", count, perf_counter() - start)
+
+    # 每 10 ms 一条报文，位置报文可在 10 s 内配对
+    timestamps = np.arange(count) / 100
+    start = perf_counter()
+    pms.batch.position(array, timestamps)
+    report("batch.position", count, perf_counter() - start)
+
+    for i, fields in enumerate(expected):
+        if fields[1] == 19 and fields[3] is not None:
+            fields = fields[:3] + (fields[3][:3],)
+        if batch_fields(columns, i) != fields:
+            mismatch("batch results differ from scalar")
+            break
+
+
+def outcome(func: Callable, *args) -> object:
+    """调用函数，返回其结果或抛出的异常类型"""
+    try:
+        return func(*args)
+    except Exception as e:
+        return type(e)
+
+
+def bench_common(count: int) -> None:
+    """测试编译版与 Python 版 common 基础函数的吞吐量
+
+    编译版由 library/c_common.pyx 构建，未构建时 library 使用 py_common，仅测试 Python 版
+    两版在随机报文、ModeSMessage、全部 13 位编码、随机纬度及畸形输入上的结果或抛出的异常类型须一致
+
+    Args:
+        count (int): 报文数量
+
+    Returns:
+        None
+    """
+    rng = Random(0)
+    messages = sample_messages(count // 2) + [
+        "%014X" % rng.getrandbits(56) if rng.random() < 0.4 else "%028X" % rng.getrandbits(112)
+        for _ in range(count - count // 2)
+    ]
+    malformed = ["", "8", "8D4", "8d406b902015a678d4d220aa4bda", "8D40 6B902015A6", "XYZ", "0x8D406B90",
+                 "1" * 12, "1" * 14, "10201" * 3, b"\x8d@k", None, pms.ModeSMessage(MESSAGES[0])]
+    codes = [format(code, "013b") for code in range(8192)]
+    grays = [format(code, "011b") for code in range(2048)]
+    lats = [rng.uniform(-90, 90) for _ in range(count)] + list(pms.NL_TRANSITIONS) + [0, 87, -87, 90, 1e9]
+    cases = {
+        "hex2bin": messages,
+        "crc": messages,
+        "df": messages,
+        "icao": messages,
+        "typecode": messages,
+        "cprNL": lats,
+        "altitude": codes * (count // len(codes) + 1),
+        "squawk": codes * (count // len(codes) + 1),
+        "gray2alt": grays * (count // len(grays) + 1),
+    }
+
+    compiled = pms.common is not py_common
+    if not compiled:
+        print("  library.c_common is not built, testing py_common only")
+    for name, args in cases.items():
+        functions = {"py": getattr(py_common, name)}
+        if compiled:
+            functions["c"] = getattr(pms.common, name)
+        results = {}
+        for kind, func in functions.items():
+            start = perf_counter()
+            for arg in args:
+                func(arg)
+            report(f"common.{kind}.{name}", len(args), perf_counter() - start)
+            inputs = args[:count] + malformed + (codes if name in ("hex2bin", "cprNL") else [])
+            results[kind] = [outcome(func, arg) for arg in inputs]
+            if args is messages:
+                # 解码器以 ModeSMessage 调用基础函数，每个实现各自创建报文，不共用报文缓存的结果
+                parsed = [pms.ModeSMessage(msg) for msg in messages]
+                start = perf_counter()
+                for arg in parsed:
+                    func(arg)
+                report(f"common.{kind}.{name}.parsed", len(parsed), perf_counter() - start)
+                results[kind] += [outcome(func, arg) for arg in parsed]
+        if compiled and results["c"] != results["py"]:
+            mismatch(f"c_common.{name} differs from py_common")
+
+
+def bench_cache(count: int) -> None:
+    """测试启用解码缓存前后解析报文各项资讯与 BDS 的吞吐量
+
+    启用缓存前后的解析结果须一致，并输出各解码函数的缓存命中次数
+
+    Args:
+        count (int): 报文数量
+
+    Returns:
+        None
+    """
+    messages = sample_messages(count)
+
+    def decode(msg) -> tuple:
+        # BDS 仅适用于 112 位长报文
+        return decode_fields(msg) + (pms.bds.infer(msg) if len(msg) == 28 else None,)
+
+    start = perf_counter()
+    expected = [decode(msg) for msg in messages]
+    report("cache.off", count, perf_counter() - start)
+
+    cache.enable()
+    try:
+        start = perf_counter()
+        results = [decode(msg) for msg in messages]
+        report("cache.on", count, perf_counter() - start)
+        for name, info in cache.stats().items():
+            if info["hits"] or info["misses"]:
+                print(f"  {name:<20} {info['hits']:>10,} hits {info['misses']:>6,} misses")
+    finally:
+        cache.disable()
+
+    if results != expected:
+        mismatch("cached results differ from uncached")
+
+
+SUITES: Dict[str, Callable[[int], None]] = {
+    "tcpclient": bench_tcpclient,
+    "rtlreader": bench_rtlreader,
+    "crc": bench_crc,
+    "cprnl": bench_cprnl,
+    "decoder": bench_decoder,
+    "ingest": bench_ingest,
+    "batch": bench_batch,
+    "common": bench_common,
+    "cache": bench_cache,
+}
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "suites",
+        nargs="*",
+        help=f"suites to run, one of {', '.join(SUITES)}, all by default",
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=200000,
+        help="number of messages per test",
+    )
+    args = parser.parse_args()
+    for name in args.suites:
+        if name not in SUITES:
+            parser.error(f"unknown suite: {name}")
+    for name in args.suites or SUITES:
+        SUITES[name](args.count)
+    if MISMATCHES:
+        exit(f"{len(MISMATCHES)} results differ from the reference")
+
+
+if __name__ == '__main__':
+    main()
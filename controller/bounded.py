@@ -0,0 +1,141 @@
+from collections import deque
+from threading import Condition
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Tuple
+from model.stats import QueueStats
+
+# 队列满时阻塞生产者，直到消费者取走数据
+POLICY_BLOCK = "block"
+# 队列满时丢弃最早入队的数据
+POLICY_DROP_OLDEST = "drop_oldest"
+# 同一飞机仅保留最新的数据，队列满时丢弃最早入队的飞机
+POLICY_COALESCE = "coalesce"
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_COALESCE)
+
+
+class BoundedQueue:
+    """有界队列
+
+    用于各处理环节之间传递数据，队列长度不超过设定的容量，队列满时按策略阻塞、丢弃或合并数据
+    每条数据入队时附带键，合并策略下键相同的数据仅保留最新一条，其余策略忽略该键
+
+    Attributes:
+        policy (str): 队列满时的处理策略，可选 block、drop_oldest 或 coalesce
+        maxsize (int): 队列容量
+        stats (QueueStats): 队列统计数据
+    """
+
+    def __init__(self, name: str, maxsize: int, policy: str = POLICY_BLOCK) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Invalid queue policy: {policy}")
+        self.policy = policy
+        self.maxsize = max(int(maxsize), 1)
+        # 合并策略下 items 中存放键，数据存放于 slots 中
+        self.items: Deque[Any] = deque()
+        self.slots: Dict[Hashable, Any] = {}
+        self.cond = Condition()
+        self.closed = False
+        self.stats = QueueStats()
+        self.stats.name, self.stats.policy, self.stats.maxsize = name, policy, self.maxsize
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def close(self) -> None:
+        """关闭队列，唤醒所有等待中的生产者与消费者
+
+        Returns:
+            None
+        """
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def put(self, key: Hashable, item: Any) -> None:
+        """向队列中加入一条数据
+
+        Args:
+            key (Hashable): 数据的键，通常为飞机 ICAO 地址
+            item (Any): 数据
+
+        Returns:
+            None
+        """
+        self.put_many(((key, item),))
+
+    def put_many(self, entries: Iterable[Tuple[Hashable, Any]]) -> None:
+        """向队列中加入一批数据，整批数据只加锁一次
+
+        Args:
+            entries (Iterable[Tuple[Hashable, Any]]): 由键与数据组成的序列
+
+        Returns:
+            None
+        """
+        stats = self.stats
+        with self.cond:
+            for key, item in entries:
+                if self.policy == POLICY_COALESCE:
+                    if key in self.slots:
+                        # 保留原有位置，以新数据替换旧数据
+                        self.slots[key] = item
+                        stats.coalesced += 1
+                        continue
+                    if len(self.items) >= self.maxsize:
+                        del self.slots[self.items.popleft()]
+                        stats.dropped += 1
+                    self.slots[key] = item
+                    item = key
+                elif len(self.items) >= self.maxsize:
+                    if self.policy == POLICY_BLOCK:
+                        self.cond.wait_for(lambda: len(self.items) < self.maxsize or self.closed)
+                        if self.closed:
+                            stats.dropped += 1
+                            continue
+                    else:
+                        self.items.popleft()
+                        stats.dropped += 1
+                self.items.append(item)
+                stats.enqueued += 1
+            stats.size = len(self.items)
+            stats.high_water = max(stats.high_water, stats.size)
+            self.cond.notify_all()
+
+    def drain(self, limit: int) -> List[Any]:
+        """取出队列中的数据，不等待
+
+        Args:
+            limit (int): 最多取出的数据数量
+
+        Returns:
+            List[Any]: 按入队顺序排列的数据
+        """
+        with self.cond:
+            return self.__take__(limit)
+
+    def get_batch(self, limit: int, timeout: float = None) -> List[Any]:
+        """取出队列中的数据，队列为空时等待数据入队
+
+        Args:
+            limit (int): 最多取出的数据数量
+            timeout (float): 最长等待时间，单位为秒，为 None 时一直等待
+
+        Returns:
+            List[Any]: 按入队顺序排列的数据，超时或队列已关闭时可能为空
+        """
+        with self.cond:
+            self.cond.wait_for(lambda: self.items or self.closed, timeout)
+            return self.__take__(limit)
+
+    def __take__(self, limit: int) -> List[Any]:
+        count = min(limit, len(self.items))
+        popleft = self.items.popleft
+        if self.policy == POLICY_COALESCE:
+            pop = self.slots.pop
+            batch = [pop(popleft()) for _ in range(count)]
+        else:
+            batch = [popleft() for _ in range(count)]
+        self.stats.size = len(self.items)
+        if count:
+            # 唤醒因队列已满而阻塞的生产者
+            self.cond.notify_all()
+        return batch
@@ -1,6 +1,7 @@
+from logging import getLogger
 from typing import Dict, List, Type
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import ColumnExpressionArgument, create_engine
+from sqlalchemy import ColumnExpressionArgument, MetaData, Table, create_engine, inspect, select
 from sqlalchemy.orm import declarative_base
 from model.database.table import BaseTable
 
@@ -18,6 +19,8 @@ class Database:
         host (str): Host
         port (str): Port
         tables (List[Type[BaseTable]]): List of tables to be created in the database
+        insert_failures (int): Number of failed inserts
+        query_failures (int): Number of queries that failed
     """
 
     def __init__(self, db_name: str, engine: str, username: str, password: str, host: str, port: str, tables: List[Type[BaseTable]]) -> None:
@@ -33,6 +36,9 @@ class Database:
             "mysql": f"mysql+pymysql://{username}:{password}@{host}:{port}/{db_name}?charset=utf8mb4&collation=utf8mb4_unicode_ci"
         }.get(engine)
         self.tables = tables
+        self.insert_failures = 0
+        self.query_failures = 0
+        self.logger = getLogger("global_logger")
 
     def connect(self) -> bool:
         """Connect to the database
@@ -64,18 +70,64 @@ class Database:
             self.engine.dispose()
             self.engine = None
 
-    def migrate(self) -> None:
+    def migrate(self) -> bool:
         """Migrate the database
 
-        This method will initialize the database by creating the tables and inserting the default values
+        This method will initialize the database by creating the tables and inserting the default values.
+        Existing tables whose columns or primary key differ from the model are rebuilt and their rows copied over,
+        since create_all never alters an existing table
 
         Returns:
-            None
+            True if error occurred, False if no error occurred
         """
         Base = declarative_base()
         for i, table in enumerate(self.tables):
             type(f"{table.__name__}_{i}", (Base, table), {})
-        Base.metadata.create_all(self.engine)
+        try:
+            inspector = inspect(self.engine)
+            with self.engine.begin() as conn:
+                for table in Base.metadata.sorted_tables:
+                    if inspector.has_table(table.name) and self.outdated(inspector, table):
+                        self.rebuild(conn, table)
+            Base.metadata.create_all(self.engine)
+            return False
+        except Exception as e:
+            self.logger.error(f"Failed to migrate database: {e}")
+            return True
+
+    @staticmethod
+    def outdated(inspector, table: Table) -> bool:
+        """Check whether an existing table differs from its model
+
+        Returns:
+            True if the columns or the primary key of the table differ from the model
+        """
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        primary = set(inspector.get_pk_constraint(table.name)["constrained_columns"])
+        return columns != {column.name for column in table.columns} or primary != {column.name for column in table.primary_key}
+
+    def rebuild(self, conn, table: Table) -> None:
+        """Rebuild a table with the schema of its model
+
+        The existing table is renamed, the table is created from the model, the columns present in both are copied
+        and the renamed table is dropped. Columns missing from the old table are left empty
+
+        Returns:
+            None
+        """
+        old_name = f"{table.name}_old"
+        self.logger.info(f"Rebuilding table {table.name}")
+        old = Table(table.name, MetaData(), autoload_with=conn)
+        # indexes keep their names after renaming and would collide with the new ones
+        for index in old.indexes:
+            index.drop(conn)
+        conn.exec_driver_sql(f"ALTER TABLE {table.name} RENAME TO {old_name}")
+        old = Table(old_name, MetaData(), autoload_with=conn)
+        table.create(conn)
+        # a surrogate key missing from the old table is filled in by autoincrement
+        names = [column.name for column in table.columns if column.name in old.columns]
+        conn.execute(table.insert().from_select(names, select(*[old.columns[name] for name in names])))
+        old.drop(conn)
 
     def insert(self, data: BaseTable) -> bool:
         """Insert a record to the database
@@ -93,6 +145,29 @@ class Database:
             self.session.commit()
             return False
         except:
+            self.session.rollback()
+            return True
+
+    def insert_all(self, data: List[BaseTable]) -> bool:
+        """Insert records to the database in a single transaction
+
+        This method will add all records to the database and commit once
+
+        Returns:
+            True if error occurred, False if no error occurred
+        """
+        if not data:
+            return False
+        try:
+            class wrapper(declarative_base(), data[0].__class__):
+                pass
+            self.session.add_all([wrapper().set_attrs(i.get_attrs()) for i in data])
+            self.session.commit()
+            return False
+        except Exception as e:
+            self.session.rollback()
+            self.insert_failures += 1
+            self.logger.error(f"Failed to insert {len(data)} records: {e}")
             return True
 
     def query(self, model: Type[BaseTable], *args: ColumnExpressionArgument[bool]) -> List[BaseTable]:
@@ -107,7 +182,10 @@ class Database:
             class wrapper(declarative_base(), model):
                 pass
             return self.session.query(wrapper).filter(*args).all()
-        except:
+        except Exception as e:
+            self.session.rollback()
+            self.query_failures += 1
+            self.logger.error(f"Failed to query {model.__tablename__}: {e}")
             return []
 
     def update(self, model: Type[BaseTable], data: Dict, *args) -> bool:
@@ -125,6 +203,7 @@ class Database:
             self.session.commit()
             return False
         except:
+            self.session.rollback()
             return True
 
     def delete(self, model: Type[BaseTable], *args) -> bool:
@@ -142,4 +221,5 @@ class Database:
             self.session.commit()
             return False
         except:
+            self.session.rollback()
             return True
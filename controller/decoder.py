@@ -1,13 +1,30 @@
+from collections import deque
 from datetime import datetime
+from logging import getLogger
 from time import sleep
-from typing import List, Tuple
+from typing import Any, Deque, Dict, List, Tuple, Union
+import numpy as np
+from controller.bounded import BoundedQueue
 from controller.database import Database
+from controller.router import DF_ADSB, DF_COMMB
 import library as pms
-from model.database.records import Records
+from library import ModeSMessage
+from model.database.records import BinaryRecords, Records
+from model.frame import ADSBFrame
+from model.packet import ADSBPacket
 from _thread import start_new_thread
 
 TIMEUNIT_SECOND = 1000
 BUFFER_TIMEOUT = 10*TIMEUNIT_SECOND
+# 历史报文局部位置解算所用参考位置的最大时间差，远小于 180 海里的有效范围
+REFERENCE_TIMEOUT = 60*TIMEUNIT_SECOND
+# 每架飞机在缓冲区中最多保留的报文数量
+BUFFER_DEPTH = 16
+# 存档线程每次写入数据库的最大报文数量
+ARCHIVE_BATCH = 500
+# 写入失败的批次最多重试的次数与重试间隔秒数，数据库短暂不可用时不丢失报文
+ARCHIVE_RETRIES = 3
+ARCHIVE_RETRY_DELAY = 1
 
 PLACEHOLDER_NUMBER = -9999
 PLACEHOLDER_STRING = "N/A"
@@ -15,15 +32,21 @@ PLACEHOLDER_STRING = "N/A"
 
 class ADSBDecoderBuffer:
     icao: str
-    message: str
+    message: Union[str, bytes, ModeSMessage]
     typecode: int
     timestamp: int
+    mlat: int
+    rssi: int
+    feed: int
 
-    def __init__(self, icao: str, message: str, typecode: int, timestamp: int):
+    def __init__(self, icao: str, message: Union[str, bytes, ModeSMessage], typecode: int, timestamp: int, mlat: int = 0, rssi: int = 0, feed: int = 0):
         self.icao = icao
         self.message = message
         self.typecode = typecode
         self.timestamp = timestamp
+        self.mlat = mlat
+        self.rssi = rssi
+        self.feed = feed
 
 
 class ADSBDecoder:
@@ -32,20 +55,39 @@ class ADSBDecoder:
     从 ADS-B 报文中解析出各种资讯
 
     Attributes:
-        msg (str): 原始报文
+        msg (str): 十六进制报文
+        payload (Union[str, bytes]): 数据源传入的报文，二进制模式下为报文内容字节，原样存档
+        parsed (ModeSMessage): 仅解析一次的报文，各项资讯均从中提取，避免重复转换为二进制字符串
+        df (int): 报文 DF，决定调用哪些解析函数
+        mlat (int): 接收机 MLAT 时间戳，为 0 时表示数据源未提供
+        rssi (int): 信号强度
+        feed (int): 数据源序号
+        archive (BoundedQueue): 数据库存档队列，为 None 时不存档
+        archive_dropped (int): 多次重试仍写入失败而被放弃的存档报文数量
+        table (Type[Records]): 存档所用的记录表，二进制模式下以 BLOB 存储报文
+        buffer (Dict[str, Deque[ADSBDecoderBuffer]]): 按 ICAO 地址分组的近期报文，用于位置解算
     """
 
     tc: int
     ts: int
     msg: str
+    payload: Union[str, bytes]
+    parsed: ModeSMessage = None
+    df: int = -1
+    mlat: int = 0
+    rssi: int = 0
+    feed: int = 0
 
     archiving_enabled = True
 
-    queue: List[ADSBDecoderBuffer] = []
-    buffer: List[ADSBDecoderBuffer] = []
-
-    def __init__(self, db: Database = None) -> None:
-        if db is not None:
+    def __init__(self, db: Database = None, archive: BoundedQueue = None, binary: bool = False) -> None:
+        self.archive = archive
+        self.table = BinaryRecords if binary else Records
+        self.buffer: Dict[str, Deque[ADSBDecoderBuffer]] = {}
+        self.archive_dropped = 0
+        self.logger = getLogger("global_logger")
+        self.swept = 0
+        if db is not None and archive is not None:
             self.archiving_thread = start_new_thread(self.__update_database__, (db,))
 
     def __del__(self):
@@ -54,57 +96,235 @@ class ADSBDecoder:
     def __update_database__(self, db: Database) -> None:
         """数据库更新线程
 
-        扫描存档队列，将队列中的报文存入数据库
+        从存档队列中批量取出报文，每批报文在同一事务中存入数据库
+        写入失败的批次间隔 ARCHIVE_RETRY_DELAY 秒重试，重试 ARCHIVE_RETRIES 次仍失败时放弃该批次并计入 archive_dropped
 
         Args:
-            db (Database): _description_
+            db (Database): 已连接的数据库
         """
+        retries = 0
+        batch = []
         while self.archiving_enabled:
-            if len(self.queue) > 0:
-                record = Records().set_attrs({
-                    "timestamp": self.queue[0].timestamp,
-                    "message": self.queue[0].message,
-                    "typecode": self.queue[0].typecode,
-                    "icao": self.queue[0].icao,
-                })
-                self.queue.pop(0)
-                db.insert(record)
-            sleep(0.1)
+            if not batch:
+                batch = self.archive.get_batch(ARCHIVE_BATCH, 1)
+            if batch:
+                err = db.insert_all([self.table().set_attrs({
+                    "timestamp": i.timestamp,
+                    "message": i.message,
+                    "typecode": i.typecode,
+                    "icao": i.icao,
+                    "mlat": i.mlat,
+                    "rssi": i.rssi,
+                    "feed": i.feed,
+                }) for i in batch])
+                if err and retries < ARCHIVE_RETRIES:
+                    retries += 1
+                    sleep(ARCHIVE_RETRY_DELAY)
+                    continue
+                if err:
+                    self.archive_dropped += len(batch)
+                    self.logger.error(f"Dropped {len(batch)} records after {retries} retries")
+                retries = 0
+                batch = []
 
     def update_queue(self):
         """更新数据库存档队列
 
-        将当前报文加入数据库存档队列
+        将当前报文加入数据库存档队列，存档队列已满时按其策略阻塞、丢弃或合并报文
 
         Returns:
             None
         """
-        self.queue.append(ADSBDecoderBuffer(
-            icao=self.get_icao(),
-            message=self.msg,
+        if self.archive is None:
+            return
+        icao = self.get_icao()
+        self.archive.put(icao, ADSBDecoderBuffer(
+            icao=icao,
+            message=self.payload,
             typecode=self.tc,
             timestamp=self.ts,
+            mlat=self.mlat,
+            rssi=self.rssi,
+            feed=self.feed,
         ))
 
     def update_buffer(self):
         """更新缓冲区
 
-        将当前报文加入缓冲区并更新数据库
-        若缓冲区时间戳超时，将超时报文移除
+        将当前报文加入所属飞机的缓冲区，每架飞机最多保留 BUFFER_DEPTH 条报文
+        以报文时间戳判断超时，回放历史数据时同样适用，超时报文及长时间未出现的飞机将被移除
 
         Returns:
-            List[ADSBDecoderBuffer]: 缓冲区
+            None
         """
-        self.buffer.append(ADSBDecoderBuffer(
-            icao=self.get_icao(),
-            message=self.msg,
+        icao = self.get_icao()
+        history = self.buffer.get(icao)
+        if history is None:
+            history = self.buffer[icao] = deque(maxlen=BUFFER_DEPTH)
+        while history and self.ts - history[0].timestamp > BUFFER_TIMEOUT:
+            history.popleft()
+        # 缓冲区中保存已解析的报文，位置解算时无需重新解析
+        history.append(ADSBDecoderBuffer(
+            icao=icao,
+            message=self.parsed,
             typecode=self.tc,
             timestamp=self.ts,
+            mlat=self.mlat,
+            feed=self.feed,
         ))
-        current_ts = int(datetime.now().timestamp() * 1000)
-        for i in self.buffer:
-            if current_ts - i.timestamp > BUFFER_TIMEOUT:
-                self.buffer.remove(i)
+        # 定期清理长时间未出现的飞机
+        if abs(self.ts - self.swept) > BUFFER_TIMEOUT:
+            self.swept = self.ts
+            for key in [k for k, v in self.buffer.items() if self.ts - v[-1].timestamp > BUFFER_TIMEOUT]:
+                del self.buffer[key]
+
+    def decode(self, frame: ADSBFrame, ts: int, packet: ADSBPacket) -> ADSBPacket:
+        """解析报文并填充数据包
+
+        解析报文中的各项资讯写入数据包，并更新缓冲区与数据库存档队列
+
+        Args:
+            frame (ADSBFrame): 报文帧
+            ts (int): 毫秒时间戳
+            packet (ADSBPacket): 待填充的 ADS-B 数据包
+
+        Returns:
+            ADSBPacket: 填充完毕的数据包
+        """
+        # 设定报文，经过路由的报文已标记 DF
+        self.set_message(frame.message)
+        self.mlat, self.rssi, self.feed = frame.mlat, frame.rssi, frame.feed
+        self.parse_df(frame.df)
+        self.parse_typecode()
+        self.parse_timestamp(ts)
+        # 解析报文
+        self.fill_packet(packet)
+        # 收尾工作
+        self.update_buffer()
+        self.update_queue()
+        return packet
+
+    def fill_packet(self, packet: ADSBPacket) -> ADSBPacket:
+        """按报文 DF 调用适用的解析函数填充数据包
+
+        ADS-B 报文解析呼号、高度、速度与位置，Comm-B 报文解析 BDS60 航向，其余资讯以占位值填充
+
+        Args:
+            packet (ADSBPacket): 待填充的 ADS-B 数据包
+
+        Returns:
+            ADSBPacket: 填充完毕的数据包
+        """
+        packet.icao = self.get_icao()
+        packet.callsign = PLACEHOLDER_STRING
+        packet.altitude = packet.heading = packet.velocity = PLACEHOLDER_NUMBER
+        packet.latitude = packet.longitude = PLACEHOLDER_NUMBER
+        if self.df in DF_ADSB:
+            packet.callsign = self.get_callsign()
+            packet.altitude = self.get_altitude()
+            packet.velocity = self.get_velocity()
+            packet.latitude, packet.longitude = self.get_position()
+        elif self.df in DF_COMMB:
+            packet.heading = self.get_heading()
+        # 为数据打上时标
+        packet.message = self.msg
+        packet.timestamp = self.ts
+        packet.mlat, packet.rssi = self.mlat, self.rssi
+        return packet
+
+    def decode_history(self, records: List[Dict[str, Any]]) -> List[ADSBPacket]:
+        """批量解析历史报文
+
+        以 library.batch 按列解析全部报文，各项资讯与逐条调用 fill_packet 的结果一致
+        位置由同一飞机 BUFFER_TIMEOUT 内最近的奇偶报文配对全局解算，再沿航迹以 REFERENCE_TIMEOUT 内的已知位置为参考局部解算
+        记录须按时间顺序排列，不使用也不更新缓冲区
+
+        Args:
+            records (List[Dict[str, Any]]): 数据库记录，含 message、timestamp、mlat 与 rssi
+
+        Returns:
+            List[ADSBPacket]: 与记录一一对应的数据包
+        """
+        messages = [record.get("message") or "" for record in records]
+        msgs = pms.batch.to_array(messages)
+        timestamps = [record.get("timestamp") or 0 for record in records]
+        latitude, longitude = pms.batch.position(
+            msgs, np.array(timestamps, dtype=float), BUFFER_TIMEOUT, REFERENCE_TIMEOUT,
+        )
+        # 转换为 Python 列表后逐条取用，避免逐个访问 NumPy 标量
+        columns = zip(
+            pms.batch.df(msgs).tolist(),
+            pms.batch.icao(msgs).tolist(),
+            pms.batch.typecode(msgs).tolist(),
+            pms.batch.callsign(msgs).tolist(),
+            pms.batch.altitude(msgs).tolist(),
+            pms.batch.velocity(msgs)[0].tolist(),
+            latitude.tolist(),
+            longitude.tolist(),
+        )
+
+        packets = []
+        for record, message, (df, icao, tc, callsign, altitude, velocity, lat, lon) in zip(records, messages, columns):
+            msg = message if isinstance(message, str) else message.hex().upper()
+            packet = ADSBPacket()
+            packet.icao = "%06X" % icao if msg and icao >= 0 else PLACEHOLDER_STRING
+            packet.callsign = PLACEHOLDER_STRING
+            packet.altitude = packet.heading = packet.velocity = PLACEHOLDER_NUMBER
+            packet.latitude = packet.longitude = PLACEHOLDER_NUMBER
+            # NaN 表示该项资讯解码失败
+            if not msg:
+                pass
+            elif df in DF_ADSB:
+                if 1 <= tc <= 4:
+                    packet.callsign = callsign
+                if 5 <= tc <= 18:
+                    packet.altitude = None if altitude != altitude else int(altitude)
+                if tc == 19 and velocity == velocity:
+                    packet.velocity = int(velocity)
+                if lat == lat:
+                    packet.latitude, packet.longitude = lat, lon
+            elif df in DF_COMMB and len(msg) == 28:
+                hd = pms.commb.hdg60(msg)
+                if hd is not None:
+                    packet.heading = hd
+            packet.message = msg
+            packet.timestamp = record.get("timestamp")
+            packet.mlat, packet.rssi = record.get("mlat") or 0, record.get("rssi") or 0
+            packets.append(packet)
+        return packets
+
+    def set_message(self, msg: Union[str, bytes]) -> None:
+        """设定待解析的报文
+
+        二进制报文直接由字节转换为整数，十六进制形式仅用于输出数据包
+
+        Args:
+            msg (Union[str, bytes]): 十六进制报文或二进制报文内容
+
+        Returns:
+            None
+        """
+        self.payload = msg
+        if not msg:
+            self.msg, self.parsed = "", None
+            return
+        self.parsed = ModeSMessage.from_bytes(msg) if isinstance(msg, bytes) else ModeSMessage(msg)
+        self.msg = self.parsed.hex
+
+    def parse_df(self, df: int = -1) -> None:
+        """设定报文 DF
+
+        未经路由的报文 DF 为 -1，此时以报文首字节查表得到 DF
+
+        Args:
+            df (int): 报文路由器标记的 DF
+
+        Returns:
+            None
+        """
+        if df < 0:
+            df = self.parsed.df if self.msg else -1
+        self.df = df
 
     def parse_typecode(self):
         """解析报文类型码
@@ -114,33 +334,38 @@ class ADSBDecoder:
         Returns:
             None
         """
-        tc = pms.adsb.typecode(self.msg)
+        tc = pms.adsb.typecode(self.parsed)
         if tc is None:
             self.tc = PLACEHOLDER_NUMBER
         else:
             self.tc = tc
 
-    def parse_timestamp(self) -> int:
+    def parse_timestamp(self, ts: int = None) -> int:
         """设定时间戳
 
-        将当前时间戳设定属性 ts 中
+        将指定时间戳设定属性 ts 中，未指定时使用当前时间戳
+
+        Args:
+            ts (int): 毫秒时间戳
 
         Returns:
             None
         """
-        self.ts = int(datetime.now().timestamp() * 1000)
+        if ts is None:
+            ts = int(datetime.now().timestamp() * 1000)
+        self.ts = ts
 
     def get_icao(self) -> str:
         """取得 ICAO 数据
 
-        取得 ICAO 数据，若解码失败，返回的 ICAO 数据为 PLACEHOLDER_STRING
+        取得解码出的 ICAO 地址，DF0/4/5/16/20/21 报文的地址由 CRC 还原，若解码失败，返回的 ICAO 数据为 PLACEHOLDER_STRING
 
         Returns:
             str: ICAO 数据
         """
         if len(self.msg) == 0:
             return PLACEHOLDER_STRING
-        return self.msg[2:8]
+        return self.parsed.icao or PLACEHOLDER_STRING
 
     def get_callsign(self) -> str:
         """取得呼号
@@ -152,7 +377,7 @@ class ADSBDecoder:
         """
         if self.tc < 1 or self.tc > 4:
             return PLACEHOLDER_STRING
-        return pms.adsb.callsign(self.msg)
+        return pms.adsb.callsign(self.parsed)
 
     def get_altitude(self) -> int:
         """取得高度
@@ -164,7 +389,7 @@ class ADSBDecoder:
         """
         if self.tc < 5 or self.tc > 18:
             return PLACEHOLDER_NUMBER
-        return pms.adsb.altitude(self.msg)
+        return pms.adsb.altitude(self.parsed)
 
     def get_heading(self) -> float:
         """取得航向
@@ -174,7 +399,9 @@ class ADSBDecoder:
         Returns:
             float: 航向
         """
-        hd = pms.commb.hdg60(self.msg)
+        if len(self.msg) != 28:
+            return PLACEHOLDER_NUMBER
+        hd = pms.commb.hdg60(self.parsed)
         if hd is None:
             return PLACEHOLDER_NUMBER
         return hd
@@ -188,7 +415,7 @@ class ADSBDecoder:
             float: 速度
         """
         if self.tc == 19:
-            v = pms.adsb.velocity(self.msg)[0]
+            v = pms.adsb.velocity(self.parsed)[0]
             if v is not None:
                 return v
         return PLACEHOLDER_NUMBER
@@ -204,14 +431,20 @@ class ADSBDecoder:
         def is_pos_available(tc):
             return 5 <= tc <= 8 or 9 <= tc <= 18 or 20 <= tc <= 22
         if is_pos_available(self.tc):
-            odd = pms.adsb.oe_flag(self.msg)
-            for i in self.buffer:
-                if is_pos_available(i.typecode) and i.icao == self.get_icao() and pms.adsb.oe_flag(i.message) != odd:
+            odd = self.parsed.oe
+            for i in self.buffer.get(self.get_icao(), ()):
+                if self.ts - i.timestamp > BUFFER_TIMEOUT:
+                    continue
+                if is_pos_available(i.typecode) and i.message.oe != odd:
+                    # 同一接收机的 MLAT 时间戳精度更高，可准确判断两帧的先后顺序
+                    t0, t1 = i.timestamp, self.ts
+                    if i.feed == self.feed and i.mlat and self.mlat:
+                        t0, t1 = i.mlat, self.mlat
                     result = pms.adsb.position(
                         i.message,
-                        self.msg,
-                        i.timestamp,
-                        self.ts,
+                        self.parsed,
+                        t0,
+                        t1,
                     )
                     if result is not None:
                         return result
@@ -0,0 +1,55 @@
+from collections import deque
+from threading import Lock
+from typing import Deque, List, Set, Tuple, Union
+from model.frame import ADSBFrame
+
+
+class Deduplicator:
+    """跨接收机报文去重器
+
+    以过期哈希集合记录最近收到的报文，窗口期内重复到达的相同报文将被丢弃
+    多个接收机覆盖范围重叠时，可避免重复报文成倍增加解码与存档开销
+
+    Attributes:
+        window (int): 去重窗口，单位为毫秒，为 0 时不去重
+        seen (Set[Union[str, bytes]]): 窗口期内收到的报文，十六进制字符串或二进制字节
+        expiry (Deque[Tuple[int, Union[str, bytes]]]): 按到达顺序排列的报文时间戳
+        duplicates (int): 被丢弃的重复报文数量
+    """
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.seen: Set[Union[str, bytes]] = set()
+        self.expiry: Deque[Tuple[int, Union[str, bytes]]] = deque()
+        self.duplicates = 0
+        self.lock = Lock()
+
+    def filter(self, frames: List[ADSBFrame], ts: int) -> List[ADSBFrame]:
+        """过滤一批同时到达的报文
+
+        不同接收机收到的同一报文 MLAT 时间戳与信号强度不同，因此仅按报文内容去重
+
+        Args:
+            frames (List[ADSBFrame]): 报文帧列表
+            ts (int): 毫秒时间戳
+
+        Returns:
+            List[ADSBFrame]: 去除重复报文后的报文帧列表
+        """
+        if self.window <= 0:
+            return frames
+
+        result = []
+        with self.lock:
+            # 移除过期报文
+            while self.expiry and ts - self.expiry[0][0] > self.window:
+                self.seen.discard(self.expiry.popleft()[1])
+            for frame in frames:
+                msg = frame.message
+                if msg in self.seen:
+                    self.duplicates += 1
+                    continue
+                self.seen.add(msg)
+                self.expiry.append((ts, msg))
+                result.append(frame)
+        return result
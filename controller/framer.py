@@ -0,0 +1,170 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from socket import socket
+from typing import List, Optional, Tuple
+from library.extra import beast
+from library.extra.beast import BEAST_HEADER
+from library.extra.correction import CrcCorrector
+from library.extra.ringbuffer import RingBuffer
+from model.frame import ADSBFrame
+
+RECV_SIZE = 64 * 1024
+# 接收缓冲区大小，容纳数个数据块，仅在写满时整理一次
+RING_SIZE = 4 * RECV_SIZE
+FRAME_LENGTHS = (14, 28)
+HEX_DIGITS = frozenset("0123456789ABCDEFabcdef")
+
+
+class Framer(ABC):
+    """报文分帧器基类
+
+    通过 recv_into 将 socket 数据直接读入预分配的环形缓冲区，就地切分出所有完整的报文
+    末尾不完整的报文保留在缓冲区中，待下一块数据到达后继续拼接，持续接收时不再逐块分配内存
+
+    Attributes:
+        feed_id (int): 数据源序号
+        ring (RingBuffer): 预分配的接收缓冲区
+        malformed (int): 长度或内容非法的报文数量
+        partial (int): 未接收完整即被下一帧打断的报文数量
+        corrector (CrcCorrector): DF17/18 报文 CRC 纠错器，为 None 时不纠错
+        binary (bool): 是否以二进制字节输出报文，否则输出十六进制字符串
+    """
+
+    def __init__(self, feed_id: int = 0, crc_fix_bits: int = 0, binary: bool = False) -> None:
+        self.feed_id = feed_id
+        self.binary = binary
+        self.ring = RingBuffer(RING_SIZE)
+        self.malformed = 0
+        self.partial = 0
+        self.corrector: Optional[CrcCorrector] = CrcCorrector(crc_fix_bits) if crc_fix_bits else None
+
+    def reset(self) -> None:
+        """清空缓冲区中残留的不完整报文
+
+        Returns:
+            None
+        """
+        self.ring.clear()
+
+    @abstractmethod
+    def parse(self) -> List[ADSBFrame]:
+        """切分缓冲区中所有完整的报文
+
+        Returns:
+            List[ADSBFrame]: 切分得到的报文帧列表
+        """
+
+    def correct(self, frames: List[ADSBFrame]) -> List[ADSBFrame]:
+        """纠正 DF17/18 报文中的比特错误
+
+        通过校验子查表就地修正报文内容，无法纠正的报文原样保留
+
+        Args:
+            frames (List[ADSBFrame]): 切分得到的报文帧列表
+
+        Returns:
+            List[ADSBFrame]: 纠错后的报文帧列表
+        """
+        if self.corrector is None:
+            return frames
+        correct = self.corrector.correct
+        for frame in frames:
+            message = correct(frame.message)
+            if message is not None:
+                frame.message = message
+        return frames
+
+    def feed(self, data: bytes) -> List[ADSBFrame]:
+        """向缓冲区追加数据并切分报文
+
+        Args:
+            data (bytes): 新收到的数据
+
+        Returns:
+            List[ADSBFrame]: 切分得到的报文帧列表
+        """
+        self.ring.write(data)
+        return self.parse()
+
+    def read(self, sock: socket) -> Tuple[List[ADSBFrame], int, bool]:
+        """从 socket 中读取一块数据并切分报文
+
+        同一块数据中的所有报文共用一个时间戳
+
+        Args:
+            sock (socket): 创建好的已打开的 socket 实例
+
+        Returns:
+            Tuple[List[ADSBFrame], int, bool]: 报文帧列表，毫秒时间戳，读取是否失败
+        """
+        try:
+            received = self.ring.recv_into(sock)
+        except:
+            return [], 0, True
+        if not received:
+            return [], 0, True
+
+        ts = int(datetime.now().timestamp() * 1000)
+        return self.parse(), ts, False
+
+
+class RawFramer(Framer):
+    """dump1090 Raw 格式报文分帧器
+
+    切分 *...; 形式的十六进制报文，支持 14 位与 28 位两种长度
+    """
+
+    def parse(self) -> List[ADSBFrame]:
+        ring = self.ring
+        end = ring.data.rfind(b";", ring.start, ring.end)
+        if end < 0:
+            return []
+
+        frames = []
+        # 一次性解码所有完整的报文，无需先复制出 bytes
+        text = str(ring.view[ring.start:end], "ascii", "replace")
+        ring.consume(end + 1)
+        for chunk in text.split(";"):
+            start = chunk.rfind("*")
+            if start < 0:
+                if chunk.strip():
+                    self.malformed += 1
+                continue
+            # 报文头部 * 在结束符 ; 之前出现多次，说明前面的报文被截断
+            self.partial += chunk.count("*", 0, start)
+            payload = chunk[start + 1:]
+            if len(payload) not in FRAME_LENGTHS or not HEX_DIGITS.issuperset(payload):
+                self.malformed += 1
+                continue
+            frames.append(ADSBFrame(
+                bytes.fromhex(payload) if self.binary else payload, feed=self.feed_id,
+            ))
+
+        return self.correct(frames)
+
+
+class BeastFramer(Framer):
+    """Beast 二进制格式报文分帧器
+
+    切分 <esc> "2" 与 <esc> "3" 形式的 Mode S 报文，保留 12 MHz MLAT 时间戳与信号强度
+    Mode A/C 报文会被跳过，报文内容中的 <esc><esc> 会被还原为单个 0x1A
+    """
+
+    def parse(self) -> List[ADSBFrame]:
+        # 分帧与 <esc><esc> 还原由 library 中的 Beast 分帧函数完成，与 TcpClient 共用
+        bodies, malformed, partial = beast.split(self.ring)
+        self.malformed += malformed
+        self.partial += partial
+
+        frames = []
+        for kind, body in bodies:
+            if kind == 0x31:
+                continue
+            # 二进制模式下直接复制报文内容，无需转换为十六进制
+            payload = body[BEAST_HEADER:]
+            frames.append(ADSBFrame(
+                bytes(payload) if self.binary else payload.hex().upper(),
+                int.from_bytes(body[:6], "big"),
+                body[6], self.feed_id,
+            ))
+        return self.correct(frames)
@@ -0,0 +1,45 @@
+from typing import List
+from controller.decoder import ADSBDecoder
+from controller.dedup import Deduplicator
+from controller.publisher import Publisher
+from controller.router import FrameRouter
+from model.frame import ADSBFrame
+from model.packet import ADSBPacket
+
+
+class AsyncIngest:
+    """基于 asyncio 的报文接收任务
+
+    运行于 uvicorn 事件循环中，由各数据源的监管者以 loop.sock_recv_into 按块读取报文后调用
+    同一块中的报文批量解析，解析结果直接推送至发布者，无需额外的接收线程
+
+    Attributes:
+        decoder (ADSBDecoder): ADS-B 报文解码器
+        publisher (Publisher): ADS-B 数据发布者
+        dedup (Deduplicator): 跨接收机报文去重器，多个数据源共用
+        router (FrameRouter): 报文路由器，丢弃校验失败的报文并标记 DF
+    """
+
+    def __init__(self, decoder: ADSBDecoder, publisher: Publisher, dedup: Deduplicator, router: FrameRouter) -> None:
+        self.decoder = decoder
+        self.publisher = publisher
+        self.dedup = dedup
+        self.router = router
+
+    def process(self, frames: List[ADSBFrame], ts: int) -> None:
+        """解析一批报文，将解析结果批量推送至发布者
+
+        Args:
+            frames (List[ADSBFrame]): 同一块数据中切分出的报文帧
+            ts (int): 毫秒时间戳
+
+        Returns:
+            None
+        """
+        packets = [
+            self.decoder.decode(frame, ts, ADSBPacket())
+            for frame in self.dedup.filter(self.router.route(frames), ts)
+        ]
+        if packets:
+            self.publisher.packet = packets[-1]
+            self.publisher.publish(packets)
@@ -1,25 +1,69 @@
-from asyncio import sleep
-from typing import Callable
+from asyncio import Event, sleep
+from typing import Callable, Dict, List
+from controller.bounded import POLICY_BLOCK, POLICY_COALESCE, POLICY_DROP_OLDEST, BoundedQueue
 from model.packet import ADSBPacket
+from model.stats import QueueStats
 
 
 class Publisher:
     """ADS-B 数据发布者
 
     用于发布 ADS-B 数据至订阅者
+    轮询模式下定时检查共享缓冲区，推送模式下由报文接收任务直接调用 publish 推送数据
+    推送模式下每个订阅者各有一个有界队列，订阅者处理过慢时按策略丢弃或合并数据，不会拖慢报文接收
 
     Attributes:
         packet: ADS-B 报文共享缓冲区
         prev_ts: 上一次发布的时间戳
+        push: 是否启用推送模式
+        queues: 推送模式下各订阅者的数据队列及其唤醒事件
+        stats: 推送队列统计数据，各订阅者共用，队列长度为最近一次入队的订阅者队列长度
     """
 
-    def __init__(self, packet: ADSBPacket) -> None:
+    def __init__(self, packet: ADSBPacket, push: bool = False, maxsize: int = 1000, policy: str = POLICY_COALESCE) -> None:
         self.packet = packet
         self.prev_ts = packet.timestamp
+        self.push = push
+        self.maxsize = maxsize
+        # 推送与订阅运行于同一事件循环中，阻塞推送将导致死锁，因此以丢弃最早的数据代替
+        self.policy = POLICY_DROP_OLDEST if policy == POLICY_BLOCK else policy
+        self.queues: Dict[BoundedQueue, Event] = {}
+        self.stats = QueueStats()
+        self.stats.name, self.stats.policy, self.stats.maxsize = "publish", self.policy, maxsize
+
+    def publish(self, packets: List[ADSBPacket]) -> None:
+        """推送一批数据至所有订阅者
+
+        仅可在事件循环所在线程中调用
+
+        Args:
+            packets (List[ADSBPacket]): 同一批次解析出的数据包
+
+        Returns:
+            None
+        """
+        # 以解码出的 ICAO 地址作为合并依据，同一飞机仅推送最新的数据
+        entries = [(packet.icao, packet) for packet in packets]
+        for queue, event in self.queues.items():
+            queue.put_many(entries)
+            event.set()
 
     async def subscribe(self, subscriber: Callable) -> None:
-        while True:
-            if self.packet.timestamp != self.prev_ts:
-                await subscriber(self.packet)
-                self.prev_ts = self.packet.timestamp
-            await sleep(0.01)
+        if not self.push:
+            while True:
+                if self.packet.timestamp != self.prev_ts:
+                    await subscriber(self.packet)
+                    self.prev_ts = self.packet.timestamp
+                await sleep(0.01)
+
+        queue, event = BoundedQueue("publish", self.maxsize, self.policy), Event()
+        queue.stats = self.stats
+        self.queues[queue] = event
+        try:
+            while True:
+                await event.wait()
+                event.clear()
+                for packet in queue.drain(self.maxsize):
+                    await subscriber(packet)
+        finally:
+            del self.queues[queue]
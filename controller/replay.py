@@ -0,0 +1,167 @@
+from asyncio import sleep as async_sleep
+from datetime import datetime
+from logging import getLogger
+from typing import Callable, List, Optional
+from controller.framer import BeastFramer, RawFramer
+from library.extra.replay import FileClient
+from library.extra.tcpclient import MLAT_CLOCK
+from model.frame import ADSBFrame
+from model.health import SourceHealth
+
+
+class ReplaySource(FileClient):
+    """抓包文件回放数据源
+
+    基于 library 中的 FileClient，以内存映射方式读取录制的 Raw、Beast、Skysense 格式数据或带时间戳的报文日志，按录制时的时间间隔回放
+    接口与 SourceSupervisor 一致，可直接替代网络数据源，用于压力测试、历史数据回填与复现线上问题
+
+    Raw 与 Beast 格式由与网络数据源相同的分帧器切分，保留 MLAT 时间戳与信号强度
+    Beast 与 Skysense 格式以接收机时间控制回放节奏，日志以记录的时间戳控制回放节奏并保留原始时间
+    Raw 格式不含时间戳，总是以最快速度回放
+
+    Attributes:
+        path (str): 抓包文件路径
+        format (str): 数据格式，可选 raw、beast、skysense 或 log
+        feed_id (int): 数据源序号
+        framer (Framer): 与数据格式对应的报文分帧器，Skysense 与日志格式仅用于 CRC 纠错与统计
+        health (SourceHealth): 数据源健康状态
+        handler (Callable[[List[ADSBFrame], int], None]): 报文处理函数
+    """
+
+    def __init__(self, path: str, format: str, speed: float, feed_id: int = 0, crc_fix_bits: int = 0, binary: bool = False) -> None:
+        super().__init__(path, format, speed)
+        self.format = format
+        self.feed_id = feed_id
+        self.framer = (BeastFramer if format == "beast" else RawFramer)(feed_id, crc_fix_bits, binary)
+        # 分帧器直接切分 FileClient 写入缓冲区的文件数据
+        self.ring = self.framer.ring
+        self.health = SourceHealth(host=path, port=0)
+        self.handler: Optional[Callable[[List[ADSBFrame], int], None]] = None
+        self.logger = getLogger("global_logger")
+
+    def connect(self) -> None:
+        """打开并映射抓包文件
+
+        Returns:
+            None
+        """
+        try:
+            super().connect()
+        except:
+            self.health.last_error = "Failed to open capture file"
+            self.logger.info(f"Failed to open capture file {self.path}")
+            return
+        # 空文件无法映射，无需回放
+        if self.mmap is not None:
+            self.health.connected = True
+            self.logger.info(f"Replaying {self.path}")
+
+    def close(self) -> None:
+        """关闭抓包文件
+
+        Returns:
+            None
+        """
+        super().close()
+        if self.health.connected:
+            self.health.connected = False
+            self.logger.info(f"Replay of {self.path} finished")
+
+    def read_buffer(self) -> List[list]:
+        """切分缓冲区中所有完整的报文
+
+        Returns:
+            List[list]: 报文帧与以秒为单位的时间戳，Beast 与 Skysense 格式的接收机时间在回放第一条报文时对齐到当前时间
+        """
+        now = datetime.now().timestamp()
+        if self.format == "raw":
+            return [[frame, now] for frame in self.framer.parse()]
+        if self.format == "beast":
+            messages = [[frame, frame.mlat / MLAT_CLOCK] for frame in self.framer.parse()]
+        else:
+            # Skysense 与日志格式由 FileClient 解析为十六进制报文
+            messages = super().read_buffer()
+            binary = self.framer.binary
+            for message in messages:
+                message[0] = ADSBFrame(bytes.fromhex(message[0]) if binary else message[0], feed=self.feed_id)
+            self.framer.correct([message[0] for message in messages])
+        if self.format != "log" and messages:
+            if self.mlat_offset is None:
+                self.mlat_offset = now - messages[0][1]
+            for message in messages:
+                message[1] += self.mlat_offset
+        return messages
+
+    def handle_messages(self, messages: List[list]) -> None:
+        """将毫秒时间戳相同的相邻报文合并为一批交给报文处理函数
+
+        Args:
+            messages (List[list]): 报文帧与以秒为单位的时间戳
+
+        Returns:
+            None
+        """
+        frames, batch_ts = [], 0
+        for frame, t in messages:
+            ts = int(t * 1000)
+            if frames and ts != batch_ts:
+                self.on_data(frames, batch_ts)
+                frames = []
+            batch_ts = ts
+            frames.append(frame)
+        if frames:
+            self.on_data(frames, batch_ts)
+
+    def on_data(self, frames: List[ADSBFrame], ts: int) -> None:
+        """记录回放的报文并交给报文处理函数
+
+        Args:
+            frames (List[ADSBFrame]): 回放的报文帧列表
+            ts (int): 毫秒时间戳
+
+        Returns:
+            None
+        """
+        self.health.last_seen = ts
+        self.health.messages += len(frames)
+        self.health.malformed = self.framer.malformed
+        self.health.partial = self.framer.partial
+        if self.framer.corrector is not None:
+            self.health.corrected = self.framer.corrector.corrected
+            self.health.uncorrectable = self.framer.corrector.uncorrectable
+        self.handler(frames, ts)
+
+    def run(self, handler: Callable[[List[ADSBFrame], int], None]) -> None:
+        """在当前线程中回放抓包文件
+
+        Args:
+            handler (Callable[[List[ADSBFrame], int], None]): 报文处理函数，参数为报文帧列表与毫秒时间戳
+
+        Returns:
+            None
+        """
+        self.handler = handler
+        super().run()
+
+    async def run_async(self, handler: Callable[[List[ADSBFrame], int], None]) -> None:
+        """在事件循环中回放抓包文件
+
+        Args:
+            handler (Callable[[List[ADSBFrame], int], None]): 报文处理函数，参数为报文帧列表与毫秒时间戳
+
+        Returns:
+            None
+        """
+        self.handler = handler
+        self.connect()
+        schedule = self.schedule()
+        try:
+            for delay, messages in schedule:
+                # 不限速回放时同样让出事件循环，避免阻塞 HTTP 请求
+                await async_sleep(max(delay, 0))
+                self.handle_messages(messages)
+                if self.stopped:
+                    break
+        finally:
+            schedule.close()
+            self.close()
@@ -0,0 +1,76 @@
+from threading import Lock
+from typing import List, Union
+import library as pms
+from model.frame import ADSBFrame
+from model.stats import FrameStats
+
+# 报文首字节至 DF 的查找表，DF24 仅由前两位确定
+DF_TABLE = pms.DF_TABLE
+# 奇偶校验位直接为 CRC 的 DF，其余 DF 的校验位与 ICAO 地址叠加，无法单独校验
+DF_CRC = (11, 17, 18)
+# ADS-B 与 Comm-B 报文，分别交由对应的解析函数处理
+DF_ADSB = (17, 18)
+DF_COMMB = (20, 21)
+# DF11 的校验位与询问机识别码叠加，余数低 7 位可不为 0
+DF11_IC_MASK = 0x7F
+
+
+class FrameRouter:
+    """报文路由器
+
+    位于分帧之后、去重与解析之前，以首字节查表得到报文 DF，按 DF 校验报文长度与 CRC
+    校验失败的报文直接丢弃，不再产生去重、解析与存档开销，通过校验的报文标记 DF 后交由解析器按 DF 分派
+    多个数据源共用一个路由器，统计数据按 DF 分别计数
+
+    Attributes:
+        binary (bool): 报文是否为二进制字节，否则为十六进制字符串
+        stats (FrameStats): 各 DF 报文的收到与丢弃数量
+    """
+
+    def __init__(self, binary: bool = False) -> None:
+        self.binary = binary
+        self.stats = FrameStats()
+        self.lock = Lock()
+
+    def route(self, frames: List[ADSBFrame]) -> List[ADSBFrame]:
+        """校验并标记一批报文
+
+        Args:
+            frames (List[ADSBFrame]): 分帧得到的报文帧列表
+
+        Returns:
+            List[ADSBFrame]: 通过校验的报文帧列表，已标记 DF
+        """
+        routed = []
+        received, dropped = self.stats.received, self.stats.dropped
+        # 二进制报文直接取首字节，长报文为 14 字节，十六进制报文为 28 个字符
+        binary = self.binary
+        long = 14 if binary else 28
+        with self.lock:
+            for frame in frames:
+                message = frame.message
+                df = DF_TABLE[message[0] if binary else int(message[:2], 16)]
+                received[df] = received.get(df, 0) + 1
+                # DF 首位为 1 时为 112 位长报文，否则为 56 位短报文
+                if (df >= 16) != (len(message) == long) or (df in DF_CRC and not self.check(df, message)):
+                    dropped[df] = dropped.get(df, 0) + 1
+                    continue
+                frame.df = df
+                routed.append(frame)
+        return routed
+
+    @staticmethod
+    def check(df: int, message: Union[str, bytes]) -> bool:
+        """校验报文 CRC
+
+        Args:
+            df (int): 报文 DF
+            message (Union[str, bytes]): 十六进制报文或二进制报文内容
+
+        Returns:
+            bool: 是否通过校验
+        """
+        remainder = pms.crc_bytes(message) if isinstance(message, bytes) else pms.crc(message)
+        if df == 11:
+            return remainder & ~DF11_IC_MASK == 0
+        return remainder == 0
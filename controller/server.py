@@ -1,4 +1,5 @@
-from typing import Callable, Tuple
+from asyncio import Task, create_task
+from typing import Callable, Coroutine, List, Tuple
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi import FastAPI, HTTPException, Request, WebSocket
@@ -37,6 +38,7 @@ class Server:
             )
         self.host, self.port = host, int(port)
         self.cors, self.debug = cors, debug
+        self.tasks: List[Task] = []
 
     def route(self, conf: RouterItem, *args: Tuple) -> None:
         """注册路由
@@ -104,6 +106,22 @@ class Server:
         def _():
             callback()
 
+    def task(self, callback: Callable[[], Coroutine]) -> None:
+        """注册后台任务
+
+        此方法将在服务器启动时于事件循环中创建后台任务，并在服务器关闭时取消该任务
+        该方法常用于在 uvicorn 事件循环中运行报文接收任务
+
+        Args:
+            callback (Callable[[], Coroutine]): 返回协程的任务函数
+
+        Returns:
+            None
+        """
+        @self.app.on_event("startup")
+        async def _():
+            self.tasks.append(create_task(callback()))
+
     def info(self, title: str, description: str, version: str):
         """设置 Swagger 信息
 
@@ -137,7 +155,7 @@ class Server:
         """启动 FastAPI 服务器
 
         该方法将覆盖默认的异常处理程序并启动服务器
-        此方法还会从 Swagger UI 中删除 422 错误
+        此方法还会从 Swagger UI 中删除 422 错误，并在服务器关闭时取消所有后台任务
 
         Returns:
             None
@@ -163,6 +181,11 @@ class Server:
                 ).model_dump()
             )
 
+        @self.app.on_event("shutdown")
+        async def _():
+            for task in self.tasks:
+                task.cancel()
+
         if not self.app.openapi_schema:
             self.app.openapi_schema = get_openapi(
                 title=self.app.title,
@@ -0,0 +1,192 @@
+from asyncio import get_running_loop, sleep as async_sleep, wait_for
+from datetime import datetime
+from logging import getLogger
+from socket import socket, AF_INET, SOCK_STREAM
+from time import sleep
+from typing import Callable, List, Tuple
+from controller.framer import BeastFramer, RawFramer
+from model.frame import ADSBFrame
+from model.health import SourceHealth
+
+
+class SourceSupervisor:
+    """数据源连接监管者
+
+    负责连接数据源并持续读取报文，连接失败、断开或超时后按指数退避自动重连
+    重连不会重建解码器，已有的解码状态得以保留
+
+    Attributes:
+        host (str): 数据源地址
+        port (int): 数据源端口
+        format (str): 数据格式，可选 raw 或 beast
+        timeout (float): 连接与读取超时时间
+        backoff_initial (float): 首次重连等待时间，单位为秒
+        backoff_max (float): 最大重连等待时间，单位为秒
+        crc_fix_bits (int): DF17/18 报文 CRC 纠错的最大比特数，为 0 时不纠错
+        binary (bool): 是否以二进制字节传递报文
+        framer (Framer): 与数据格式对应的报文分帧器
+        health (SourceHealth): 数据源健康状态
+    """
+
+    def __init__(self, host: str, port: int, format: str, timeout: float, backoff_initial: float, backoff_max: float, feed_id: int = 0, crc_fix_bits: int = 0, binary: bool = False) -> None:
+        self.host, self.port = host, int(port)
+        self.format = format
+        self.timeout = timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.delay = backoff_initial
+        self.framer = (BeastFramer if format == "beast" else RawFramer)(feed_id, crc_fix_bits, binary)
+        self.health = SourceHealth(host=self.host, port=self.port)
+        self.sock: socket = None
+        self.running = True
+        self.connections = 0
+        self.logger = getLogger("global_logger")
+
+    def connect(self) -> Tuple[socket, bool]:
+        """连接 TCP 服务器
+
+        Returns:
+            Tuple[socket, bool]: 已连接的 socket 实例，连接是否失败
+        """
+        sock = socket(AF_INET, SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect((self.host, self.port))
+            return sock, False
+        except:
+            sock.close()
+            return sock, True
+
+    def stop(self) -> None:
+        """停止监管并关闭当前连接
+
+        Returns:
+            None
+        """
+        self.running = False
+        if self.sock is not None:
+            self.sock.close()
+
+    def on_connected(self) -> None:
+        """记录连接成功
+
+        Returns:
+            None
+        """
+        self.connections += 1
+        self.health.connected = True
+        self.health.reconnects = self.connections - 1
+        self.logger.info(f"Connected to {self.host}:{self.port}")
+
+    def on_data(self, frames: List[ADSBFrame], ts: int) -> None:
+        """记录收到的数据，收到数据后才重置退避时间，避免连接后立即断开时陷入快速重连
+
+        Args:
+            frames (List[ADSBFrame]): 切分得到的报文帧列表
+            ts (int): 毫秒时间戳
+
+        Returns:
+            None
+        """
+        self.delay = self.backoff_initial
+        self.health.failures = 0
+        self.health.last_seen = ts
+        self.health.messages += len(frames)
+        self.health.malformed = self.framer.malformed
+        self.health.partial = self.framer.partial
+        if self.framer.corrector is not None:
+            self.health.corrected = self.framer.corrector.corrected
+            self.health.uncorrectable = self.framer.corrector.uncorrectable
+
+    def on_failure(self, error: str) -> float:
+        """记录连接失败并计算下一次重连前的等待时间
+
+        Args:
+            error (str): 错误信息
+
+        Returns:
+            float: 等待时间，单位为秒
+        """
+        self.health.connected = False
+        self.health.failures += 1
+        self.health.last_error = error
+        # 丢弃旧连接中残留的不完整报文
+        self.framer.reset()
+        delay = self.delay
+        self.delay = min(self.delay * 2, self.backoff_max)
+        self.logger.info(f"{error} ({self.host}:{self.port}), retrying in {delay:.2f}s")
+        return delay
+
+    def run(self, handler: Callable[[List[ADSBFrame], int], None]) -> None:
+        """在当前线程中连接数据源并持续读取报文
+
+        Args:
+            handler (Callable[[List[str], int], None]): 报文处理函数，参数为报文帧列表与毫秒时间戳
+
+        Returns:
+            None
+        """
+        while self.running:
+            sock, err = self.connect()
+            if err:
+                sleep(self.on_failure("Failed to connect"))
+                continue
+            self.sock = sock
+            self.on_connected()
+            while self.running:
+                # 按块读取数据，同一块中的报文共用一个时间戳
+                frames, ts, err = self.framer.read(sock)
+                if err:
+                    break
+                self.on_data(frames, ts)
+                handler(frames, ts)
+            sock.close()
+            if self.running:
+                sleep(self.on_failure("Connection lost"))
+
+    async def run_async(self, handler: Callable[[List[ADSBFrame], int], None]) -> None:
+        """在事件循环中连接数据源并持续读取报文
+
+        Args:
+            handler (Callable[[List[str], int], None]): 报文处理函数，参数为报文帧列表与毫秒时间戳
+
+        Returns:
+            None
+        """
+        loop = get_running_loop()
+        ring = self.framer.ring
+        while self.running:
+            sock = socket(AF_INET, SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                await wait_for(
+                    loop.sock_connect(sock, (self.host, self.port)), self.timeout,
+                )
+            except Exception:
+                sock.close()
+                await async_sleep(self.on_failure("Failed to connect"))
+                continue
+            self.sock = sock
+            self.on_connected()
+            try:
+                while True:
+                    # 直接读入分帧器的接收缓冲区，避免逐块分配 bytes
+                    received = await wait_for(
+                        loop.sock_recv_into(sock, ring.writable()), self.timeout,
+                    )
+                    if not received:
+                        break
+                    ring.commit(received)
+                    ts = int(datetime.now().timestamp() * 1000)
+                    frames = self.framer.parse()
+                    self.on_data(frames, ts)
+                    try:
+                        handler(frames, ts)
+                    except Exception as e:
+                        # 处理失败时丢弃该批报文并继续读取，避免数据源任务随之结束
+                        self.logger.error(f"Failed to process {len(frames)} frames ({self.host}:{self.port}): {e!r}")
+            except (TimeoutError, OSError):
+                pass
+            finally:
+                sock.close()
+            await async_sleep(self.on_failure("Connection lost"))
@@ -0,0 +1,21 @@
+from typing import Any, List, Optional
+from pydantic import Field
+from controller.database import Database
+from controller.publisher import Publisher
+from controller.supervisor import SourceSupervisor
+from library.extra import cache
+from model.message import set_message
+from model.response import Response
+from model.router import RouterItem
+from model.stats import FrameStats, QueueStats
+
+
+class CacheResponse(Response):
+    data: Optional[List[Any]] = Field(
+        title="结果", description="各解码函数缓存的命中与未命中次数，未启用缓存时为空"
+    )
+
+
+def cache_handler(__req__: None, router: RouterItem, __database__: Database, __publisher__: Publisher, __supervisors__: List[SourceSupervisor], __stats__: List[QueueStats], __frames__: FrameStats) -> CacheResponse:
+    data = [{"decoder": name, **info} for name, info in cache.stats().items()]
+    return set_message(router["router"], "成功获取解码缓存统计", data)
@@ -0,0 +1,23 @@
+from typing import Any, List, Optional
+from pydantic import Field
+from controller.database import Database
+from controller.publisher import Publisher
+from controller.supervisor import SourceSupervisor
+from model.message import set_message
+from model.response import Response
+from model.router import RouterItem
+from model.stats import FrameStats, QueueStats
+
+
+class FramesResponse(Response):
+    data: Optional[List[Any]] = Field(
+        title="结果", description="各 DF 报文的收到与丢弃数量"
+    )
+
+
+def frames_handler(__req__: None, router: RouterItem, __database__: Database, __publisher__: Publisher, __supervisors__: List[SourceSupervisor], __stats__: List[QueueStats], frames: FrameStats) -> FramesResponse:
+    data = [
+        {"df": df, "received": received, "dropped": frames.dropped.get(df, 0)}
+        for df, received in sorted(frames.received.copy().items())
+    ]
+    return set_message(router["router"], "成功获取报文统计", data)
@@ -0,0 +1,21 @@
+from dataclasses import asdict
+from typing import Any, List, Optional
+from pydantic import Field
+from controller.database import Database
+from controller.publisher import Publisher
+from controller.supervisor import SourceSupervisor
+from model.message import set_message
+from model.response import Response
+from model.router import RouterItem
+from model.stats import FrameStats, QueueStats
+
+
+class HealthResponse(Response):
+    data: Optional[List[Any]] = Field(
+        title="结果", description="各数据源的连接健康状态"
+    )
+
+
+def health_handler(__req__: None, router: RouterItem, __database__: Database, __publisher__: Publisher, supervisors: List[SourceSupervisor], __stats__: List[QueueStats], __frames__: FrameStats) -> HealthResponse:
+    data = [asdict(supervisor.health) for supervisor in supervisors]
+    return set_message(router["router"], "成功获取数据源状态", data)
@@ -3,11 +3,12 @@ from pydantic import BaseModel, Field
 from controller.database import Database
 from controller.decoder import ADSBDecoder
 from controller.publisher import Publisher
-from model.database.records import Records
+from controller.supervisor import SourceSupervisor
+from model.database.records import BinaryRecords, Records
 from model.message import set_message
-from model.packet import ADSBPacket
 from model.response import Response
 from model.router import RouterItem
+from model.stats import FrameStats, QueueStats
 
 
 class QueryRequest(BaseModel):
@@ -25,31 +26,24 @@ class QueryResponse(Response):
     )
 
 
-def query_handler(req: QueryRequest, router: RouterItem, database: Database, __publisher__: Publisher) -> QueryResponse:
-    records = database.query(
-        Records,
-        Records.timestamp >= req.start,
-        Records.timestamp <= req.end,
+def query_handler(req: QueryRequest, router: RouterItem, database: Database, __publisher__: Publisher, __supervisors__: List[SourceSupervisor], __stats__: List[QueueStats], __frames__: FrameStats) -> QueryResponse:
+    # 十六进制与二进制两种存档按时间顺序合并，二进制报文在此统一转换为十六进制输出
+    records = sorted(
+        database.query(
+            Records,
+            Records.timestamp >= req.start,
+            Records.timestamp <= req.end,
+        ) + database.query(
+            BinaryRecords,
+            BinaryRecords.timestamp >= req.start,
+            BinaryRecords.timestamp <= req.end,
+        ),
+        key=lambda record: record.timestamp,
     )
     
-    data_packets = []
-    decoder = ADSBDecoder()
-    
-    for record in records:
-        data = record.get_attrs()
-        decoder.msg = data.get("message")
-        decoder.ts = data.get("timestamp")
-        decoder.tc = data.get("typecode")
-        # 解析报文
-        packet = ADSBPacket()
-        packet.icao = decoder.get_icao()
-        packet.callsign = decoder.get_callsign()
-        packet.altitude = decoder.get_altitude()
-        packet.heading = decoder.get_heading()
-        packet.velocity = decoder.get_velocity()
-        packet.latitude, packet.longitude = decoder.get_position()
-        # 为数据打上时标
-        packet.message = decoder.msg
-        packet.timestamp = decoder.ts
-        data_packets.append(packet.__dict__)
+    # 按列批量解析，位置由同一飞机的前后报文解算
+    data_packets = [
+        packet.__dict__
+        for packet in ADSBDecoder().decode_history([record.get_attrs() for record in records])
+    ]
     return set_message(router["router"], "成功获取数据", data_packets)
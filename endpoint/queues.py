@@ -0,0 +1,20 @@
+from typing import Any, List, Optional
+from pydantic import Field
+from controller.database import Database
+from controller.publisher import Publisher
+from controller.supervisor import SourceSupervisor
+from model.message import set_message
+from model.response import Response
+from model.router import RouterItem
+from model.stats import FrameStats, QueueStats
+
+
+class QueuesResponse(Response):
+    data: Optional[List[Any]] = Field(
+        title="结果", description="各处理环节的队列长度与丢弃数量"
+    )
+
+
+def queues_handler(__req__: None, router: RouterItem, __database__: Database, __publisher__: Publisher, __supervisors__: List[SourceSupervisor], stats: List[QueueStats], __frames__: FrameStats) -> QueuesResponse:
+    data = [{key: getattr(queue, key) for key in QueueStats.__annotations__} for queue in stats]
+    return set_message(router["router"], "成功获取队列状态", data)
@@ -1,11 +1,14 @@
+from typing import List
 from fastapi import WebSocket
 from controller.database import Database
 from controller.publisher import Publisher
+from controller.supervisor import SourceSupervisor
 from model.packet import ADSBPacket
 from model.router import RouterItem
+from model.stats import FrameStats, QueueStats
 
 
-async def socket_handler(ws: WebSocket, __router__: RouterItem, __database__: Database, publisher: Publisher) -> None:
+async def socket_handler(ws: WebSocket, __router__: RouterItem, __database__: Database, publisher: Publisher, __supervisors__: List[SourceSupervisor], __stats__: List[QueueStats], __frames__: FrameStats) -> None:
     """Websocket 处理回调
 
     用于处理 Websocket 连接请求，订阅 ADS-B 数据并将数据推送至客户端
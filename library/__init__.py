@@ -1,8 +1,12 @@
 import os
 import warnings
 
-from . import py_common as common  # type: ignore
-from .py_common import *  # type: ignore
+try:
+    from . import c_common as common  # type: ignore
+    from .c_common import *  # type: ignore
+except ImportError:
+    from . import py_common as common  # type: ignore
+    from .py_common import *  # type: ignore
 
 from .decoder import tell
 from .decoder import adsb
@@ -10,6 +14,7 @@ from .decoder import commb
 from .decoder import allcall
 from .decoder import surv
 from .decoder import bds
+from . import batch
 from .extra import aero
 from .extra import tcpclient
 
@@ -21,6 +26,7 @@ __all__ = [
     "allcall",
     "surv",
     "bds",
+    "batch",
     "aero",
     "tcpclient",
 ]
@@ -0,0 +1,427 @@
+"""Columnar decoding of many Mode-S messages at once.
+
+Messages are held in an (N, 14) uint8 array, one message per row, with
+56-bit messages left aligned and padded with zeros. Every function takes
+such an array and returns NumPy columns computed with vectorized bit
+operations, which decodes archived history orders of magnitude faster
+than calling the scalar decoders message by message.
+
+Fields that do not apply to a message, or that the scalar decoders
+return as None, are NaN in float columns, -1 in integer columns and an
+empty string in the callsign column.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Tuple, Union
+
+import numpy as np
+
+from . import common
+
+MESSAGE_SIZE = 14
+
+_ALTITUDE = np.array(
+    [np.nan if alt is None else alt for alt in common.ALTITUDE_TABLE], dtype=float
+)
+_CHARS = np.array(list(common.CALLSIGN_CHARS))
+
+
+def _surface_speeds() -> np.ndarray:
+    """Ground speed in kts of each 7 bits movement code, as in bds06."""
+    mov_lb = [2, 9, 13, 39, 94, 109, 124]
+    kts_lb = [0.125, 1, 2, 15, 70, 100, 175]
+    step = [0.125, 0.25, 0.5, 1, 2, 5]
+    speeds = np.full(128, np.nan)
+    speeds[1] = 0.0
+    speeds[124] = 175.0
+    for mov in range(2, 124):
+        i = next(i for i, lb in enumerate(mov_lb) if lb > mov)
+        speeds[mov] = kts_lb[i - 1] + (mov - mov_lb[i - 1]) * step[i - 1]
+    return speeds
+
+
+_SURFACE_SPEED = _surface_speeds()
+
+
+def to_array(msgs: Union[np.ndarray, Iterable[str], Iterable[bytes]]) -> np.ndarray:
+    """Convert messages to an (N, 14) uint8 array.
+
+    Args:
+        msgs: (N, 14) or (N, 7) uint8 array, or hexadecimal strings, or
+            7/14 bytes payloads such as the archived BLOBs.
+
+    Returns:
+        np.ndarray: (N, 14) uint8 array, one message per row.
+
+    """
+    if isinstance(msgs, np.ndarray) and msgs.dtype == np.uint8:
+        if msgs.ndim != 2 or msgs.shape[1] not in (7, MESSAGE_SIZE):
+            raise ValueError("Expecting an (N, 14) or (N, 7) array")
+        if msgs.shape[1] == 7:
+            msgs = np.hstack([msgs, np.zeros_like(msgs)])
+        return msgs
+
+    # hexadecimal and binary messages may be mixed, as in merged archives
+    data = b"".join(
+        (bytes.fromhex(m) if isinstance(m, str) else bytes(m)).ljust(MESSAGE_SIZE, b"\x00")
+        for m in msgs
+    )
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, MESSAGE_SIZE)
+
+
+def field(msgs: np.ndarray, start: int, length: int) -> np.ndarray:
+    """Integer value of bits start to start+length of each message.
+
+    Args:
+        msgs: (N, 14) uint8 array.
+        start (int): First bit, counted from 0.
+        length (int): Number of bits, at most 49.
+
+    Returns:
+        np.ndarray: int64 column.
+
+    """
+    first, last = start // 8, (start + length - 1) // 8
+    value = np.zeros(len(msgs), dtype=np.uint64)
+    for i in range(first, last + 1):
+        value = (value << np.uint64(8)) | msgs[:, i]
+    value >>= np.uint64((last + 1) * 8 - start - length)
+    return (value & np.uint64((1 << length) - 1)).astype(np.int64)
+
+
+def df(msgs: np.ndarray) -> np.ndarray:
+    """Downlink format of each message."""
+    return np.minimum(msgs[:, 0] >> 3, 24).astype(np.int64)
+
+
+def typecode(msgs: np.ndarray) -> np.ndarray:
+    """ADS-B type code, -1 for messages other than DF17/18."""
+    tc = (msgs[:, 4] >> 3).astype(np.int64)
+    return np.where(np.isin(df(msgs), (17, 18)), tc, -1)
+
+
+def icao(msgs: np.ndarray) -> np.ndarray:
+    """ICAO address as an integer, -1 where it can not be recovered.
+
+    The address of DF11/17/18 is read from the message. For DF0/4/5/16/20/21
+    it is recovered from the parity overlaid on the checksum.
+    """
+    dfs = df(msgs)
+    result = np.full(len(msgs), -1, dtype=np.int64)
+
+    plain = np.isin(dfs, (11, 17, 18))
+    result[plain] = field(msgs[plain], 8, 24)
+
+    for size, kinds in ((7, (0, 4, 5)), (MESSAGE_SIZE, (16, 20, 21))):
+        rows = np.isin(dfs, kinds)
+        sub = msgs[rows, :size]
+        parity = field(sub, size * 8 - 24, 24)
+        result[rows] = common.crc_batch(sub, encode=True).astype(np.int64) ^ parity
+
+    return result
+
+
+def altitude(msgs: np.ndarray) -> np.ndarray:
+    """Altitude in ft.
+
+    Barometric altitude of DF17/18 airborne positions, GNSS height of
+    TC 20-22, 0 for surface positions, and the altitude code of
+    DF0/4/16/20 replies.
+    """
+    dfs, tc = df(msgs), typecode(msgs)
+    result = np.full(len(msgs), np.nan)
+
+    result[(tc >= 5) & (tc <= 8)] = 0
+
+    airborne = field(msgs, 40, 12)
+    baro = (tc >= 9) & (tc <= 18)
+    # insert the M bit, always 0, to get the 13 bits altitude code
+    code = (airborne >> 6) << 7 | (airborne & 0x3F)
+    result[baro] = _ALTITUDE[code[baro]]
+    gnss = (tc >= 20) & (tc <= 22)
+    result[gnss] = airborne[gnss] * 3.28084
+
+    replies = np.isin(dfs, (0, 4, 16, 20))
+    result[replies] = _ALTITUDE[field(msgs[replies], 19, 13)]
+
+    return result
+
+
+def callsign(msgs: np.ndarray) -> np.ndarray:
+    """Callsign of identification messages (TC 1-4), empty elsewhere."""
+    tc = typecode(msgs)
+    rows = (tc >= 1) & (tc <= 4)
+    value = field(msgs[rows], 40, 48)
+    shifts = np.arange(42, -1, -6)
+    chars = _CHARS[(value[:, None] >> shifts) & 0x3F]
+
+    result = np.full(len(msgs), "", dtype="<U8")
+    result[rows] = np.char.replace(
+        np.ascontiguousarray(chars).view("<U8").ravel(), "#", ""
+    )
+    return result
+
+
+def velocity(msgs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Speed, track or heading, and vertical rate.
+
+    Airborne velocities (TC 19) and surface movements (TC 5-8) are
+    decoded as by adsb.velocity(). Surface messages have a vertical rate
+    of 0.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): speed in kts, angle in
+        degrees, vertical rate in ft/min.
+
+    """
+    tc = typecode(msgs)
+    n = len(msgs)
+    spd, angle, vr = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+
+    # --- airborne ---
+    subtype = field(msgs, 37, 3)
+    ew, ns = field(msgs, 46, 10), field(msgs, 57, 10)
+    # messages without velocity components are not decoded at all
+    airborne = (tc == 19) & (ew != 0) & (ns != 0)
+
+    ground = airborne & np.isin(subtype, (1, 2))
+    factor = np.where(subtype == 2, 4, 1)
+    v_we = np.where(field(msgs, 45, 1) == 1, -1, 1) * (ew - 1) * factor
+    v_sn = np.where(field(msgs, 56, 1) == 1, -1, 1) * (ns - 1) * factor
+    spd[ground] = np.floor(np.sqrt(v_sn * v_sn + v_we * v_we))[ground]
+    trk = np.degrees(np.arctan2(v_we, v_sn))
+    angle[ground] = np.where(trk >= 0, trk, trk + 360)[ground]
+
+    air = airborne & ~np.isin(subtype, (1, 2))
+    hdg = air & (field(msgs, 45, 1) == 1)
+    angle[hdg] = ew[hdg] / 1024 * 360.0
+    spd[air] = ((ns - 1) * np.where(subtype == 4, 4, 1))[air]
+
+    rate = field(msgs, 69, 9)
+    climb = airborne & (rate != 0)
+    sign = np.where(field(msgs, 68, 1) == 1, -1, 1)
+    vr[climb] = (sign * (rate - 1) * 64)[climb]
+
+    # --- surface ---
+    surface = (tc >= 5) & (tc <= 8)
+    spd[surface] = _SURFACE_SPEED[field(msgs[surface], 37, 7)]
+    track = surface & (field(msgs, 44, 1) == 1)
+    angle[track] = field(msgs[track], 45, 7) * 360 / 128
+    vr[surface] = 0
+
+    return spd, angle, vr
+
+
+def cpr(msgs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CPR encoded latitude and longitude fractions and odd/even flag.
+
+    Applies to surface and airborne position messages (TC 5-18, 20-22).
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): latitude and longitude
+        fractions between 0 and 1, and 0 for even, 1 for odd frames.
+
+    """
+    tc = typecode(msgs)
+    rows = ((tc >= 5) & (tc <= 18)) | ((tc >= 20) & (tc <= 22))
+    lat = np.where(rows, field(msgs, 54, 17) / 131072, np.nan)
+    lon = np.where(rows, field(msgs, 71, 17) / 131072, np.nan)
+    oe = np.where(rows, field(msgs, 53, 1), -1)
+    return lat, lon, oe
+
+
+def _previous(index: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Index of the last valid row up to each row, -1 before the first."""
+    return np.maximum.accumulate(np.where(valid, index, -1))
+
+
+def _next(index: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Index of the first valid row from each row, len(index) after the last."""
+    n = len(index)
+    return np.minimum.accumulate(np.where(valid, index, n)[::-1])[::-1]
+
+
+def _global_position(
+    cpr_even: Tuple[np.ndarray, np.ndarray],
+    cpr_odd: Tuple[np.ndarray, np.ndarray],
+    use_even: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized bds05.airborne_position() of even and odd frame pairs.
+
+    Args:
+        cpr_even: latitude and longitude fractions of the even frames.
+        cpr_odd: latitude and longitude fractions of the odd frames.
+        use_even: True where the even frame is the most recent one.
+
+    Returns:
+        (np.ndarray, np.ndarray): latitude and longitude of the most recent
+        frame of each pair, NaN where the frames straddle a latitude zone.
+
+    """
+    (lat_e, lon_e), (lat_o, lon_o) = cpr_even, cpr_odd
+
+    j = np.floor(59 * lat_e - 60 * lat_o + 0.5)
+    lat_even = 360 / 60 * (np.mod(j, 60) + lat_e)
+    lat_odd = 360 / 59 * (np.mod(j, 59) + lat_o)
+    lat_even = np.where(lat_even >= 270, lat_even - 360, lat_even)
+    lat_odd = np.where(lat_odd >= 270, lat_odd - 360, lat_odd)
+
+    nl = common.cprNL_batch(lat_even)
+    same_zone = nl == common.cprNL_batch(lat_odd)
+
+    lat = np.where(use_even, lat_even, lat_odd)
+    ni = np.maximum(np.where(use_even, nl, nl - 1), 1)
+    m = np.floor(lon_e * (nl - 1) - lon_o * nl + 0.5)
+    lon = (360 / ni) * (np.mod(m, ni) + np.where(use_even, lon_e, lon_o))
+    lon = np.where(lon > 180, lon - 360, lon)
+
+    return np.where(same_zone, lat, np.nan), np.where(same_zone, lon, np.nan)
+
+
+def _local_position(
+    lat_cpr: np.ndarray,
+    lon_cpr: np.ndarray,
+    oe: np.ndarray,
+    lat_ref: np.ndarray,
+    lon_ref: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized bds05.airborne_position_with_ref()."""
+    d_lat = np.where(oe == 1, 360 / 59, 360 / 60)
+    j = np.floor(lat_ref / d_lat) + np.floor(
+        0.5 + (np.mod(lat_ref, d_lat) / d_lat) - lat_cpr
+    )
+    lat = d_lat * (j + lat_cpr)
+
+    ni = common.cprNL_batch(lat) - oe
+    d_lon = np.where(ni > 0, 360 / np.maximum(ni, 1), 360)
+    m = np.floor(lon_ref / d_lon) + np.floor(
+        0.5 + (np.mod(lon_ref, d_lon) / d_lon) - lon_cpr
+    )
+    return lat, d_lon * (m + lon_cpr)
+
+
+def position(
+    msgs: np.ndarray,
+    t: np.ndarray,
+    window: float = 10,
+    ref_window: float = 60,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Airborne positions of a history of messages.
+
+    Messages are grouped by ICAO address. Each airborne position message
+    (TC 9-18, 20-22) is paired with the nearest preceding frame of the
+    other parity and the same kind of altitude within the window, and the
+    pair is decoded globally as by adsb.position(). Starting from these
+    positions, the remaining position messages of each track, such as the
+    first frame of the track or frames following a gap, are decoded
+    locally with the nearest decoded position of the same aircraft within
+    ref_window as reference. Decoded positions serve in turn as references
+    until no more messages can be decoded.
+
+    Surface positions need a receiver location and are not decoded.
+
+    Args:
+        msgs: (N, 14) uint8 array.
+        t: Timestamp of each message.
+        window (float): Largest time between the frames of a pair, in the
+            unit of t, 10 seconds by default.
+        ref_window (float): Largest time between a message and its
+            reference position, in the unit of t. The reference has to be
+            within 180 NM of the aircraft.
+
+    Returns:
+        (np.ndarray, np.ndarray): latitude and longitude of each message,
+        NaN where no position could be decoded.
+
+    """
+    n = len(msgs)
+    t = np.asarray(t, dtype=float)
+    tc = typecode(msgs)
+    lat_cpr, lon_cpr, oe = cpr(msgs)
+    gnss = (tc >= 20) & (tc <= 22)
+    rows = np.flatnonzero(((tc >= 9) & (tc <= 18)) | gnss)
+
+    lat, lon = np.full(n, np.nan), np.full(n, np.nan)
+    if len(rows) == 0:
+        return lat, lon
+
+    # sort by aircraft, then time, keeping the order of equal timestamps
+    address = field(msgs[rows], 8, 24)
+    rows = rows[np.lexsort((t[rows], address))]
+    address, t, gnss = field(msgs[rows], 8, 24), t[rows], gnss[rows]
+    lat_cpr, lon_cpr, oe = lat_cpr[rows], lon_cpr[rows], oe[rows]
+    index = np.arange(len(rows))
+
+    # --- global decoding of the nearest even/odd pairs ---
+    # frames with barometric and GNSS altitude are paired separately
+    track = np.r_[0, np.cumsum((np.diff(address) != 0) | (np.diff(gnss) != 0))]
+    prev = np.where(
+        oe == 1, _previous(index, oe == 0), _previous(index, oe == 1)
+    )
+    paired = (prev >= 0) & (track[prev] == track) & (t - t[prev] <= window)
+    cur, prev = index[paired], prev[paired]
+    even = np.where(oe[cur] == 0, cur, prev)
+    odd = np.where(oe[cur] == 0, prev, cur)
+    # as in adsb.position(), the even frame only wins if strictly newer
+    use_even = (oe[cur] == 0) & (t[cur] > t[prev])
+    glat, glon = _global_position(
+        (lat_cpr[even], lon_cpr[even]), (lat_cpr[odd], lon_cpr[odd]), use_even
+    )
+    known_lat, known_lon = np.full(len(rows), np.nan), np.full(len(rows), np.nan)
+    known_lat[cur], known_lon[cur] = glat, glon
+
+    # --- local decoding along each track from the decoded positions ---
+    aircraft = np.r_[0, np.cumsum(np.diff(address) != 0)]
+    while True:
+        known = ~np.isnan(known_lat)
+        before = _previous(index, known)
+        after = _next(index, known)
+        before_ok = (before >= 0) & (aircraft[np.maximum(before, 0)] == aircraft)
+        after_ok = (after < len(index)) & (
+            aircraft[np.minimum(after, len(index) - 1)] == aircraft
+        )
+        dt_before = np.where(before_ok, t - t[np.maximum(before, 0)], np.inf)
+        dt_after = np.where(
+            after_ok, t[np.minimum(after, len(index) - 1)] - t, np.inf
+        )
+        ref = np.where(dt_before <= dt_after, before, after)
+        todo = np.flatnonzero(~known & (np.minimum(dt_before, dt_after) <= ref_window))
+        if len(todo) == 0:
+            break
+        ref = ref[todo]
+        known_lat[todo], known_lon[todo] = _local_position(
+            lat_cpr[todo], lon_cpr[todo], oe[todo], known_lat[ref], known_lon[ref]
+        )
+
+    lat[rows], lon[rows] = known_lat, known_lon
+    return lat, lon
+
+
+def decode(msgs: Union[np.ndarray, Iterable[str], Iterable[bytes]]) -> Dict[str, np.ndarray]:
+    """Decode all supported fields of many messages.
+
+    Args:
+        msgs: Messages in any form accepted by to_array().
+
+    Returns:
+        dict: Column name to NumPy column: df, icao, typecode, altitude,
+        callsign, speed, angle, vertical_rate, cpr_lat, cpr_lon and oe.
+
+    """
+    msgs = to_array(msgs)
+    spd, angle, vr = velocity(msgs)
+    lat, lon, oe = cpr(msgs)
+    return {
+        "df": df(msgs),
+        "icao": icao(msgs),
+        "typecode": typecode(msgs),
+        "altitude": altitude(msgs),
+        "callsign": callsign(msgs),
+        "speed": spd,
+        "angle": angle,
+        "vertical_rate": vr,
+        "cpr_lat": lat,
+        "cpr_lon": lon,
+        "oe": oe,
+    }
@@ -0,0 +1,328 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled versions of the hot primitives of py_common.
+
+hex2bin, crc, df, icao, typecode, cprNL, altitude, squawk and gray2alt
+are implemented in C for hexadecimal and binary strings, and for the
+hexdigits of a ModeSMessage. Any other input, such as a malformed string,
+is passed on to the Python implementation, so results and errors are the
+same as py_common. The rest of the py_common API is re-exported
+unchanged, which makes this module a drop-in replacement selected by
+``library/__init__.py``.
+
+Build in place with ``cythonize -i library/c_common.pyx``.
+"""
+
+from cpython.mem cimport PyMem_Free, PyMem_Malloc
+from cpython.unicode cimport PyUnicode_AsUTF8AndSize
+from libc.math cimport fabs
+
+from . import py_common as _py
+from .py_common import *
+from .py_common import ModeSMessage
+
+cdef unsigned int CRC_TABLE_C[256]
+cdef double NL_TRANSITIONS_C[58]
+cdef int _i
+for _i in range(256):
+    CRC_TABLE_C[_i] = _py.CRC_TABLE[_i]
+for _i in range(58):
+    NL_TRANSITIONS_C[_i] = _py.NL_TRANSITIONS[_i]
+
+cdef list ALTITUDE_LIST = list(_py.ALTITUDE_TABLE)
+cdef list SQUAWK_LIST = list(_py.SQUAWK_TABLE)
+
+
+cdef inline int _hexval(char c) nogil:
+    """Value of a hexdigit, -1 for any other character."""
+    if b"0" <= c <= b"9":
+        return c - 48
+    if b"A" <= c <= b"F":
+        return c - 55
+    if b"a" <= c <= b"f":
+        return c - 87
+    return -1
+
+
+cdef inline object _hexdigits(object msg):
+    """Hexdigits of a ModeSMessage, any other input unchanged."""
+    if type(msg) is ModeSMessage:
+        return msg.hex
+    return msg
+
+
+cdef inline const char* _ascii(object s, Py_ssize_t* n):
+    """UTF-8 buffer of a str, NULL for any other type."""
+    if type(s) is not str:
+        return NULL
+    return PyUnicode_AsUTF8AndSize(s, n)
+
+
+cdef inline int _byte(const char* s, Py_ssize_t i) nogil:
+    """Value of the byte at hexdigits i and i+1, -1 if not hexadecimal."""
+    cdef int hi = _hexval(s[i])
+    cdef int lo = _hexval(s[i + 1])
+    if hi < 0 or lo < 0:
+        return -1
+    return hi << 4 | lo
+
+
+cdef inline long _crc(const char* s, Py_ssize_t n, bint encode) nogil:
+    """CRC of a hexadecimal message of n hexdigits, -1 if malformed."""
+    cdef Py_ssize_t nbytes = n // 2
+    cdef Py_ssize_t i
+    cdef unsigned int c = 0
+    cdef unsigned int parity = 0
+    cdef int byte
+    if n % 2 or nbytes < 3:
+        return -1
+    for i in range(nbytes):
+        byte = _byte(s, 2 * i)
+        if byte < 0:
+            return -1
+        if i < nbytes - 3:
+            c = ((c << 8) & 0xFFFFFF) ^ CRC_TABLE_C[(c >> 16) ^ byte]
+        else:
+            parity = parity << 8 | byte
+    if encode:
+        return c
+    return c ^ parity
+
+
+cdef inline long _bits(const char* s, Py_ssize_t start, Py_ssize_t stop) nogil:
+    """Integer value of a binary string, -1 if not only 0 and 1."""
+    cdef long value = 0
+    cdef Py_ssize_t i
+    for i in range(start, stop):
+        if s[i] != b"0" and s[i] != b"1":
+            return -1
+        value = value << 1 | (s[i] - 48)
+    return value
+
+
+cdef inline long _gray2int(long num) nogil:
+    num ^= num >> 8
+    num ^= num >> 4
+    num ^= num >> 2
+    num ^= num >> 1
+    return num
+
+
+def hex2bin(hexstr):
+    """Convert a hexadecimal string to binary string, with zero fillings."""
+    cdef Py_ssize_t n, i
+    cdef const char* s
+    cdef char* out
+    cdef int v
+    if type(hexstr) is ModeSMessage:
+        # cached by the message
+        return hexstr.bin
+    s = _ascii(hexstr, &n)
+    if s == NULL or n == 0:
+        return _py.hex2bin(hexstr)
+    out = <char*>PyMem_Malloc(4 * n)
+    if out == NULL:
+        raise MemoryError()
+    try:
+        for i in range(n):
+            v = _hexval(s[i])
+            if v < 0:
+                return _py.hex2bin(hexstr)
+            out[4 * i] = 48 + (v >> 3)
+            out[4 * i + 1] = 48 + (v >> 2 & 1)
+            out[4 * i + 2] = 48 + (v >> 1 & 1)
+            out[4 * i + 3] = 48 + (v & 1)
+        return out[: 4 * n].decode("ascii")
+    finally:
+        PyMem_Free(out)
+
+
+def crc(msg, encode=False):
+    """Mode-S Cyclic Redundancy Check.
+
+    Detect if bit error occurs in the Mode-S message. When encode option is on,
+    the checksum is generated.
+
+    Args:
+        msg: 28 bytes hexadecimal message string
+        encode: True to encode the date only and return the checksum
+    Returns:
+        int: message checksum, or partity bits (encoder)
+
+    """
+    cdef Py_ssize_t n
+    cdef const char* s
+    cdef long c = -1
+    msg = _hexdigits(msg)
+    s = _ascii(msg, &n)
+    if s != NULL:
+        c = _crc(s, n, encode)
+    if c < 0:
+        return _py.crc(msg, encode)
+    return c
+
+
+def df(msg):
+    """Decode Downlink Format value, bits 1 to 5."""
+    cdef Py_ssize_t n
+    cdef const char* s
+    cdef int byte = -1
+    msg = _hexdigits(msg)
+    s = _ascii(msg, &n)
+    if s != NULL and n >= 2:
+        byte = _byte(s, 0)
+    if byte < 0:
+        return _py.df(msg)
+    return min(byte >> 3, 24)
+
+
+def icao(msg):
+    """Calculate the ICAO address from an Mode-S message.
+
+    Applicable only with DF4, DF5, DF20, DF21 messages.
+
+    Args:
+        msg (String): 28 bytes hexadecimal message string
+
+    Returns:
+        String: ICAO address in 6 bytes hexadecimal string
+
+    """
+    cdef Py_ssize_t n, i
+    cdef const char* s
+    cdef int byte = -1
+    cdef int DF
+    cdef long c0 = -1
+    cdef long c1 = 0
+    msg = _hexdigits(msg)
+    s = _ascii(msg, &n)
+    if s != NULL and n >= 8:
+        byte = _byte(s, 0)
+    if byte < 0:
+        return _py.icao(msg)
+
+    DF = min(byte >> 3, 24)
+    if DF in (11, 17, 18):
+        return msg[2:8]
+    if DF in (0, 4, 5, 16, 20, 21):
+        c0 = _crc(s, n, True)
+        if c0 < 0:
+            return _py.icao(msg)
+        for i in range(n - 6, n):
+            c1 = c1 << 4 | _hexval(s[i])
+        return "%06X" % (c0 ^ c1)
+    return None
+
+
+def typecode(msg):
+    """Type code of ADS-B message
+
+    Args:
+        msg (string): 28 bytes hexadecimal message string
+
+    Returns:
+        int: type code number
+    """
+    cdef Py_ssize_t n
+    cdef const char* s
+    cdef int byte = -1
+    cdef int me = -1
+    msg = _hexdigits(msg)
+    s = _ascii(msg, &n)
+    if s != NULL and n >= 10:
+        byte = _byte(s, 0)
+        me = _byte(s, 8)
+    if byte < 0 or me < 0:
+        return _py.typecode(msg)
+    if byte >> 3 not in (17, 18):
+        return None
+    return me >> 3
+
+
+def cprNL(double lat):
+    """NL() function in CPR decoding.
+
+    Binary search of the transition latitudes, identical to cprNL_legacy(),
+    including the ValueError raised for a NaN latitude.
+    """
+    cdef double x = fabs(lat)
+    cdef int lo = 0
+    cdef int hi = 58
+    cdef int mid
+    if x != x:
+        raise ValueError("cannot convert float NaN to integer")
+    # same comparisons as bisect_right
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if x < NL_TRANSITIONS_C[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return 59 - lo
+
+
+def altitude(binstr):
+    """Decode 13 bits altitude code.
+
+    Args:
+        binstr (String): 13 bits binary string
+
+    Returns:
+        int: altitude in ft
+
+    """
+    cdef Py_ssize_t n
+    cdef const char* s = _ascii(binstr, &n)
+    cdef long code = -1
+    if s != NULL and n == 13:
+        code = _bits(s, 0, 13)
+    if code < 0:
+        return _py.altitude(binstr)
+    return ALTITUDE_LIST[code]
+
+
+def squawk(binstr):
+    """Decode 13 bits identity (squawk) code.
+
+    Args:
+        binstr (String): 13 bits binary string
+
+    Returns:
+        string: squawk code
+
+    """
+    cdef Py_ssize_t n
+    cdef const char* s = _ascii(binstr, &n)
+    cdef long code = -1
+    if s != NULL and n == 13:
+        code = _bits(s, 0, 13)
+    if code < 0:
+        return _py.squawk(binstr)
+    return SQUAWK_LIST[code]
+
+
+def gray2alt(binstr):
+    cdef Py_ssize_t n
+    cdef const char* s = _ascii(binstr, &n)
+    cdef long gc500 = -1
+    cdef long gc100 = -1
+    cdef long n500, n100
+    if s != NULL and 8 < n <= 40:
+        gc500 = _bits(s, 0, 8)
+        gc100 = _bits(s, 8, n)
+    if gc500 < 0 or gc100 < 0:
+        return _py.gray2alt(binstr)
+
+    n500 = _gray2int(gc500)
+    # in 100-ft step must be converted first
+    n100 = _gray2int(gc100)
+
+    if n100 == 0 or n100 == 5 or n100 == 6:
+        return None
+
+    if n100 == 7:
+        n100 = 5
+
+    if n500 % 2:
+        n100 = 6 - n100
+
+    return (n500 * 500 + n100 * 100) - 1300
@@ -1,22 +1,65 @@
 from typing import Optional
 
+import numpy as np
+
+class ModeSMessage:
+    hex: str
+    value: int
+    bits: int
+    def __init__(self, msg: str, value: Optional[int] = None) -> None: ...
+    @classmethod
+    def from_bytes(cls, data: bytes) -> ModeSMessage: ...
+    def to_bytes(self) -> bytes: ...
+    def field(self, start: int, length: int) -> int: ...
+    @property
+    def bin(self) -> str: ...
+    @property
+    def data(self) -> ModeSMessage: ...
+    @property
+    def df(self) -> int: ...
+    @property
+    def tc(self) -> Optional[int]: ...
+    @property
+    def icao(self) -> Optional[str]: ...
+    @property
+    def oe(self) -> int: ...
+    @property
+    def bds(self) -> Optional[str]: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, key: int | slice) -> str: ...
+
 def hex2bin(hexstr: str) -> str: ...
 def bin2int(binstr: str) -> int: ...
 def hex2int(hexstr: str) -> int: ...
 def bin2hex(binstr: str) -> str: ...
+DF_TABLE: list[int]
+TC_TABLE: list[int]
+ALTITUDE_TABLE: list[Optional[int]]
+SQUAWK_TABLE: list[str]
+CALLSIGN_CHARS: str
+
 def df(msg: str) -> int: ...
 def crc(msg: str, encode: bool = False) -> int: ...
+def crc_bytes(data: bytes, encode: bool = False) -> int: ...
+def crc_batch(msgs: np.ndarray, encode: bool = False) -> np.ndarray: ...
 def floor(x: float) -> float: ...
 def icao(msg: str) -> Optional[str]: ...
 def is_icao_assigned(icao: str) -> bool: ...
 def typecode(msg: str) -> Optional[int]: ...
+def field(msg: str, start: int, length: int) -> int: ...
+NL_TRANSITIONS: tuple[float, ...]
+NL_TRANSITIONS_NP: np.ndarray
+
 def cprNL(lat: float) -> int: ...
+def cprNL_batch(lat: np.ndarray) -> np.ndarray: ...
+def cprNL_legacy(lat: float) -> int: ...
 def idcode(msg: str) -> str: ...
 def squawk(binstr: str) -> str: ...
 def altcode(msg: str) -> Optional[int]: ...
 def altitude(binstr: str) -> Optional[int]: ...
 def gray2alt(binstr: str) -> Optional[int]: ...
 def gray2int(binstr: str) -> int: ...
+def callsign_chars(value: int) -> str: ...
 def data(msg: str) -> str: ...
 def allzeros(msg: str) -> bool: ...
 def wrongstatus(data: str, sb: int, msb: int, lsb: int) -> bool: ...
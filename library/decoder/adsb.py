@@ -285,6 +285,8 @@ def oe_flag(msg: str) -> int:
     Returns:
         int: 0 or 1, for even or odd frame
     """
+    if isinstance(msg, common.ModeSMessage):
+        return msg.oe
     msgbin = common.hex2bin(msg)
     return int(msgbin[53])
 
@@ -18,10 +18,9 @@
 Common functions for Mode-S decoding
 """
 
+import math
 from typing import Optional
 
-import numpy as np
-
 from ... import common
 from ...extra import aero
 from . import (  # noqa: F401
@@ -57,8 +56,8 @@ def is50or60(
     """
 
     def vxy(v, angle):
-        vx = v * np.sin(np.radians(angle))
-        vy = v * np.cos(np.radians(angle))
+        vx = v * math.sin(math.radians(angle))
+        vy = v * math.cos(math.radians(angle))
         return vx, vy
 
     # message must be both BDS 50 and 60 before processing
@@ -79,8 +78,8 @@ def is50or60(
     if h60 is None or (m60 is None and i60 is None):
         return "BDS50,BDS60"
 
-    m60 = np.nan if m60 is None else m60
-    i60 = np.nan if i60 is None else i60
+    m60 = math.nan if m60 is None else m60
+    i60 = math.nan if i60 is None else i60
 
     # --- assuming BDS50 ---
     h50 = bds50.trk50(msg)
@@ -95,8 +94,8 @@ def is50or60(
 
     allbds = ["BDS50", "BDS60", "BDS60"]
 
-    X = np.array([XY5, XY6m, XY6i])
-    Mu = np.array(vxy(spd_ref * aero.kts, trk_ref))
+    X = [XY5, XY6m, XY6i]
+    Mu = vxy(spd_ref * aero.kts, trk_ref)
 
     # compute Mahalanobis distance matrix
     # Cov = [[20**2, 0], [0, 20**2]]
@@ -105,11 +104,15 @@ def is50or60(
 
     # since the covariance matrix is identity matrix,
     #     M-dist is same as eculidian distance
-    try:
-        dist = np.linalg.norm(X - Mu, axis=1)
-        BDS = allbds[np.nanargmin(dist)]
-    except ValueError:
+    dist = [
+        math.sqrt((x - Mu[0]) * (x - Mu[0]) + (y - Mu[1]) * (y - Mu[1]))
+        for x, y in X
+    ]
+    # the first smallest distance, ignoring NaN
+    valid = [(d, i) for i, d in enumerate(dist) if not math.isnan(d)]
+    if not valid:
         return "BDS50,BDS60"
+    BDS = allbds[min(valid)[1]]
 
     return BDS
 
@@ -163,31 +166,27 @@ def infer(msg: str, mrar: bool = False) -> Optional[str]:
     IS40 = bds40.is40(msg)
     IS50 = bds50.is50(msg)
     IS60 = bds60.is60(msg)
-    IS44 = bds44.is44(msg)
-    IS45 = bds45.is45(msg)
 
     if mrar:
-        allbds = np.array(
-            [
-                "BDS10",
-                "BDS17",
-                "BDS20",
-                "BDS30",
-                "BDS40",
-                "BDS44",
-                "BDS45",
-                "BDS50",
-                "BDS60",
-            ]
-        )
+        IS44 = bds44.is44(msg)
+        IS45 = bds45.is45(msg)
+        allbds = [
+            "BDS10",
+            "BDS17",
+            "BDS20",
+            "BDS30",
+            "BDS40",
+            "BDS44",
+            "BDS45",
+            "BDS50",
+            "BDS60",
+        ]
         mask = [IS10, IS17, IS20, IS30, IS40, IS44, IS45, IS50, IS60]
     else:
-        allbds = np.array(
-            ["BDS10", "BDS17", "BDS20", "BDS30", "BDS40", "BDS50", "BDS60"]
-        )
+        allbds = ["BDS10", "BDS17", "BDS20", "BDS30", "BDS40", "BDS50", "BDS60"]
         mask = [IS10, IS17, IS20, IS30, IS40, IS50, IS60]
 
-    bds = ",".join(sorted(allbds[mask]))
+    bds = ",".join(sorted(b for b, m in zip(allbds, mask) if m))
 
     if len(bds) == 0:
         return None
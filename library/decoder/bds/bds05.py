@@ -61,21 +61,20 @@ def airborne_position(
         lat_odd = lat_odd - 360
 
     # check if both are in the same latidude zone, exit if not
-    if common.cprNL(lat_even) != common.cprNL(lat_odd):
+    nl = common.cprNL(lat_even)
+    if nl != common.cprNL(lat_odd):
         return None
 
     # compute ni, longitude index m, and longitude
     # (people pass int+int or datetime+datetime)
     if t0 > t1:  # type: ignore
         lat = lat_even
-        nl = common.cprNL(lat)
-        ni = max(common.cprNL(lat) - 0, 1)
+        ni = max(nl - 0, 1)
         m = common.floor(cprlon_even * (nl - 1) - cprlon_odd * nl + 0.5)
         lon = (360 / ni) * (m % ni + cprlon_even)
     else:
         lat = lat_odd
-        nl = common.cprNL(lat)
-        ni = max(common.cprNL(lat) - 1, 1)
+        ni = max(nl - 1, 1)
         m = common.floor(cprlon_even * (nl - 1) - cprlon_odd * nl + 0.5)
         lon = (360 / ni) * (m % ni + cprlon_odd)
 
@@ -147,16 +146,16 @@ def altitude(msg: str) -> None | int:
     if tc is None or tc < 9 or tc == 19 or tc > 22:
         raise RuntimeError("%s: Not an airborne position message" % msg)
 
-    mb = common.hex2bin(msg)[32:]
-    altbin = mb[8:20]
+    altbin = common.field(msg, 40, 12)
 
     if tc < 19:
-        altcode = altbin[0:6] + "0" + altbin[6:]
-        alt = common.altitude(altcode)
+        # insert the M bit, always 0, to get the 13 bits altitude code
+        altcode = (altbin >> 6) << 7 | (altbin & 0x3F)
+        alt = common.ALTITUDE_TABLE[altcode]
         if alt != -999999:
             return alt
         else:
             # return None if altitude is invalid
             return None
     else:
-        return common.bin2int(altbin) * 3.28084  # type: ignore
+        return altbin * 3.28084  # type: ignore
@@ -62,21 +62,20 @@ def surface_position(
     lat_odd = lat_odd_n if lat_ref > 0 else lat_odd_s
 
     # check if both are in the same latidude zone, rare but possible
-    if common.cprNL(lat_even) != common.cprNL(lat_odd):
+    nl = common.cprNL(lat_even)
+    if nl != common.cprNL(lat_odd):
         return None
 
     # compute ni, longitude index m, and longitude
     # (people pass int+int or datetime+datetime)
     if t0 > t1:  # type: ignore
         lat = lat_even
-        nl = common.cprNL(lat_even)
-        ni = max(common.cprNL(lat_even) - 0, 1)
+        ni = max(nl - 0, 1)
         m = common.floor(cprlon_even * (nl - 1) - cprlon_odd * nl + 0.5)
         lon = (90 / ni) * (m % ni + cprlon_even)
     else:
         lat = lat_odd
-        nl = common.cprNL(lat_odd)
-        ni = max(common.cprNL(lat_odd) - 1, 1)
+        ni = max(nl - 1, 1)
         m = common.floor(cprlon_even * (nl - 1) - cprlon_odd * nl + 0.5)
         lon = (90 / ni) * (m % ni + cprlon_odd)
 
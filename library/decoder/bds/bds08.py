@@ -21,9 +21,7 @@ def category(msg: str) -> int:
     if tc is None or tc < 1 or tc > 4:
         raise RuntimeError("%s: Not a identification message" % msg)
 
-    msgbin = common.hex2bin(msg)
-    mebin = msgbin[32:87]
-    return common.bin2int(mebin[5:8])
+    return common.field(msg, 37, 3)
 
 
 def callsign(msg: str) -> str:
@@ -40,19 +38,7 @@ def callsign(msg: str) -> str:
     if tc is None or tc < 1 or tc > 4:
         raise RuntimeError("%s: Not a identification message" % msg)
 
-    chars = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ#####_###############0123456789######"
-    msgbin = common.hex2bin(msg)
-    csbin = msgbin[40:96]
-
-    cs = ""
-    cs += chars[common.bin2int(csbin[0:6])]
-    cs += chars[common.bin2int(csbin[6:12])]
-    cs += chars[common.bin2int(csbin[12:18])]
-    cs += chars[common.bin2int(csbin[18:24])]
-    cs += chars[common.bin2int(csbin[24:30])]
-    cs += chars[common.bin2int(csbin[30:36])]
-    cs += chars[common.bin2int(csbin[36:42])]
-    cs += chars[common.bin2int(csbin[42:48])]
+    cs = common.callsign_chars(common.field(msg, 40, 48))
 
     # clean string, remove spaces and marks, if any.
     # cs = cs.replace('_', '')
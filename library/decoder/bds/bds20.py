@@ -19,13 +19,13 @@ def is20(msg: str) -> bool:
     if common.allzeros(msg):
         return False
 
-    d = common.hex2bin(common.data(msg))
+    d = common.data(msg)
 
-    if d[0:8] != "00100000":
+    if common.field(d, 0, 8) != 0x20:
         return False
 
     # allow empty callsign
-    if common.bin2int(d[8:56]) == 0:
+    if common.field(d, 8, 48) == 0:
         return True
 
     if "#" in cs20(msg):
@@ -43,18 +43,4 @@ def cs20(msg: str) -> str:
     Returns:
         string: callsign, max. 8 chars
     """
-    chars = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ#####_###############0123456789######"
-
-    d = common.hex2bin(common.data(msg))
-
-    cs = ""
-    cs += chars[common.bin2int(d[8:14])]
-    cs += chars[common.bin2int(d[14:20])]
-    cs += chars[common.bin2int(d[20:26])]
-    cs += chars[common.bin2int(d[26:32])]
-    cs += chars[common.bin2int(d[32:38])]
-    cs += chars[common.bin2int(d[38:44])]
-    cs += chars[common.bin2int(d[44:50])]
-    cs += chars[common.bin2int(d[50:56])]
-
-    return cs
+    return common.callsign_chars(common.field(common.data(msg), 8, 48))
@@ -78,10 +78,5 @@ def emergency_squawk(msg: str) -> str:
             "%s: Not an airborne status message, expecting TC=28" % msg
         )
 
-    msgbin = common.hex2bin(msg)
-
-    # construct the 13 bits Mode A ID code
-    idcode = msgbin[43:56]
-
-    squawk = common.squawk(idcode)
-    return squawk
+    # the 13 bits Mode A ID code
+    return common.SQUAWK_TABLE[common.field(msg, 43, 13)]
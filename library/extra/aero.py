@@ -27,6 +27,8 @@ Speed conversion at altitude H[m] in ISA
 
 """
 
+import math
+
 import numpy as np
 
 """Aero and geo Constants """
@@ -52,6 +54,17 @@ a0 = 340.293988  # m/s, sea level speed of sound ISA, sqrt(gamma*R*T0)
 
 def atmos(H):
     # H in metres
+    if isinstance(H, (int, float)):
+        # single altitude, plain floats are much faster than NumPy scalars
+        T = max(288.15 - 0.0065 * H, 216.65)
+        rhotrop = 1.225 * (T / 288.15) ** 4.256848030018761
+        dhstrat = max(0.0, H - 11000.0)
+        # math.exp may differ from np.exp in the last bit, keep NumPy above
+        # the tropopause so that results stay identical to the array path
+        rho = rhotrop * float(np.exp(-dhstrat / 6341.552161)) if dhstrat else rhotrop
+        p = rho * R * T
+        return p, rho, T
+
     T = np.maximum(288.15 - 0.0065 * H, 216.65)
     rhotrop = 1.225 * (T / 288.15) ** 4.256848030018761
     dhstrat = np.maximum(0.0, H - 11000.0)
@@ -60,6 +73,13 @@ def atmos(H):
     return p, rho, T
 
 
+def _sqrt(x):
+    """Square root of a single value with math, of arrays with NumPy."""
+    if isinstance(x, float):
+        return math.sqrt(x) if x >= 0 else math.nan
+    return np.sqrt(x)
+
+
 def temperature(H):
     p, r, T = atmos(H)
     return T
@@ -78,7 +98,7 @@ def density(H):
 def vsound(H):
     """Speed of sound"""
     T = temperature(H)
-    a = np.sqrt(gamma * R * T)
+    a = _sqrt(gamma * R * T)
     return a
 
 
@@ -144,14 +164,14 @@ def mach2tas(Mach, H):
 def eas2tas(Veas, H):
     """Equivalent Airspeed to True Airspeed"""
     rho = density(H)
-    Vtas = Veas * np.sqrt(rho0 / rho)
+    Vtas = Veas * _sqrt(rho0 / rho)
     return Vtas
 
 
 def tas2eas(Vtas, H):
     """True Airspeed to Equivalent Airspeed"""
     rho = density(H)
-    Veas = Vtas * np.sqrt(rho / rho0)
+    Veas = Vtas * _sqrt(rho / rho0)
     return Veas
 
 
@@ -159,7 +179,7 @@ def cas2tas(Vcas, H):
     """Calibrated Airspeed to True Airspeed"""
     p, rho, T = atmos(H)
     qdyn = p0 * ((1 + rho0 * Vcas * Vcas / (7 * p0)) ** 3.5 - 1.0)
-    Vtas = np.sqrt(7 * p / rho * ((1 + qdyn / p) ** (2 / 7.0) - 1.0))
+    Vtas = _sqrt(7 * p / rho * ((1 + qdyn / p) ** (2 / 7.0) - 1.0))
     return Vtas
 
 
@@ -167,7 +187,7 @@ def tas2cas(Vtas, H):
     """True Airspeed to Calibrated Airspeed"""
     p, rho, T = atmos(H)
     qdyn = p * ((1 + rho * Vtas * Vtas / (7 * p)) ** 3.5 - 1.0)
-    Vcas = np.sqrt(7 * p0 / rho0 * ((qdyn / p0 + 1.0) ** (2 / 7.0) - 1.0))
+    Vcas = _sqrt(7 * p0 / rho0 * ((qdyn / p0 + 1.0) ** (2 / 7.0) - 1.0))
     return Vcas
 
 
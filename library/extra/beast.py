@@ -0,0 +1,111 @@
+"""Framing of the Mode-S Beast binary format.
+
+<esc> "1" : 6 byte MLAT timestamp, 1 byte signal level,
+    2 byte Mode-AC
+<esc> "2" : 6 byte MLAT timestamp, 1 byte signal level,
+    7 byte Mode-S short frame
+<esc> "3" : 6 byte MLAT timestamp, 1 byte signal level,
+    14 byte Mode-S long frame
+<esc> "4" : 6 byte MLAT timestamp, status data, DIP switch
+    configuration settings (not on Mode-S Beast classic)
+<esc><esc>: true 0x1a
+<esc> is 0x1a, and "1", "2" and "3" are 0x31, 0x32 and 0x33
+
+timestamp:
+wiki.modesbeast.com/Radarcape:Firmware_Versions#The_GPS_timestamp
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple, Union
+
+from .ringbuffer import RingBuffer
+
+BEAST_ESC = 0x1A
+# 6 byte MLAT timestamp and 1 byte signal level before the payload
+BEAST_HEADER = 7
+# frame sizes after <esc> "1", "2" and "3": header, and the Mode-AC or
+# Mode-S payload
+BEAST_SIZES = {0x31: 9, 0x32: 14, 0x33: 21}
+
+Frame = Union[bytes, memoryview]
+
+
+def unescape(ring: RingBuffer, start: int, size: int) -> Tuple[bytes, int, bool]:
+    """Undo <esc><esc> escaping of a beast frame starting at ``start``.
+
+    Returns:
+        (bytes, int, bool): the unescaped frame, the end position of the
+        frame in the buffer, and whether the frame was truncated by the
+        start of the next frame (an unescaped <esc>).
+
+    """
+    buffer = ring.data
+    length = ring.end
+    frame = bytearray()
+    i = start
+    while len(frame) < size and i < length:
+        if buffer[i] == BEAST_ESC:
+            if i + 1 >= length:
+                break
+            if buffer[i + 1] != BEAST_ESC:
+                return bytes(frame), i, True
+            i += 1
+        frame.append(buffer[i])
+        i += 1
+    return bytes(frame), i, False
+
+
+def split(ring: RingBuffer) -> Tuple[List[Tuple[int, Frame]], int, int]:
+    """Split and consume all complete beast frames of a ring buffer.
+
+    An incomplete frame at the end is kept in the buffer for the next
+    reading cycle. Frames without escaped bytes are memoryview slices of
+    the buffer, only valid until the next write into it.
+
+    Returns:
+        (list, int, int): (message type, frame) pairs, the frame holding
+        the header and the payload, the number of unknown message types,
+        and the number of frames truncated by the next frame.
+
+    """
+    buffer, view, length = ring.data, ring.view, ring.end
+
+    frames = []
+    malformed = partial = 0
+    i = ring.start
+    while True:
+        i = buffer.find(BEAST_ESC, i, length)
+        if i < 0:
+            i = length
+            break
+        if i + 1 >= length:
+            break
+
+        msgtype = buffer[i + 1]
+        size = BEAST_SIZES.get(msgtype)
+        if size is None:
+            # <esc><esc> outside of a frame, or unknown message type
+            if msgtype != BEAST_ESC:
+                malformed += 1
+            i += 2 if msgtype == BEAST_ESC else 1
+            continue
+
+        start = i + 2
+        # bytes past the ring's end are stale, never read beyond it
+        end = min(start + size, length)
+        frame = view[start:end]
+        if buffer.find(BEAST_ESC, start, end) >= 0:
+            frame, end, truncated = unescape(ring, start, size)
+            if truncated:
+                partial += 1
+                i = end
+                continue
+        if len(frame) < size:
+            # incomplete frame, wait for more data
+            break
+        i = end
+        frames.append((msgtype, frame))
+
+    ring.consume(i)
+    return frames, malformed, partial
@@ -0,0 +1,95 @@
+"""Bounded LRU cache of decoder results.
+
+Receivers repeat identical frames, and several receivers feeding the
+same server hear the same aircraft. enable() replaces the stateless
+decoders of adsb, commb and bds by versions memoized with a size-bounded
+LRU cache keyed on the message and the other arguments, so a repeated
+message costs a dictionary lookup. The cache is off until enabled.
+
+Only the module attributes are replaced: callers that look the decoders
+up through the module, such as ``pms.adsb.callsign(msg)``, use the
+cache, while names imported before enable() keep the original function.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from types import ModuleType
+from typing import Callable, Dict, List, Tuple
+
+from ..decoder import adsb, bds, commb
+
+# decoders returning a mutable value, a cached one would be shared between
+# callers: commb.cap17 returns a new list of capabilities on every call
+MUTABLE = ("cap17",)
+
+# decoders whose result only depends on their arguments, all returning
+# immutable values that can be shared between callers
+DECODERS: List[Tuple[ModuleType, str]] = [
+    (adsb, "callsign"),
+    (adsb, "velocity"),
+    (adsb, "altitude"),
+    (bds, "infer"),
+] + [(commb, name) for name in commb.__all__ if name not in MUTABLE]
+
+_originals: Dict[Tuple[ModuleType, str], Callable] = {}
+
+
+def _qualname(module: ModuleType, name: str) -> str:
+    return "%s.%s" % (module.__name__.rsplit(".", 1)[-1], name)
+
+
+def enable(maxsize: int = 4096) -> None:
+    """Memoize the decoders, replacing any cache enabled before.
+
+    Args:
+        maxsize (int): Largest number of results kept for each decoder,
+            the least recently used ones are evicted first.
+
+    """
+    if maxsize <= 0:
+        raise ValueError("The cache size must be positive")
+    disable()
+    for module, name in DECODERS:
+        func = getattr(module, name)
+        _originals[(module, name)] = func
+        setattr(module, name, lru_cache(maxsize=maxsize)(func))
+
+
+def disable() -> None:
+    """Restore the original decoders and drop the cached results."""
+    for (module, name), func in _originals.items():
+        setattr(module, name, func)
+    _originals.clear()
+
+
+def enabled() -> bool:
+    """Whether the decoders are currently memoized."""
+    return bool(_originals)
+
+
+def clear() -> None:
+    """Drop the cached results and reset the statistics."""
+    for module, name in _originals:
+        getattr(module, name).cache_clear()
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Hit and miss statistics of each memoized decoder.
+
+    Returns:
+        dict: Decoder name, such as "adsb.callsign", to its number of
+        hits and misses, and the current and largest number of results.
+        Empty when the cache is not enabled.
+
+    """
+    result = {}
+    for module, name in _originals:
+        info = getattr(module, name).cache_info()
+        result[_qualname(module, name)] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+        }
+    return result
@@ -0,0 +1,115 @@
+"""Bit error correction of Mode S extended squitters.
+
+The Mode S CRC is linear, so the checksum of a corrupted DF17/18 frame
+(its syndrome) only depends on which bits were flipped. A table mapping
+the syndrome of every 1-bit, and optionally 2-bit, error pattern to the
+bits to flip repairs a frame with a single dictionary lookup.
+"""
+
+from __future__ import annotations
+
+from itertools import combinations
+from typing import Dict, Optional, Union
+
+from .. import common
+
+# only 112-bit extended squitters are corrected
+FRAME_BITS = 112
+# the downlink format field is not corrected, flipping it would turn
+# other downlink formats into DF17/18
+FIRST_BIT = 5
+
+_tables: Dict[int, Dict[int, int]] = {}
+
+
+def syndrome_table(max_bits: int = 1) -> Dict[int, int]:
+    """Map syndromes to the error patterns of up to max_bits flipped bits.
+
+    Syndromes shared by several 2-bit patterns are left out, since the
+    flipped bits can not be told apart.
+
+    Args:
+        max_bits (int): Largest number of flipped bits, 1 or 2.
+
+    Returns:
+        dict: Syndrome to the bit mask to XOR with the message.
+
+    """
+    if max_bits not in (1, 2):
+        raise ValueError("Only 1 or 2 bit errors can be corrected")
+    if max_bits in _tables:
+        return _tables[max_bits]
+
+    single = {}
+    for i in range(FIRST_BIT, FRAME_BITS):
+        mask = 1 << (FRAME_BITS - 1 - i)
+        single[common.crc("%028X" % mask)] = mask
+
+    table = dict(single)
+    if max_bits == 2:
+        double: Dict[int, Optional[int]] = {}
+        for (s1, m1), (s2, m2) in combinations(single.items(), 2):
+            syndrome = s1 ^ s2
+            double[syndrome] = None if syndrome in double else m1 | m2
+        for syndrome, mask in double.items():
+            if mask is not None and syndrome not in table:
+                table[syndrome] = mask
+
+    _tables[max_bits] = table
+    return table
+
+
+class CrcCorrector(object):
+    """Repair bit errors of DF17/18 frames through a syndrome table.
+
+    Args:
+        max_bits (int): Largest number of flipped bits to repair, 1 or 2.
+            Correcting 2 bits recovers more frames, at a higher risk of
+            turning a badly damaged frame into a wrong one.
+
+    Attributes:
+        corrected (int): Number of frames repaired.
+        uncorrectable (int): Number of DF17/18 frames with a CRC error
+            that could not be repaired.
+
+    """
+
+    def __init__(self, max_bits: int = 1) -> None:
+        self.max_bits = max_bits
+        self.table = syndrome_table(max_bits)
+        self.corrected = 0
+        self.uncorrectable = 0
+
+    def correct(self, msg: Union[str, bytes]) -> Optional[Union[str, bytes]]:
+        """Check the CRC of a message and repair it if needed.
+
+        Args:
+            msg (str | bytes): Message in hexadecimal, or its binary payload.
+
+        Returns:
+            str | bytes: The message, repaired if it was a DF17/18 frame
+            with a correctable error, or None if such a frame can not be
+            repaired. Other messages are returned unchanged.
+
+        """
+        if isinstance(msg, bytes):
+            if len(msg) != FRAME_BITS // 8 or msg[0] >> 3 not in (17, 18):
+                return msg
+            syndrome = common.crc_bytes(msg)
+        else:
+            if len(msg) != FRAME_BITS // 4 or int(msg[:2], 16) >> 3 not in (17, 18):
+                return msg
+            syndrome = common.crc(msg)
+
+        if syndrome == 0:
+            return msg
+
+        mask = self.table.get(syndrome)
+        if mask is None:
+            self.uncorrectable += 1
+            return None
+
+        self.corrected += 1
+        if isinstance(msg, bytes):
+            return (int.from_bytes(msg, "big") ^ mask).to_bytes(FRAME_BITS // 8, "big")
+        return "%028X" % (int(msg, 16) ^ mask)
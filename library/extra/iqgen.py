@@ -0,0 +1,184 @@
+"""Synthetic Mode S signal generator.
+
+Pulse-position modulates Mode S frames into complex IQ samples, as an
+RTL-SDR dongle tuned to 1090 MHz would receive them. The output can be
+written to an IQ file for ``RtlReader(iq_file=...)`` or fed directly to
+``RtlReader._read_callback``, so the demodulator can be tested and
+benchmarked without a receiver.
+
+RtlReader only demodulates 2 Msps, the rate it sets on the dongle, and an
+IQ file carries no sample rate. 2.4 Msps output is meant for external
+demodulators: written to a file it would be demodulated at the wrong
+rate, and feed() refuses it.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from library.extra import rtlreader
+
+sample_rates = [2e6, 2.4e6]
+
+# start of the preamble pulses, durations in microseconds
+preamble_pulses = [0.0, 1.0, 3.5, 4.5]
+preamble_us = 8.0
+bit_us = 1.0
+pulse_us = 0.5
+
+
+def frame_duration(msg: str) -> float:
+    """Duration of the transmission of a message in microseconds."""
+    return preamble_us + len(msg) * 4 * bit_us
+
+
+class IQGenerator(object):
+    """Modulate Mode S messages into complex IQ samples.
+
+    Each transmission gets a random carrier phase. The frequency offset
+    rotates the phase over time, as a receiver tuned slightly off
+    1090 MHz would see it. Complex Gaussian noise is added with a power
+    set by the SNR relative to the pulse amplitude.
+
+    Args:
+        sample_rate (float): Samples per second, 2e6 or 2.4e6. Only
+            2e6 can be demodulated by RtlReader.
+        amplitude (float): Pulse amplitude, the full scale of the
+            8-bit samples is 1.
+        snr (float): Signal to noise ratio of the pulses in dB, None
+            for a noise-free signal.
+        freq_offset (float): Carrier frequency offset in Hz.
+        seed (int): Seed of the random generator.
+
+    """
+
+    def __init__(
+        self, sample_rate=2e6, amplitude=0.5, snr=20.0, freq_offset=0.0, seed=None
+    ) -> None:
+        if sample_rate not in sample_rates:
+            raise ValueError("Unsupported sample rate: %s" % sample_rate)
+        self.sample_rate = sample_rate
+        self.amplitude = amplitude
+        self.snr = snr
+        self.freq_offset = freq_offset
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def samples_per_us(self) -> float:
+        return self.sample_rate / 1e6
+
+    def envelope(self, msg: str, start: float, length: int) -> np.ndarray:
+        """Pulse envelope of a message as seen by ``length`` samples.
+
+        Each sample holds the fraction of its duration covered by a pulse,
+        so pulses that do not line up with the samples, such as at
+        2.4 Msps, are spread over neighbouring samples.
+
+        Args:
+            msg (str): Message in hexadecimal.
+            start (float): Start of the preamble in microseconds from
+                the first sample.
+            length (int): Number of samples.
+
+        Returns:
+            np.ndarray: Envelope between 0 and 1.
+
+        """
+        bits = np.unpackbits(np.frombuffer(bytes.fromhex(msg), dtype=np.uint8))
+        # a 1 bit is a pulse in the first half of the bit period
+        data = preamble_us + np.arange(bits.size) * bit_us + (bits == 0) * pulse_us
+        pulses = np.concatenate([preamble_pulses, data]) + start
+
+        # total pulse time before each point, evaluated at sample edges
+        points = np.column_stack([pulses, pulses + pulse_us]).ravel()
+        covered = np.zeros(points.size)
+        covered[1::2] = pulse_us
+        covered = np.cumsum(covered)
+        edges = np.arange(length + 1) / self.samples_per_us
+        return np.diff(np.interp(edges, points, covered)) * self.samples_per_us
+
+    def generate(self, messages, gap=200.0, overlap=0.0, align=False):
+        """Modulate messages one after another into a block of IQ samples.
+
+        Args:
+            messages (list): Messages in hexadecimal.
+            gap (float): Mean idle time between two transmissions in
+                microseconds, exponentially distributed.
+            overlap (float): Fraction of the messages that start while
+                the previous one is still being transmitted.
+            align (bool): Start each transmission on a sample boundary.
+                Otherwise pulses start anywhere within a sample, as
+                they do over the air.
+
+        Returns:
+            (np.ndarray, list): complex64 samples and the start time of
+            each message in microseconds.
+
+        """
+        starts = []
+        end = 0.0
+        for k, msg in enumerate(messages):
+            if k > 0 and self.rng.random() < overlap:
+                # start somewhere inside the previous transmission
+                start = starts[-1] + self.rng.uniform(0, frame_duration(messages[k - 1]))
+            else:
+                start = end + self.rng.exponential(gap)
+            if align:
+                start = np.ceil(start * self.samples_per_us) / self.samples_per_us
+            starts.append(start)
+            end = max(end, start + frame_duration(msg))
+
+        length = int(np.ceil((end + gap) * self.samples_per_us))
+        signal = np.zeros(length, dtype=np.complex128)
+        for msg, start in zip(messages, starts):
+            # only the samples around the frame are modulated
+            first = int(start * self.samples_per_us)
+            last = min(int(np.ceil((start + frame_duration(msg)) * self.samples_per_us)) + 1, length)
+            env = self.envelope(msg, start - first / self.samples_per_us, last - first)
+            phase = self.rng.uniform(0, 2 * np.pi)
+            signal[first:last] += self.amplitude * env * np.exp(1j * phase)
+
+        if self.freq_offset:
+            times = np.arange(length) / self.sample_rate
+            signal *= np.exp(2j * np.pi * self.freq_offset * times)
+
+        if self.snr is not None:
+            sigma = self.amplitude / np.sqrt(2) / 10 ** (self.snr / 20)
+            signal += self.rng.normal(0, sigma, length) + 1j * self.rng.normal(0, sigma, length)
+
+        return signal.astype(np.complex64), starts
+
+    def write(self, path, samples, iq_format="u8") -> None:
+        """Append IQ samples to a file readable by ``RtlReader``.
+
+        Args:
+            path (str): Output file.
+            samples (np.ndarray): Complex samples.
+            iq_format (str): "u8" for interleaved 8-bit samples as written
+                by rtl_sdr, or "cf32" for complex64.
+
+        """
+        if iq_format == "u8":
+            iq = np.column_stack([samples.real, samples.imag]).ravel()
+            data = np.clip(np.round((iq + 1) * 127.5), 0, 255).astype(np.uint8)
+        elif iq_format == "cf32":
+            data = samples.astype(np.complex64)
+        else:
+            raise ValueError("Unknown IQ format: %s" % iq_format)
+        with open(path, "ab") as f:
+            data.tofile(f)
+
+    def feed(self, reader, samples) -> None:
+        """Pass IQ samples to a reader in the blocks read from the device.
+
+        Args:
+            reader (RtlReader): Demodulator receiving the samples.
+            samples (np.ndarray): Complex samples.
+
+        """
+        if self.sample_rate != rtlreader.sampling_rate:
+            raise ValueError(
+                "RtlReader only demodulates %g Msps" % (rtlreader.sampling_rate / 1e6)
+            )
+        for i in range(0, len(samples), rtlreader.read_size):
+            reader._read_callback(samples[i : i + rtlreader.read_size], None)
@@ -0,0 +1,241 @@
+"""Replay recorded Mode-S captures as if they were received live.
+
+Captures are memory-mapped and fed through the same parsers as
+:class:`TcpClient`, so a recording of a raw, beast or skysense stream
+replays exactly like the live feed it was taken from. Timestamped text
+logs, one ``<timestamp> <message>`` per line as printed by
+``TcpClient.handle_messages``, are supported as well.
+
+Messages are paced by their capture timestamps: beast MLAT time,
+skysense time of day, or the log timestamp. Raw captures carry no
+timestamps and are always replayed as fast as they can be parsed.
+"""
+
+import mmap
+import time
+import traceback
+
+from .tcpclient import TcpClient, HEX_CHARS
+
+CHUNK_SIZE = 64 * 1024
+MESSAGE_LENGTHS = (14, 28)
+
+# a capture clock jumping backwards, or a consumer falling further behind
+# than this, re-anchors the replay instead of bursting to catch up
+MAX_LAG = 1.0
+
+
+def parse_log_line(line):
+    """Parse one line of a timestamped message log.
+
+    Accepts ``<timestamp> <message>`` separated by whitespace or a comma,
+    with the message optionally written as ``*...;``.
+
+    Returns:
+        (float, str): Timestamp in seconds and the hex message, or None if
+        the line is not a valid log entry.
+
+    """
+    fields = line.replace(",", " ").split()
+    if len(fields) < 2:
+        return None
+    try:
+        t = float(fields[0])
+    except ValueError:
+        return None
+    msg = fields[-1].strip("*;")
+    if len(msg) not in MESSAGE_LENGTHS or not HEX_CHARS.issuperset(msg):
+        return None
+    return t, msg.upper()
+
+
+class ReplayClock(object):
+    """Pace replayed messages by their capture timestamps.
+
+    The first message anchors capture time to wall-clock time, later ones
+    are due ``(t - t0) / speed`` seconds after it. A speed of 0 replays
+    without any delay.
+    """
+
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.origin = None
+
+    def reset(self):
+        self.origin = None
+
+    def delay(self, t):
+        """Seconds to wait before a message captured at ``t`` is due."""
+        if self.speed <= 0:
+            return 0
+        now = time.time()
+        if self.origin is None:
+            self.origin = (t, now)
+            return 0
+        t0, wall0 = self.origin
+        delay = wall0 + (t - t0) / self.speed - now
+        if delay < -MAX_LAG:
+            self.origin = (t, now)
+            return 0
+        return delay
+
+
+class FileClient(TcpClient):
+    """Replay a capture file through the TcpClient message handlers.
+
+    Subclasses override ``handle_messages`` exactly as they would for a
+    live :class:`TcpClient`.
+    """
+
+    datatypes = TcpClient.datatypes + ["log"]
+
+    def __init__(self, path, datatype, speed=1.0):
+        super(FileClient, self).__init__(path, 0, datatype)
+        self.path = path
+        self.clock = ReplayClock(speed)
+        self.mlat_clock = True
+        # offset from beast MLAT time to wall-clock time, set on first message
+        self.mlat_offset = None
+        self.file = None
+        self.mmap = None
+        self.stopped = False
+
+    def connect(self):
+        self.file = open(self.path, "rb")
+        try:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file can not be mapped, there is nothing to replay
+            self.mmap = None
+        self.ring.clear()
+        self.clock.reset()
+
+    def stop(self):
+        # may be called from handle_messages, while the replay still holds
+        # a view of the file; the file is closed once the replay returns
+        self.stopped = True
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def read_log_buffer(self):
+        """Read a timestamped message log, one message per line."""
+        ring = self.ring
+        end = ring.data.rfind(b"\n", ring.start, ring.end)
+        if end < 0:
+            return []
+
+        messages = []
+        text = str(ring.view[ring.start : end], "ascii", "ignore")
+        for line in text.splitlines():
+            entry = parse_log_line(line)
+            if entry is not None:
+                messages.append([entry[1], entry[0]])
+
+        ring.consume(end + 1)
+
+        return messages
+
+    def read_buffer(self):
+        messages = super(FileClient, self).read_buffer()
+        if self.datatype == "beast" and messages:
+            # MLAT time only counts from the receiver start, anchor it
+            # to the wall clock when the replay starts
+            if self.mlat_offset is None:
+                self.mlat_offset = time.time() - messages[0][1]
+            for message in messages:
+                message[1] += self.mlat_offset
+        return messages
+
+    def schedule(self):
+        """Yield batches of messages, each with the seconds to wait for it.
+
+        The delay of a batch is measured when the batch is requested, so
+        the consumer is expected to wait for it before asking for the next.
+        """
+        if self.mmap is None:
+            return
+        view = memoryview(self.mmap)
+        paced = self.datatype != "raw"
+        try:
+            for i in range(0, len(view), CHUNK_SIZE):
+                self.ring.write(view[i : i + CHUNK_SIZE])
+                messages = self.read_buffer()
+                if not paced:
+                    if messages:
+                        yield 0, messages
+                    continue
+
+                batch, due = [], 0
+                for message in messages:
+                    delay = self.clock.delay(message[1])
+                    if delay > 0 and batch:
+                        yield due, batch
+                        batch = []
+                        # the consumer has waited for the batch, measure again
+                        delay = self.clock.delay(message[1])
+                    if not batch:
+                        due = delay
+                    batch.append(message)
+                if batch:
+                    yield due, batch
+
+            if self.datatype == "log":
+                # the last line may not end with a newline
+                self.ring.write(b"\n")
+                messages = self.read_buffer()
+                if messages:
+                    yield 0, messages
+        finally:
+            view.release()
+
+    def replay(self):
+        """Yield batches of messages, each one when it is due."""
+        schedule = self.schedule()
+        try:
+            for delay, messages in schedule:
+                if delay > 0:
+                    time.sleep(delay)
+                yield messages
+        finally:
+            schedule.close()
+
+    def run(self, raw_pipe_in=None, stop_flag=None, exception_queue=None):
+        self.raw_pipe_in = raw_pipe_in
+        self.exception_queue = exception_queue
+        self.stop_flag = stop_flag
+
+        self.connect()
+        replay = self.replay()
+        try:
+            for messages in replay:
+                self.handle_messages(messages)
+                if self.stopped:
+                    break
+        except Exception as e:
+            tb = traceback.format_exc()
+            if self.exception_queue is not None:
+                self.exception_queue.put(tb)
+            raise e
+        finally:
+            replay.close()
+            self.close()
+
+        # keep the last state on screen until the user quits
+        while self.stop_flag is not None and not self.stop_flag.value:
+            time.sleep(0.1)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # for testing purpose only
+    path = sys.argv[1]
+    datatype = sys.argv[2]
+    speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    FileClient(path, datatype, speed).run()
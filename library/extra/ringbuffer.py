@@ -0,0 +1,87 @@
+"""Preallocated receive buffer shared by the TCP stream parsers.
+
+Data is received straight into a fixed ``bytearray`` with
+``socket.recv_into``, and the parsers scan it in place between ``start``
+and ``end``. Unconsumed bytes are only moved back to the front of the
+buffer when the write position reaches its end, so a sustained feed does
+not allocate a new ``bytes`` object on every read.
+"""
+
+DEFAULT_SIZE = 256 * 1024
+
+
+class RingBuffer(object):
+    """Fixed size receive buffer with in-place framing.
+
+    ``data[start:end]`` holds bytes that have been received but not yet
+    consumed by a parser. Parsers search ``data`` with bounded
+    ``find``/``rfind`` calls and read frames as ``memoryview`` slices of
+    ``view``, then call ``consume`` with the position of the first byte
+    they could not use.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        self.size = size
+        self.data = bytearray(size)
+        self.view = memoryview(self.data)
+        self.start = 0
+        self.end = 0
+        # bytes thrown away because the buffer filled up with no complete frame
+        self.dropped = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def clear(self):
+        """Discard all pending bytes."""
+        self.start = 0
+        self.end = 0
+
+    def compact(self):
+        """Move the pending bytes to the front of the buffer."""
+        pending = self.end - self.start
+        if self.start:
+            self.view[:pending] = self.view[self.start : self.end]
+            self.start = 0
+            self.end = pending
+        if pending == self.size:
+            # a full buffer without a single complete frame is garbage
+            self.dropped += pending
+            self.clear()
+
+    def writable(self):
+        """Return the free tail of the buffer, compacting it if needed."""
+        if self.end == self.size:
+            self.compact()
+        return self.view[self.end :]
+
+    def commit(self, nbytes):
+        """Mark ``nbytes`` written into ``writable()`` as received."""
+        self.end += nbytes
+
+    def consume(self, position):
+        """Release everything before ``position``."""
+        if position >= self.end:
+            self.start = self.end = 0
+        else:
+            self.start = position
+
+    def recv_into(self, sock):
+        """Receive from a socket directly into the buffer.
+
+        Returns the number of bytes received, 0 when the peer has closed
+        the connection.
+        """
+        nbytes = sock.recv_into(self.writable())
+        self.end += nbytes
+        return nbytes
+
+    def write(self, data):
+        """Copy bytes that were received elsewhere into the buffer."""
+        data = memoryview(data)
+        while data:
+            free = self.writable()
+            nbytes = min(len(free), len(data))
+            free[:nbytes] = data[:nbytes]
+            self.end += nbytes
+            data = data[nbytes:]
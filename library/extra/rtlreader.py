@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import time
 import traceback
+import multiprocessing
 import numpy as np
 import library as pms
 
-from typing import Any
+from library.extra.correction import CrcCorrector
+from multiprocessing import shared_memory
+from typing import Any, Optional
 
 
 import_msg = """
@@ -30,39 +33,175 @@ fbits = 112
 preamble = [1, 0, 1, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0]
 th_amp_diff = 0.8  # signal amplitude threshold difference between 0 and 1 bit
 
+preamble_samples = pbits * 2
+frame_samples = (fbits + 1) * 2
+frame_span = preamble_samples + frame_samples  # samples needed to demodulate a frame
+noise_window = smaples_per_microsec * 100
+
+# sample formats of IQ files, "u8" is the interleaved output of rtl_sdr
+iq_formats = ["u8", "cf32"]
+
+# a demodulated frame: preamble position, position after the frame,
+# message (None if the frame length is not 56 or 112 bits) and validity
+Frame = tuple[int, int, Optional[str], bool]
+
+
+def check_msg(msg: str) -> bool:
+    """Check the downlink format, length and CRC of a demodulated message"""
+    df = pms.df(msg)
+    msglen = len(msg)
+    if df == 17 and msglen == 28:
+        if pms.crc(msg) == 0:
+            return True
+    elif df in [20, 21] and msglen == 28:
+        return True
+    elif df in [4, 5, 11] and msglen == 14:
+        return True
+    return False
+
+
+def find_preambles(signal, start, stop, min_sig_amp) -> np.ndarray:
+    """Find all samples in signal[start:stop] where a preamble starts"""
+    starts = np.flatnonzero(signal[start:stop] >= min_sig_amp) + start
+    # same test as RtlReader._check_preamble, applied to all candidates at once
+    for k, level in enumerate(preamble):
+        if starts.size == 0:
+            break
+        starts = starts[np.abs(signal[starts + k] - level) <= th_amp_diff]
+    return starts
+
+
+def demodulate(signal, start, stop, min_sig_amp, skip=True) -> list[Frame]:
+    """Demodulate the frames with a preamble in signal[start:stop]
+
+    The signal must hold a full frame after each of these positions. With
+    skip, candidates inside an already demodulated frame are dropped.
+    Without it, all candidates are returned, so that consecutive segments
+    can be demodulated independently and combined with merge_frames.
+    """
+    starts = find_preambles(signal, start, stop, min_sig_amp)
+    if starts.size == 0:
+        return []
+
+    # slice and demodulate all candidate frames at once
+    frames = signal[(starts + preamble_samples)[:, None] + np.arange(frame_samples)]
+    high, low = frames[:, 0::2], frames[:, 1::2]
+    threshold = frames.max(axis=1, keepdims=True) * 0.2
+    silent = (high < threshold) & (low < threshold)
+
+    # number of bits before the first silent pulse pair
+    lengths = np.where(silent.any(axis=1), silent.argmax(axis=1), fbits + 1).tolist()
+    packed = np.packbits(high[:, :fbits] >= low[:, :fbits], axis=1)
+    hexes = packed.tobytes().hex().upper()
+
+    result = []
+    i = start
+    for k, pos in enumerate(starts.tolist()):
+        if skip and pos < i:
+            continue
+
+        length = lengths[k]
+        # advance i with a jump
+        i = pos + preamble_samples + min(length * 2, frame_samples - 2)
+
+        if length not in (56, 112):
+            result.append((pos, i, None, False))
+            continue
+        msghex = hexes[k * 28 : k * 28 + length // 4]
+        result.append((pos, i, msghex, check_msg(msghex)))
+    return result
+
+
+def merge_frames(segments, i=0) -> list[Frame]:
+    """Merge the frames of consecutive segments demodulated without skip
+
+    Candidates inside an earlier frame are dropped, also across segment
+    boundaries, so the result is the same as demodulating in one pass.
+    """
+    merged = []
+    for frames in segments:
+        for frame in frames:
+            if frame[0] < i:
+                continue
+            i = frame[1]
+            merged.append(frame)
+    return merged
+
+
+# signal buffer shared with the demodulation workers
+_segment_shm = None
+_segment_signal = None
+
+
+def _attach_segment_signal(name, capacity) -> None:
+    global _segment_shm, _segment_signal
+    _segment_shm = shared_memory.SharedMemory(name=name)
+    _segment_signal = np.ndarray((capacity,), dtype=np.float32, buffer=_segment_shm.buf)
+
+
+def _demodulate_segment(task) -> list[Frame]:
+    start, stop, min_sig_amp = task
+    return demodulate(_segment_signal, start, stop, min_sig_amp, skip=False)
+
 
 class RtlReader(object):
     def __init__(self, **kwargs) -> None:
         super(RtlReader, self).__init__()
-        self.signal_buffer: list[float] = []  # amplitude of the sample only
-        self.sdr = rtlsdr.RtlSdr()
-        self.sdr.sample_rate = sampling_rate
-        self.sdr.center_freq = modes_frequency
-        self.sdr.gain = "auto"
+        # amplitude of the samples, only signal_buffer[:buffer_end] is valid
+        self.signal_buffer = np.zeros(buffer_size + read_size, dtype=np.float32)
+        self.buffer_end = 0
+        # first sample not yet included in the noise floor
+        self.noise_pos = 0
+
+        self.iq_file = kwargs.get("iq_file", None)
+        self.iq_format = kwargs.get("iq_format", "u8")
+        if self.iq_file is None:
+            self.sdr = rtlsdr.RtlSdr()
+            self.sdr.sample_rate = sampling_rate
+            self.sdr.center_freq = modes_frequency
+            self.sdr.gain = "auto"
+        else:
+            if self.iq_format not in iq_formats:
+                raise ValueError("Unknown IQ format: %s" % self.iq_format)
+            self.sdr = None
+            self.iq_file = open(self.iq_file, "rb")
+
+        # with more than one worker, each buffer is split into segments
+        # that are demodulated in a process pool
+        self.workers = kwargs.get("workers", 1)
+        self.pool = None
+        self.shm = None
+
+        # repair bit errors of DF17 frames that fail the CRC check
+        crc_fix_bits = kwargs.get("crc_fix_bits", 0)
+        self.corrector = CrcCorrector(crc_fix_bits) if crc_fix_bits else None
 
         self.debug = kwargs.get("debug", False)
         self.raw_pipe_in = None
         self.stop_flag = False
+        self.stopped = False
         self.noise_floor = 1e6
 
         self.exception_queue = None
 
     def _calc_noise(self) -> float:
-        """Calculate noise floor"""
-        window = smaples_per_microsec * 100
-        total_len = len(self.signal_buffer)
-        means = (
-            np.array(self.signal_buffer[: total_len // window * window])
-            .reshape(-1, window)
-            .mean(axis=1)
-        )
-        return min(means)
+        """Update noise floor with the samples added since the last call"""
+        end = self.buffer_end - (self.buffer_end - self.noise_pos) % noise_window
+        if end > self.noise_pos:
+            means = (
+                self.signal_buffer[self.noise_pos : end]
+                .reshape(-1, noise_window)
+                .mean(axis=1)
+            )
+            self.noise_floor = min(float(means.min()), self.noise_floor)
+            self.noise_pos = end
+        return self.noise_floor
 
     def _process_buffer(self) -> list[list[Any]]:
         """process raw IQ data in the buffer"""
 
         # update noise floor
-        self.noise_floor = min(self._calc_noise(), self.noise_floor)
+        self._calc_noise()
 
         # set minimum signal amplitude
         min_sig_amp = 3.162 * self.noise_floor  # 10 dB SNR
@@ -70,62 +209,72 @@ class RtlReader(object):
         # Mode S messages
         messages = []
 
-        buffer_length = len(self.signal_buffer)
+        # frames that do not fit in the buffer are kept for the next call
+        stop = max(self.buffer_end - frame_span + 1, 0)
+        if self.workers > 1:
+            frames = self._demodulate_segments(stop, min_sig_amp)
+        else:
+            frames = demodulate(self.signal_buffer, 0, stop, min_sig_amp)
 
-        i = 0
-        while i < buffer_length:
-            if self.signal_buffer[i] < min_sig_amp:
-                i += 1
+        now = time.time()
+        for _, _, msghex, valid in frames:
+            if msghex is None:
                 continue
-
-            frame_start = i + pbits * 2
-            if self._check_preamble(self.signal_buffer[i:frame_start]):
-                frame_length = (fbits + 1) * 2
-                frame_end = frame_start + frame_length
-                frame_pulses = self.signal_buffer[frame_start:frame_end]
-
-                threshold = max(frame_pulses) * 0.2
-
-                msgbin: list[int] = []
-                for j in range(0, frame_length, 2):
-                    j_2 = j + 2
-                    p2 = frame_pulses[j:j_2]
-                    if len(p2) < 2:
-                        break
-
-                    if p2[0] < threshold and p2[1] < threshold:
-                        break
-                    elif p2[0] >= p2[1]:
-                        c = 1
-                    elif p2[0] < p2[1]:
-                        c = 0
-                    else:
-                        msgbin = []
-                        break
-
-                    msgbin.append(c)
-
-                # advance i with a jump
-                i = frame_start + j
-
-                if len(msgbin) > 0:
-                    msghex = pms.bin2hex("".join([str(i) for i in msgbin]))
-                    if self._check_msg(msghex):
-                        messages.append([msghex, time.time()])
-                    if self.debug:
-                        self._debug_msg(msghex)
-
-            # elif i > buffer_length - 500:
-            #     # save some for next process
-            #     break
-            else:
-                i += 1
-
-        # reset the buffer
-        self.signal_buffer = self.signal_buffer[i:]
+            if not valid and self.corrector is not None and pms.df(msghex) == 17:
+                fixed = self.corrector.correct(msghex)
+                if fixed is not None:
+                    msghex, valid = fixed, True
+            if valid:
+                messages.append([msghex, now])
+            if self.debug:
+                self._debug_msg(msghex)
+
+        # keep the unprocessed samples at the front of the buffer
+        i = max(frames[-1][1] if frames else 0, stop)
+        remain = self.buffer_end - i
+        self.signal_buffer[:remain] = self.signal_buffer[i : self.buffer_end]
+        self.buffer_end = remain
+        self.noise_pos = max(self.noise_pos - i, 0)
 
         return messages
 
+    def _demodulate_segments(self, stop, min_sig_amp) -> list[Frame]:
+        """Demodulate the buffer up to stop in parallel segments
+
+        Each worker reads up to one frame past the end of its segment, so
+        frames crossing a boundary are demodulated by the segment in which
+        they start, and merge_frames drops the duplicates found inside them.
+        """
+        if self.pool is None:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=self.signal_buffer.nbytes
+            )
+            signal = np.ndarray(
+                self.signal_buffer.shape, dtype=np.float32, buffer=self.shm.buf
+            )
+            signal[:] = self.signal_buffer
+            self.signal_buffer = signal
+            self.pool = multiprocessing.Pool(
+                self.workers, _attach_segment_signal, (self.shm.name, len(signal))
+            )
+
+        bounds = np.linspace(0, stop, self.workers + 1).astype(int).tolist()
+        tasks = [(a, b, min_sig_amp) for a, b in zip(bounds[:-1], bounds[1:])]
+        return merge_frames(self.pool.map(_demodulate_segment, tasks))
+
+    def close(self) -> None:
+        """Stop the demodulation workers and release the shared buffer"""
+        if self.pool is None:
+            return
+        self.pool.terminate()
+        self.pool.join()
+        self.pool = None
+        # the shared buffer can not be released while the array points into it
+        self.signal_buffer = self.signal_buffer.copy()
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
     def _check_preamble(self, pulses) -> bool:
         if len(pulses) != 16:
             return False
@@ -137,16 +286,7 @@ class RtlReader(object):
         return True
 
     def _check_msg(self, msg) -> bool:
-        df = pms.df(msg)
-        msglen = len(msg)
-        if df == 17 and msglen == 28:
-            if pms.crc(msg) == 0:
-                return True
-        elif df in [20, 21] and msglen == 28:
-            return True
-        elif df in [4, 5, 11] and msglen == 14:
-            return True
-        return False
+        return check_msg(msg)
 
     def _debug_msg(self, msg) -> None:
         df = pms.df(msg)
@@ -163,9 +303,40 @@ class RtlReader(object):
 
     def _read_callback(self, data, rtlsdr_obj) -> None:
         amp = np.absolute(data)
-        self.signal_buffer.extend(amp.tolist())
 
-        if len(self.signal_buffer) >= buffer_size:
+        pos = 0
+        while pos < len(amp):
+            n = min(len(amp) - pos, len(self.signal_buffer) - self.buffer_end)
+            self.signal_buffer[self.buffer_end : self.buffer_end + n] = amp[pos : pos + n]
+            self.buffer_end += n
+            pos += n
+
+            if self.buffer_end >= buffer_size:
+                messages = self._process_buffer()
+                self.handle_messages(messages)
+
+    def _read_samples(self):
+        """Read the next block of complex samples, None at the end of file"""
+        if self.sdr is not None:
+            return self.sdr.read_samples(read_size)
+
+        if self.iq_format == "u8":
+            raw = np.fromfile(self.iq_file, dtype=np.uint8, count=read_size * 2)
+            raw = raw[: raw.size // 2 * 2]
+            if raw.size == 0:
+                return None
+            # same scaling as pyrtlsdr
+            return (raw.astype(np.float32) / 127.5 - 1).view(np.complex64)
+
+        data = np.fromfile(self.iq_file, dtype=np.complex64, count=read_size)
+        if data.size == 0:
+            return None
+        return data
+
+    def _flush(self) -> None:
+        """Process the samples left in the buffer at the end of an IQ file"""
+        self._read_callback(np.zeros(frame_span, dtype=np.complex64), None)
+        if self.buffer_end > 0:
             messages = self._process_buffer()
             self.handle_messages(messages)
 
@@ -176,7 +347,11 @@ class RtlReader(object):
             pass
 
     def stop(self, *args, **kwargs) -> None:
-        self.sdr.close()
+        self.stopped = True
+        if self.sdr is not None:
+            self.sdr.close()
+        else:
+            self.iq_file.close()
 
     def run(
         self, raw_pipe_in=None, stop_flag=None, exception_queue=None
@@ -188,8 +363,11 @@ class RtlReader(object):
         try:
             # raise RuntimeError("test exception")
 
-            while True:
-                data = self.sdr.read_samples(read_size)
+            while not self.stopped:
+                data = self._read_samples()
+                if data is None:
+                    self._flush()
+                    break
                 self._read_callback(data, None)
 
         except Exception as e:
@@ -197,12 +375,23 @@ class RtlReader(object):
             if self.exception_queue is not None:
                 self.exception_queue.put(tb)
             raise e
+        finally:
+            self.close()
+
+        # keep the last state on screen until the user quits
+        while self.stop_flag is not None and not self.stop_flag.value:
+            time.sleep(0.1)
 
 
 if __name__ == "__main__":
     import signal
+    import sys
 
-    rtl = RtlReader()
+    # demodulate an IQ file recorded with rtl_sdr when given
+    if len(sys.argv) > 1:
+        rtl = RtlReader(iq_file=sys.argv[1])
+    else:
+        rtl = RtlReader()
     signal.signal(signal.SIGINT, rtl.stop)
 
     rtl.debug = True
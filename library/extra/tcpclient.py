@@ -1,38 +1,76 @@
 """Stream beast raw data from a TCP server, convert to mode-s messages."""
 
 import os
+import socket
 import sys
 import time
-import library as pms
 import traceback
-import zmq
+
+from . import beast
+from .ringbuffer import RingBuffer
+
+HEX_CHARS = frozenset("0123456789ABCDEFabcdef")
+
+# beast MLAT timestamps count a 12 MHz clock
+MLAT_CLOCK = 12e6
+
+# receive timeout, and pause between connection attempts, in seconds; the
+# same as the RCVTIMEO and default reconnect interval of the ZMQ STREAM
+# socket used before
+RECV_TIMEOUT = 10
+RECONNECT_INTERVAL = 0.1
 
 
 class TcpClient(object):
+    datatypes = ["raw", "beast", "skysense"]
+
     def __init__(self, host, port, datatype):
         super(TcpClient, self).__init__()
         self.host = host
         self.port = port
-        self.buffer = []
+        self.ring = RingBuffer()
         self.socket = None
         self.datatype = datatype
-        if self.datatype not in ["raw", "beast", "skysense"]:
-            print("datatype must be either raw, beast or skysense")
+        if self.datatype not in self.datatypes:
+            print("datatype must be one of %s" % ", ".join(self.datatypes))
             os._exit(1)
 
+        # stamp beast messages with their MLAT time instead of the receive time
+        self.mlat_clock = False
+
         self.raw_pipe_in = None
         self.stop_flag = False
+        self.stopped = False
 
         self.exception_queue = None
 
     def connect(self):
-        self.socket = zmq.Context().socket(zmq.STREAM)
-        self.socket.setsockopt(zmq.LINGER, 0)
-        self.socket.setsockopt(zmq.RCVTIMEO, 10000)
-        self.socket.connect("tcp://%s:%s" % (self.host, self.port))
+        """Connect to the server, retrying until it accepts the connection.
+
+        Like the ZMQ socket this client used before, a server that is not
+        up yet does not raise, the connection is retried every
+        RECONNECT_INTERVAL seconds until the client is stopped.
+        """
+        # incomplete frames from a previous connection can not be completed
+        self.ring.clear()
+        while not self.stopped:
+            try:
+                self.socket = socket.create_connection(
+                    (self.host, self.port), RECV_TIMEOUT
+                )
+                return
+            except OSError:
+                time.sleep(RECONNECT_INTERVAL)
 
     def stop(self):
-        self.socket.close()
+        self.stopped = True
+        if self.socket is not None:
+            try:
+                # wake up a recv blocked in another thread
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.socket.close()
 
     def read_raw_buffer(self):
         """ Read raw ADS-B data type.
@@ -42,111 +80,61 @@ class TcpClient(object):
             *8d400cd5990d7e9a10043e5e6da0;
             *a0001498be800030aa0000c7a75f;
         """
-        messages = []
-
-        msg_stop = False
-        self.current_msg = ""
-        for b in self.buffer:
-            if b == 59:
-                msg_stop = True
-                ts = time.time()
-                messages.append([self.current_msg, ts])
-            if b == 42:
-                msg_stop = False
-                self.current_msg = ""
+        ring = self.ring
+        end = ring.data.rfind(b";", ring.start, ring.end)
+        if end < 0:
+            return []
 
-            if (not msg_stop) and (48 <= b <= 57 or 65 <= b <= 70 or 97 <= b <= 102):
-                self.current_msg = self.current_msg + chr(b)
+        ts = time.time()
+        messages = []
+        # decode all complete messages at once, straight from the ring
+        text = str(ring.view[ring.start : end], "ascii", "ignore")
+        for chunk in text.split(";"):
+            start = chunk.rfind("*")
+            if start < 0:
+                continue
+            msg = chunk[start + 1 :]
+            if not HEX_CHARS.issuperset(msg):
+                msg = "".join(c for c in msg if c in HEX_CHARS)
+            messages.append([msg, ts])
 
-        self.buffer = []
+        # keep the incomplete message for next reading cycle
+        ring.consume(end + 1)
 
         return messages
 
     def read_beast_buffer(self):
-        """Handle mode-s beast data type.
-
-        <esc> "1" : 6 byte MLAT timestamp, 1 byte signal level,
-            2 byte Mode-AC
-        <esc> "2" : 6 byte MLAT timestamp, 1 byte signal level,
-            7 byte Mode-S short frame
-        <esc> "3" : 6 byte MLAT timestamp, 1 byte signal level,
-            14 byte Mode-S long frame
-        <esc> "4" : 6 byte MLAT timestamp, status data, DIP switch
-            configuration settings (not on Mode-S Beast classic)
-        <esc><esc>: true 0x1a
-        <esc> is 0x1a, and "1", "2" and "3" are 0x31, 0x32 and 0x33
-
-        timestamp:
-        wiki.modesbeast.com/Radarcape:Firmware_Versions#The_GPS_timestamp
-        """
-        messages_mlat = []
-        msg = []
-        i = 0
-
-        # process the buffer until the last divider <esc> 0x1a
-        # then, reset the self.buffer with the remainder
-
-        while i < len(self.buffer):
-            if self.buffer[i : i + 2] == [0x1A, 0x1A]:
-                msg.append(0x1A)
-                i += 1
-            elif (i == len(self.buffer) - 1) and (self.buffer[i] == 0x1A):
-                # special case where the last bit is 0x1a
-                msg.append(0x1A)
-            elif self.buffer[i] == 0x1A:
-                if i == len(self.buffer) - 1:
-                    # special case where the last bit is 0x1a
-                    msg.append(0x1A)
-                elif len(msg) > 0:
-                    messages_mlat.append(msg)
-                    msg = []
-            else:
-                msg.append(self.buffer[i])
-            i += 1
-
-        # save the reminder for next reading cycle, if not empty
-        if len(msg) > 0:
-            reminder = []
-            for i, m in enumerate(msg):
-                if (m == 0x1A) and (i < len(msg) - 1):
-                    # rewind 0x1a, except when it is at the last bit
-                    reminder.extend([m, m])
-                else:
-                    reminder.append(m)
-            self.buffer = [0x1A] + msg
-        else:
-            self.buffer = []
+        """Handle mode-s beast data type, framed by beast.split()."""
+        ts = time.time()
+        mlat_clock = self.mlat_clock
 
-        # extract messages
         messages = []
-        for mm in messages_mlat:
-            ts = time.time()
-
-            msgtype = mm[0]
-            # print(''.join('%02X' % i for i in mm))
-
+        frames, _, _ = beast.split(self.ring)
+        for msgtype, frame in frames:
             if msgtype == 0x32:
                 # Mode-S Short Message, 7 byte, 14-len hexstr
-                msg = "".join("%02X" % i for i in mm[8:15])
+                msgbytes = frame[7:14]
             elif msgtype == 0x33:
                 # Mode-S Long Message, 14 byte, 28-len hexstr
-                msg = "".join("%02X" % i for i in mm[8:22])
+                msgbytes = frame[7:21]
             else:
                 # Other message tupe
                 continue
 
-            if len(msg) not in [14, 28]:
-                continue
-
-            df = pms.df(msg)
+            df = min(msgbytes[0] >> 3, 24)
 
             # skip incomplete message
-            if df in [0, 4, 5, 11] and len(msg) != 14:
+            if df in [0, 4, 5, 11] and len(msgbytes) != 7:
                 continue
-            if df in [16, 17, 18, 19, 20, 21, 24] and len(msg) != 28:
+            if df in [16, 17, 18, 19, 20, 21, 24] and len(msgbytes) != 14:
                 continue
 
-            messages.append([msg, ts])
+            if mlat_clock:
+                t = int.from_bytes(frame[:6], "big") / MLAT_CLOCK
+            else:
+                t = ts
+            messages.append([msgbytes.hex().upper(), t])
+
         return messages
 
     def read_skysense_buffer(self):
@@ -208,43 +196,51 @@ class TcpClient(object):
         SS_MSGLENGTH = 24
         SS_STARTCHAR = 0x24
 
-        if len(self.buffer) <= SS_MSGLENGTH:
-            return None
+        ring = self.ring
+        buffer, view, length = ring.data, ring.view, ring.end
 
         messages = []
-        while len(self.buffer) > SS_MSGLENGTH:
-            i = 0
+        i = ring.start
+        while length - i > SS_MSGLENGTH:
             if (
-                self.buffer[i] == SS_STARTCHAR
-                and self.buffer[i + SS_MSGLENGTH] == SS_STARTCHAR
+                buffer[i] != SS_STARTCHAR
+                or buffer[i + SS_MSGLENGTH] != SS_STARTCHAR
             ):
-                i += 1
-                if self.buffer[i] >> 7:
-                    # Long message
-                    payload = self.buffer[i : i + 14]
-                else:
-                    # Short message
-                    payload = self.buffer[i : i + 7]
-                msg = "".join("%02X" % j for j in payload)
-                i += 14  # Both message types use 14 bytes
-                tsbin = self.buffer[i : i + 6]
-                sec = ((tsbin[0] & 0x7F) << 10) | (tsbin[1] << 2) | (tsbin[2] >> 6)
-                nano = (
-                    ((tsbin[2] & 0x3F) << 24)
-                    | (tsbin[3] << 16)
-                    | (tsbin[4] << 8)
-                    | tsbin[5]
-                )
-                ts = sec + nano * 1.0e-9
-                i += 6
-                # Signal and noise level - Don't care for now
-                i += 3
-                self.buffer = self.buffer[SS_MSGLENGTH:]
-                messages.append([msg, ts])
+                # skip to the next start character
+                i = buffer.find(SS_STARTCHAR, i + 1, length)
+                if i < 0:
+                    i = length
+                continue
+
+            if buffer[i + 1] >> 7:
+                # Long message
+                payload = view[i + 1 : i + 15]
             else:
-                self.buffer = self.buffer[1:]
+                # Short message
+                payload = view[i + 1 : i + 8]
+            msg = payload.hex().upper()
+            # Both message types use 14 bytes
+            tsbin = view[i + 15 : i + 21]
+            sec = ((tsbin[0] & 0x7F) << 10) | (tsbin[1] << 2) | (tsbin[2] >> 6)
+            nano = (
+                ((tsbin[2] & 0x3F) << 24)
+                | (tsbin[3] << 16)
+                | (tsbin[4] << 8)
+                | tsbin[5]
+            )
+            ts = sec + nano * 1.0e-9
+            # Signal and noise level - Don't care for now
+            i += SS_MSGLENGTH
+            messages.append([msg, ts])
+
+        ring.consume(i)
+
         return messages
 
+    def read_buffer(self):
+        """Read all complete messages of the client's data type."""
+        return getattr(self, "read_%s_buffer" % self.datatype)()
+
     def handle_messages(self, messages):
         """re-implement this method to handle the messages"""
         for msg, t in messages:
@@ -256,19 +252,23 @@ class TcpClient(object):
         self.stop_flag = stop_flag
         self.connect()
 
-        while True:
+        while not self.stopped:
             try:
-                received = [i for i in self.socket.recv(4096)]
-
-                self.buffer.extend(received)
-                # print(''.join(x.encode('hex') for x in self.buffer))
+                try:
+                    received = self.ring.recv_into(self.socket)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    # connection reset by the server, or closed by stop()
+                    received = 0
+
+                if not received:
+                    # connection closed by the server
+                    self.socket.close()
+                    self.connect()
+                    continue
 
-                if self.datatype == "beast":
-                    messages = self.read_beast_buffer()
-                elif self.datatype == "raw":
-                    messages = self.read_raw_buffer()
-                elif self.datatype == "skysense":
-                    messages = self.read_skysense_buffer()
+                messages = self.read_buffer()
 
                 if not messages:
                     continue
@@ -277,8 +277,6 @@ class TcpClient(object):
 
                 # raise RuntimeError("test exception")
 
-            except zmq.error.Again:
-                continue
             except Exception as e:
                 tb = traceback.format_exc()
                 if self.exception_queue is not None:
@@ -1,11 +1,142 @@
+import math
+from bisect import bisect_right
 from typing import Optional
 
 import numpy as np
-from textwrap import wrap
+
+
+class ModeSMessage(object):
+    """A Mode-S message parsed once into an integer.
+
+    Fields are extracted from the integer with shifts and masks, and the
+    commonly used ones (df, tc, icao, oe, bds) are computed on first use
+    and cached. All decoding functions accept a ModeSMessage in place of
+    the hexadecimal string. It slices, compares and hashes like the
+    string, and hex2bin() returns its cached binary string instead of
+    converting it again.
+
+    Args:
+        msg (str): hexadecimal message string
+        value (int): integer value of the message, parsed from msg if None
+
+    """
+
+    __slots__ = (
+        "hex",
+        "value",
+        "bits",
+        "_bin",
+        "_data",
+        "_df",
+        "_tc",
+        "_icao",
+        "_oe",
+        "_bds",
+    )
+
+    def __init__(self, msg: str, value: Optional[int] = None) -> None:
+        self.hex = str(msg)
+        self.value = int(self.hex, 16) if value is None else value
+        self.bits = len(self.hex) * 4
+        self._bin = None
+        self._data = None
+        self._df = None
+        self._tc = -1
+        self._icao = -1
+        self._oe = None
+        self._bds = -1
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ModeSMessage":
+        """Create a message from its 7 or 14 bytes binary payload."""
+        return cls(data.hex().upper(), int.from_bytes(data, "big"))
+
+    def to_bytes(self) -> bytes:
+        """The binary payload of the message."""
+        return self.value.to_bytes(self.bits // 8, "big")
+
+    def field(self, start: int, length: int) -> int:
+        """Integer value of bits start to start+length, counted from 0."""
+        return (self.value >> (self.bits - start - length)) & ((1 << length) - 1)
+
+    @property
+    def bin(self) -> str:
+        if self._bin is None:
+            self._bin = bin(self.value)[2:].zfill(self.bits)
+        return self._bin
+
+    @property
+    def data(self) -> "ModeSMessage":
+        """The data frame, bytes 9 to 22, also as a ModeSMessage."""
+        if self._data is None:
+            data = self.hex[8:-6]
+            # short messages have no data frame, keep the empty string
+            self._data = ModeSMessage(data) if data else data
+        return self._data
+
+    @property
+    def df(self) -> int:
+        if self._df is None:
+            self._df = min(self.field(0, 5), 24)
+        return self._df
+
+    @property
+    def tc(self) -> Optional[int]:
+        if self._tc == -1:
+            self._tc = self.field(32, 5) if self.df in (17, 18) else None
+        return self._tc
+
+    @property
+    def icao(self) -> Optional[str]:
+        if self._icao == -1:
+            df = self.df
+            if df in (11, 17, 18):
+                self._icao = self.hex[2:8]
+            elif df in (0, 4, 5, 16, 20, 21):
+                self._icao = "%06X" % (crc(self.hex, encode=True) ^ (self.value & 0xFFFFFF))
+            else:
+                self._icao = None
+        return self._icao
+
+    @property
+    def oe(self) -> int:
+        if self._oe is None:
+            self._oe = self.field(53, 1)
+        return self._oe
+
+    @property
+    def bds(self) -> Optional[str]:
+        if self._bds == -1:
+            from .decoder.bds import infer
+
+            self._bds = infer(self)
+        return self._bds
+
+    def __str__(self) -> str:
+        return self.hex
+
+    def __repr__(self) -> str:
+        return "ModeSMessage(%r)" % self.hex
+
+    def __len__(self) -> int:
+        return len(self.hex)
+
+    def __getitem__(self, key) -> str:
+        return self.hex[key]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ModeSMessage):
+            return self.hex == other.hex
+        return self.hex == other
+
+    def __hash__(self) -> int:
+        return hash(self.hex)
 
 
 def hex2bin(hexstr: str) -> str:
     """Convert a hexadecimal string to binary string, with zero fillings."""
+    if isinstance(hexstr, ModeSMessage):
+        return hexstr.bin
     num_of_bits = len(hexstr) * 4
     binstr = bin(int(hexstr, 16))[2:].zfill(int(num_of_bits))
     return binstr
@@ -26,10 +157,47 @@ def bin2hex(binstr: str) -> str:
     return "{0:X}".format(int(binstr, 2))
 
 
+def field(msg: str, start: int, length: int) -> int:
+    """Integer value of bits start to start+length of a message, counted from 0.
+
+    Only the hexdigits covering the field are converted.
+    """
+    if isinstance(msg, ModeSMessage):
+        return msg.field(start, length)
+    first, last = start // 4, (start + length + 3) // 4
+    return (int(msg[first:last], 16) >> (last * 4 - start - length)) & ((1 << length) - 1)
+
+
+# Downlink format and ADS-B type code indexed by the first byte of the
+# message and of the ME field. DF 24 and above only use the first 2 bits.
+DF_TABLE = [min(byte >> 3, 24) for byte in range(256)]
+TC_TABLE = [byte >> 3 for byte in range(256)]
+
+
 def df(msg: str) -> int:
     """Decode Downlink Format value, bits 1 to 5."""
-    dfbin = hex2bin(msg[:2])
-    return min(bin2int(dfbin[0:5]), 24)
+    if isinstance(msg, ModeSMessage):
+        return msg.df
+    return DF_TABLE[int(msg[:2], 16)]
+
+
+# Mode S CRC-24 generator polynomial, without the leading x^24 term
+CRC_GENERATOR = 0xFFF409
+
+
+def _crc_table() -> list:
+    """Remainder of each byte value followed by 24 zero bits."""
+    table = []
+    for byte in range(256):
+        c = byte << 16
+        for _ in range(8):
+            c = (c << 1) ^ CRC_GENERATOR if c & 0x800000 else c << 1
+        table.append(c & 0xFFFFFF)
+    return table
+
+
+CRC_TABLE = _crc_table()
+CRC_TABLE_NP = np.array(CRC_TABLE, dtype=np.uint32)
 
 
 def crc(msg: str, encode: bool = False) -> int:
@@ -45,40 +213,57 @@ def crc(msg: str, encode: bool = False) -> int:
         int: message checksum, or partity bits (encoder)
 
     """
-    # the CRC generator
-    G = [int("11111111", 2), int("11111010", 2), int("00000100", 2), int("10000000", 2)]
+    if isinstance(msg, ModeSMessage):
+        return crc_bytes(msg.to_bytes(), encode)
+    return crc_bytes(bytes.fromhex(msg), encode)
+
+
+def crc_bytes(data: bytes, encode: bool = False) -> int:
+    """Mode-S Cyclic Redundancy Check of a message in bytes.
+
+    Computed one byte at a time with a lookup table. The remainder of the
+    data bytes is XORed with the last 3 bytes, the received parity.
+
+    Args:
+        data: 7 or 14 bytes message
+        encode: True to encode the date only and return the checksum
+    Returns:
+        int: message checksum, or partity bits (encoder)
+
+    """
+    table = CRC_TABLE
+    c = 0
+    for byte in data[:-3]:
+        c = ((c << 8) & 0xFFFFFF) ^ table[(c >> 16) ^ byte]
 
     if encode:
-        msg = msg[:-6] + "000000"
+        return c
+    return c ^ int.from_bytes(data[-3:], "big")
 
-    msgbin = hex2bin(msg)
-    msgbin_split = wrap(msgbin, 8)
-    mbytes = list(map(bin2int, msgbin_split))
 
-    for ibyte in range(len(mbytes) - 3):
-        for ibit in range(8):
-            mask = 0x80 >> ibit
-            bits = mbytes[ibyte] & mask
+def crc_batch(msgs: np.ndarray, encode: bool = False) -> np.ndarray:
+    """Mode-S Cyclic Redundancy Check of many messages at once.
 
-            if bits > 0:
-                mbytes[ibyte] = mbytes[ibyte] ^ (G[0] >> ibit)
-                mbytes[ibyte + 1] = mbytes[ibyte + 1] ^ (
-                    0xFF & ((G[0] << 8 - ibit) | (G[1] >> ibit))
-                )
-                mbytes[ibyte + 2] = mbytes[ibyte + 2] ^ (
-                    0xFF & ((G[1] << 8 - ibit) | (G[2] >> ibit))
-                )
-                mbytes[ibyte + 3] = mbytes[ibyte + 3] ^ (
-                    0xFF & ((G[2] << 8 - ibit) | (G[3] >> ibit))
-                )
+    Args:
+        msgs: (N, 14) or (N, 7) uint8 array, one message per row
+        encode: True to encode the date only and return the checksum
+    Returns:
+        np.ndarray: (N,) uint32 array of message checksums, or parity bits
 
-    result = (mbytes[-3] << 16) | (mbytes[-2] << 8) | mbytes[-1]
+    """
+    msgs = np.asarray(msgs, dtype=np.uint8)
+    c = np.zeros(len(msgs), dtype=np.uint32)
+    for i in range(msgs.shape[1] - 3):
+        c = ((c << 8) & 0xFFFFFF) ^ CRC_TABLE_NP[(c >> 16) ^ msgs[:, i]]
 
-    return result
+    if encode:
+        return c
+    parity = msgs[:, -3:].astype(np.uint32)
+    return c ^ (parity[:, 0] << 16 | parity[:, 1] << 8 | parity[:, 2])
 
 
 def crc_legacy(msg: str, encode: bool = False) -> int:
-    """Mode-S Cyclic Redundancy Check. (Legacy code, 2x slow)."""
+    """Mode-S Cyclic Redundancy Check. (Legacy code, bit by bit, slow)."""
     # the polynominal generattor code for CRC [1111111111111010000001001]
     generator = np.array(
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1]
@@ -112,7 +297,7 @@ def floor(x: float) -> int:
     For example: floor(3.6) = 3 and floor(-3.6) = -4
 
     """
-    return int(np.floor(x))
+    return math.floor(x)
 
 
 def icao(msg: str) -> Optional[str]:
@@ -127,6 +312,9 @@ def icao(msg: str) -> Optional[str]:
         String: ICAO address in 6 bytes hexadecimal string
 
     """
+    if isinstance(msg, ModeSMessage):
+        return msg.icao
+
     addr: Optional[str]
     DF = df(msg)
 
@@ -180,15 +368,60 @@ def typecode(msg: str) -> Optional[int]:
     Returns:
         int: type code number
     """
+    if isinstance(msg, ModeSMessage):
+        return msg.tc
+
     if df(msg) not in (17, 18):
         return None
 
-    tcbin = hex2bin(msg[8:10])
-    return bin2int(tcbin[0:5])
+    return TC_TABLE[int(msg[8:10], 16)]
+
+
+# Lowest absolute latitude of each longitude zone number, NL from 58 down
+# to 1, as found by bisecting cprNL_legacy() over the floating point values.
+# The last transition is the end of the tolerance around 87 degrees.
+NL_TRANSITIONS = (
+    10.470471299966958, 14.828174368685765, 18.186263570714164, 21.029394926029113,
+    23.545044865571256, 25.829247070588245, 27.93898710121862, 29.911356857317728,
+    31.772097076810425, 33.53993436298515, 35.22899597796412, 36.85025107593503,
+    38.4124189241228, 39.92256684333882, 41.386518322602576, 42.80914012243538,
+    44.19454951419289, 45.54626722660221, 46.867332524987575, 48.160391280966344,
+    49.42776439255677, 50.67150165553824, 51.8934246916876, 53.09516152795996,
+    54.278174722729084, 55.44378444495049, 56.593187562059235, 57.72747353866108,
+    58.84763776148453, 59.95459276694033, 61.04917774246348, 62.13216659210332,
+    63.20427479381925, 64.26616522567437, 65.31845309682087, 66.3617100838262,
+    67.39646774084666, 68.42322022083329, 69.44242631144024, 70.454510749876,
+    71.45986473028982, 72.45884544728945, 73.45177441667865, 74.43893415725137,
+    75.42056256653356, 76.39684390794469, 77.36789461328188, 78.33374082922748,
+    79.29428225456927, 80.24923213280513, 81.19801349271948, 82.13956980510606,
+    83.07199444719815, 83.99173562980565, 84.89166190702085, 85.75541620944418,
+    86.53536997512101, 87.00087001000001,
+)
+NL_TRANSITIONS_NP = np.array(NL_TRANSITIONS)
 
 
 def cprNL(lat: float) -> int:
-    """NL() function in CPR decoding."""
+    """NL() function in CPR decoding.
+
+    Binary search of the transition latitudes, identical to cprNL_legacy(),
+    including the ValueError raised for a NaN latitude.
+    """
+    if lat != lat:
+        raise ValueError("cannot convert float NaN to integer")
+    return 59 - bisect_right(NL_TRANSITIONS, abs(lat))
+
+
+def cprNL_batch(lat: np.ndarray) -> np.ndarray:
+    """NL() function in CPR decoding of an array of latitudes.
+
+    NaN latitudes give 1 instead of raising, as the batch decoders mark
+    undecodable rows with NaN and mask their results afterwards.
+    """
+    return 59 - np.searchsorted(NL_TRANSITIONS_NP, np.abs(lat), side="right")
+
+
+def cprNL_legacy(lat: float) -> int:
+    """NL() function in CPR decoding. (Legacy code, closed form, slow)."""
 
     if np.isclose(lat, 0):
         return 59
@@ -218,10 +451,7 @@ def idcode(msg: str) -> str:
     if df(msg) not in [5, 21]:
         raise RuntimeError("Message must be Downlink Format 5 or 21.")
 
-    mbin = hex2bin(msg)
-    idcodebin = mbin[19:32]
-
-    return squawk(idcodebin)
+    return SQUAWK_TABLE[field(msg, 19, 13)]
 
 
 def squawk(binstr: str) -> str:
@@ -234,9 +464,15 @@ def squawk(binstr: str) -> str:
         string: squawk code
 
     """
-    if len(binstr) != 13 or not set(binstr).issubset(set("01")):
+    # strip() leaves any character other than 0 and 1
+    if len(binstr) != 13 or binstr.strip("01"):
         raise RuntimeError("Input must be 13 bits binary string")
 
+    return SQUAWK_TABLE[int(binstr, 2)]
+
+
+def _squawk(binstr: str) -> str:
+    """Decode a valid 13 bits identity code, used to build SQUAWK_TABLE."""
     C1 = binstr[0]
     A1 = binstr[1]
     C2 = binstr[2]
@@ -275,13 +511,7 @@ def altcode(msg: str) -> Optional[int]:
         raise RuntimeError("Message must be Downlink Format 0, 4, 16, or 20.")
 
     # Altitude code, bit 20-32
-    mbin = hex2bin(msg)
-
-    altitude_code = mbin[19:32]
-
-    alt = altitude(altitude_code)
-
-    return alt
+    return ALTITUDE_TABLE[field(msg, 19, 13)]
 
 
 def altitude(binstr: str) -> Optional[int]:
@@ -294,11 +524,17 @@ def altitude(binstr: str) -> Optional[int]:
         int: altitude in ft
 
     """
-    alt: Optional[int]
-
-    if len(binstr) != 13 or not set(binstr).issubset(set("01")):
+    # strip() leaves any character other than 0 and 1
+    if len(binstr) != 13 or binstr.strip("01"):
         raise RuntimeError("Input must be 13 bits binary string")
 
+    return ALTITUDE_TABLE[int(binstr, 2)]
+
+
+def _altitude(binstr: str) -> Optional[int]:
+    """Decode a valid 13 bits altitude code, used to build ALTITUDE_TABLE."""
+    alt: Optional[int]
+
     Mbit = binstr[6]
     Qbit = binstr[8]
 
@@ -366,8 +602,25 @@ def gray2int(binstr: str) -> int:
     return num
 
 
+# Every 13 bits altitude and identity code decoded once, indexed by the
+# integer value of the code
+ALTITUDE_TABLE = [_altitude(format(code, "013b")) for code in range(8192)]
+SQUAWK_TABLE = [_squawk(format(code, "013b")) for code in range(8192)]
+
+# 6 bits characters of aircraft identification (callsign)
+CALLSIGN_CHARS = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ#####_###############0123456789######"
+
+
+def callsign_chars(value: int) -> str:
+    """Decode the 8 characters of a 48 bits aircraft identification field."""
+    chars = CALLSIGN_CHARS
+    return "".join([chars[(value >> shift) & 0x3F] for shift in (42, 36, 30, 24, 18, 12, 6, 0)])
+
+
 def data(msg: str) -> str:
     """Return the data frame in the message, bytes 9 to 22."""
+    if isinstance(msg, ModeSMessage):
+        return msg.data
     return msg[8:-6]
 
 
@@ -381,12 +634,10 @@ def allzeros(msg: str) -> bool:
         bool: True or False
 
     """
-    d = hex2bin(data(msg))
-
-    if bin2int(d) > 0:
-        return False
-    else:
-        return True
+    d = data(msg)
+    if isinstance(d, ModeSMessage):
+        return d.value == 0
+    return int(d, 16) == 0
 
 
 def wrongstatus(data: str, sb: int, msb: int, lsb: int) -> bool:
@@ -266,26 +266,29 @@ class Decode:
         acs = self.acs
         return acs
 
-    def run(self, raw_pipe_out, ac_pipe_in, exception_queue):
-        local_buffer = []
+    def run(self, raw_ring, ac_table, exception_queue):
+        """decode messages from the shared message ring, and write the
+        updated aircraft to the shared aircraft table.
+        """
         while True:
             try:
-                while raw_pipe_out.poll():
-                    data = raw_pipe_out.recv()
-                    local_buffer.append(data)
-
-                for data in local_buffer:
-                    self.process_raw(
-                        data["adsb_ts"],
-                        data["adsb_msg"],
-                        data["commb_ts"],
-                        data["commb_msg"],
-                    )
-                local_buffer = []
-
-                acs = self.get_aircraft()
-                ac_pipe_in.send(acs)
-                time.sleep(0.001)
+                messages, timestamps = raw_ring.pop()
+                if not messages:
+                    time.sleep(0.001)
+                    continue
+
+                adsb_ts, adsb_msg, commb_ts, commb_msg = [], [], [], []
+                for t, msg in zip(timestamps, messages):
+                    if pms.df(msg) in (17, 18):
+                        adsb_ts.append(t)
+                        adsb_msg.append(msg)
+                    else:
+                        commb_ts.append(t)
+                        commb_msg.append(msg)
+
+                self.process_raw(adsb_ts, adsb_msg, commb_ts, commb_msg)
+
+                ac_table.update(self.acs, [pms.icao(msg) for msg in messages])
 
             except Exception as e:
                 tb = traceback.format_exc()
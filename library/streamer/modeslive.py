@@ -7,9 +7,11 @@ import argparse
 import curses
 import signal
 import multiprocessing
+from library.extra.rtlreader import iq_formats
 from library.streamer.decode import Decode
 from library.streamer.screen import Screen
-from library.streamer.source import NetSource, RtlSdrSource  # , RtlSdrSource24
+from library.streamer.shm import AircraftTable, MessageRing
+from library.streamer.source import NetSource, FileSource, RtlSdrSource  # , RtlSdrSource24
 
 
 def main():
@@ -19,7 +21,7 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--source",
-        help='Choose data source, "rtlsdr", "rtlsdr24" or "net"',
+        help='Choose data source, "rtlsdr", "rtlsdr24", "net" or "file"',
         required=True,
         default="net",
     )
@@ -33,6 +35,46 @@ def main():
         default=None,
         required=False,
     )
+    parser.add_argument(
+        "--replay",
+        help="Define capture file and data type. Supported data types are: {}".format(
+            support_rawtypes + ["log"]
+        ),
+        nargs=2,
+        metavar=("FILE", "DATATYPE"),
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--iq",
+        help='Demodulate an IQ file recorded at 2 Msps instead of the rtlsdr device, sample format "u8" (rtl_sdr) or "cf32"',
+        nargs=2,
+        metavar=("FILE", "FORMAT"),
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--workers",
+        help="Number of processes demodulating the rtlsdr signal, default 1",
+        type=int,
+        default=1,
+        required=False,
+    )
+    parser.add_argument(
+        "--fix-crc",
+        help="Repair up to 1 or 2 bit errors of DF17 frames from rtlsdr, default 0 (off)",
+        type=int,
+        choices=[0, 1, 2],
+        default=0,
+        required=False,
+    )
+    parser.add_argument(
+        "--speed",
+        help="Replay speed relative to the capture time, 0 for as fast as possible, default 1",
+        type=float,
+        default=1.0,
+        required=False,
+    )
     parser.add_argument(
         "--latlon",
         help="Receiver latitude and longitude, needed for the surface position, default none",
@@ -63,7 +105,13 @@ def main():
     DUMPTO = args.dumpto
 
     if SOURCE in ["rtlsdr", "rtlsdr24"]:
-        pass
+        if args.iq is not None:
+            if args.iq[1] not in iq_formats:
+                print("IQ format not supported, available ones are %s" % iq_formats)
+                sys.exit(1)
+            if not os.path.isfile(args.iq[0]):
+                print("Error: IQ file (%s) does not exist" % args.iq[0])
+                sys.exit(1)
     elif SOURCE == "net":
         if args.connect is None:
             print("Error: --connect argument must not be empty.")
@@ -75,8 +123,23 @@ def main():
                     % support_rawtypes
                 )
 
+    elif SOURCE == "file":
+        if args.replay is None:
+            print("Error: --replay argument must not be empty.")
+            sys.exit(1)
+        REPLAY, DATATYPE = args.replay
+        if DATATYPE not in support_rawtypes + ["log"]:
+            print(
+                "Data type not supported, available ones are %s"
+                % (support_rawtypes + ["log"])
+            )
+            sys.exit(1)
+        if not os.path.isfile(REPLAY):
+            print("Error: capture file (%s) does not exist" % REPLAY)
+            sys.exit(1)
+
     else:
-        print('Source must be "rtlsdr" or "net".')
+        print('Source must be "rtlsdr", "net" or "file".')
         sys.exit(1)
 
     if DUMPTO is not None:
@@ -91,30 +154,41 @@ def main():
     # redirect all stdout to null, avoiding messing up with the screen
     sys.stdout = open(os.devnull, "w")
 
-    raw_pipe_in, raw_pipe_out = multiprocessing.Pipe()
-    ac_pipe_in, ac_pipe_out = multiprocessing.Pipe()
+    # raw messages and aircraft states are exchanged through shared memory
+    raw_ring = MessageRing()
+    ac_table = AircraftTable()
     exception_queue = multiprocessing.Queue()
     stop_flag = multiprocessing.Value("b", False)
 
     if SOURCE == "net":
         source = NetSource(host=SERVER, port=PORT, rawtype=DATATYPE)
+    elif SOURCE == "file":
+        source = FileSource(path=REPLAY, rawtype=DATATYPE, speed=args.speed)
     elif SOURCE == "rtlsdr":
-        source = RtlSdrSource()
+        if args.iq is None:
+            source = RtlSdrSource(workers=args.workers, crc_fix_bits=args.fix_crc)
+        else:
+            source = RtlSdrSource(
+                iq_file=args.iq[0],
+                iq_format=args.iq[1],
+                workers=args.workers,
+                crc_fix_bits=args.fix_crc,
+            )
     # elif SOURCE == "rtlsdr24":
     #     source = RtlSdrSource24()
 
     recv_process = multiprocessing.Process(
-        target=source.run, args=(raw_pipe_in, stop_flag, exception_queue)
+        target=source.run, args=(raw_ring, stop_flag, exception_queue)
     )
 
     decode = Decode(latlon=LATLON, dumpto=DUMPTO)
     decode_process = multiprocessing.Process(
-        target=decode.run, args=(raw_pipe_out, ac_pipe_in, exception_queue)
+        target=decode.run, args=(raw_ring, ac_table, exception_queue)
     )
 
     screen = Screen(uncertainty=UNCERTAINTY)
     screen_process = multiprocessing.Process(
-        target=screen.run, args=(ac_pipe_out, exception_queue)
+        target=screen.run, args=(ac_table, exception_queue)
     )
 
     def shutdown():
@@ -127,6 +201,8 @@ def main():
         recv_process.join()
         decode_process.join()
         screen_process.join()
+        raw_ring.close()
+        ac_table.close()
 
     def closeall(signal, frame):
         print("KeyboardInterrupt (ID: {}). Cleaning up...".format(signal))
@@ -187,8 +187,8 @@ class Screen(object):
                 self.screen.refresh()
                 self.draw_frame()
 
-    def run(self, ac_pipe_out, exception_queue):
-        local_buffer = []
+    def run(self, ac_table, exception_queue):
+        version = None
         key_thread = threading.Thread(target=self.kye_handling)
         key_thread.daemon = True
         key_thread.start()
@@ -197,14 +197,10 @@ class Screen(object):
             try:
                 # raise RuntimeError("test exception")
 
-                while ac_pipe_out.poll():
-                    acs = ac_pipe_out.recv()
-                    local_buffer.append(acs)
-
-                for acs in local_buffer:
-                    self.update_ac(acs)
-
-                local_buffer = []
+                # only copy the aircraft table when the decoder changed it
+                if ac_table.version != version:
+                    version = ac_table.version
+                    self.update_ac(ac_table.snapshot())
 
                 self.update()
             except curses.error:
@@ -0,0 +1,255 @@
+"""Shared-memory transport between the modeslive processes.
+
+:class:`MessageRing` carries raw messages from the source process to the
+decode process, and :class:`AircraftTable` carries the decoded aircraft
+state from the decode process to the screen process. Both live in
+``multiprocessing.shared_memory`` blocks viewed as NumPy arrays, so no
+data is pickled between processes.
+"""
+
+import numbers
+import time
+from abc import ABC, abstractmethod
+from multiprocessing import shared_memory
+
+import numpy as np
+
+PAYLOAD_SIZE = 14
+
+# size of one message record: timestamp, payload length and payload
+RECORD_SIZE = 8 + 1 + PAYLOAD_SIZE
+
+# header slots of the message ring
+HEAD, TAIL, DROPPED = 0, 1, 2
+
+AIRCRAFT_FIELDS = [
+    "live", "lat", "lon", "alt", "gs", "tas", "ias", "mach", "roc", "trk",
+    "hdg", "ver", "HPL", "RCu", "RCv", "HVE", "VVE", "Rc", "VPL", "EPU",
+    "VEPU", "HFOMr", "VFOMr", "PE_RCu", "PE_VPL",
+]
+
+# aircraft record, missing values are stored as NaN and empty strings
+AIRCRAFT = np.dtype(
+    [("icao", "S6"), ("call", "S8")] + [(f, "<f8") for f in AIRCRAFT_FIELDS]
+)
+
+# header slots of the aircraft table
+SEQ = 0
+
+
+def _number(value):
+    if isinstance(value, numbers.Number):
+        return value
+    return np.nan
+
+
+class SharedBlock(ABC):
+    """A shared memory block that can be re-attached after pickling."""
+
+    # names of the array views on the shared buffer
+    views = ()
+
+    def __init__(self, capacity, size, name=None):
+        self.capacity = capacity
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            # child processes share the resource tracker of their parent,
+            # which unlinks the block if the parent exits without closing it
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.attach()
+
+    @abstractmethod
+    def attach(self):
+        """Create the array views on the shared buffer."""
+
+    def __getstate__(self):
+        return {"name": self.shm.name, "capacity": self.capacity}
+
+    def __setstate__(self, state):
+        self.__init__(state["capacity"], state["name"])
+
+    def close(self):
+        """Release the block, and remove it when called by its creator."""
+        # the buffer can not be closed while arrays still point into it
+        for view in self.views:
+            setattr(self, view, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class MessageRing(SharedBlock):
+    """Ring of fixed-size message records in shared memory.
+
+    Each record holds up to 14 bytes of Mode-S payload, its length and a
+    timestamp. One process pushes, one process pops. When the ring is
+    full, new messages are dropped and counted in ``dropped``.
+    """
+
+    views = ("header", "ts", "len", "msg")
+
+    def __init__(self, capacity=65536, name=None):
+        super(MessageRing, self).__init__(
+            capacity, 8 * 3 + RECORD_SIZE * capacity, name
+        )
+
+    def attach(self):
+        # one array per record field, so that a batch is copied with slices
+        buf, n = self.shm.buf, self.capacity
+        self.header = np.ndarray((3,), dtype="<u8", buffer=buf)
+        self.ts = np.ndarray((n,), dtype="<f8", buffer=buf, offset=8 * 3)
+        self.msg = np.ndarray(
+            (n, PAYLOAD_SIZE), dtype="u1", buffer=buf, offset=8 * 3 + 8 * n
+        )
+        self.len = np.ndarray(
+            (n,), dtype="u1", buffer=buf, offset=8 * 3 + (8 + PAYLOAD_SIZE) * n
+        )
+
+    def segments(self, start, n):
+        """Split ``n`` records from ``start`` at the end of the ring.
+
+        Returns (ring index, first batch index, end batch index) for the
+        part before and the part after the wrap-around.
+        """
+        i = start % self.capacity
+        first = min(n, self.capacity - i)
+        return ((i, 0, first), (0, first, n))
+
+    @property
+    def dropped(self):
+        return int(self.header[DROPPED])
+
+    def __len__(self):
+        return int(self.header[HEAD] - self.header[TAIL])
+
+    def push(self, messages, timestamps):
+        """Append hex messages and their timestamps to the ring."""
+        head = int(self.header[HEAD])
+        free = self.capacity - (head - int(self.header[TAIL]))
+        if len(messages) > free:
+            self.header[DROPPED] += len(messages) - free
+            messages, timestamps = messages[:free], timestamps[:free]
+        n = len(messages)
+        if n == 0:
+            return
+
+        payload = bytes.fromhex("".join(m.ljust(2 * PAYLOAD_SIZE, "0") for m in messages))
+        payload = np.frombuffer(payload, "u1").reshape(n, PAYLOAD_SIZE)
+        sizes = np.fromiter((len(m) // 2 for m in messages), "u1", n)
+        timestamps = np.asarray(timestamps, "<f8")
+        for i, j, k in self.segments(head, n):
+            self.msg[i : i + k - j] = payload[j:k]
+            self.len[i : i + k - j] = sizes[j:k]
+            self.ts[i : i + k - j] = timestamps[j:k]
+        # publish the records only after they are written
+        self.header[HEAD] = head + n
+
+    def pop(self, limit=None):
+        """Remove and return the oldest messages and their timestamps."""
+        tail = int(self.header[TAIL])
+        n = int(self.header[HEAD]) - tail
+        if limit is not None:
+            n = min(n, limit)
+        if n <= 0:
+            return [], []
+
+        payload, sizes, timestamps = [], [], []
+        for i, j, k in self.segments(tail, n):
+            payload.append(self.msg[i : i + k - j].tobytes())
+            sizes.extend(self.len[i : i + k - j].tolist())
+            timestamps.extend(self.ts[i : i + k - j].tolist())
+        # release the records only after they are copied
+        self.header[TAIL] = tail + n
+
+        payload = b"".join(payload).hex().upper()
+        messages = [
+            payload[i : i + 2 * size]
+            for i, size in zip(range(0, n * 2 * PAYLOAD_SIZE, 2 * PAYLOAD_SIZE), sizes)
+        ]
+        return messages, timestamps
+
+
+class AircraftTable(SharedBlock):
+    """Table of aircraft states in shared memory.
+
+    Written by a single process and read by any number of processes. The
+    writer bumps a sequence number before and after each update, so
+    readers can detect and retry a snapshot taken during a write.
+    """
+
+    views = ("header", "table")
+
+    def __init__(self, capacity=4096, name=None):
+        # row of each aircraft and unused rows, only maintained by the writer
+        self.rows = {}
+        self.free = list(range(capacity - 1, -1, -1))
+        super(AircraftTable, self).__init__(
+            capacity, 8 + AIRCRAFT.itemsize * capacity, name
+        )
+
+    def attach(self):
+        buf = self.shm.buf
+        self.header = np.ndarray((1,), dtype="<u8", buffer=buf)
+        self.table = np.ndarray((self.capacity,), dtype=AIRCRAFT, buffer=buf, offset=8)
+
+    @property
+    def version(self):
+        return int(self.header[SEQ])
+
+    def update(self, acs, icaos):
+        """Write the given aircraft of ``acs`` and drop the ones removed from it.
+
+        Args:
+            acs (dict): Aircraft states keyed by ICAO, as kept by ``Decode``.
+            icaos (iterable): ICAO addresses updated since the last call.
+
+        """
+        rows = self.rows
+        removed = [icao for icao in rows if icao not in acs]
+        changed = [icao for icao in set(icaos) if icao in acs]
+        if not removed and not changed:
+            return
+
+        self.header[SEQ] += 1
+        try:
+            for icao in removed:
+                row = rows.pop(icao)
+                self.table["icao"][row] = b""
+                self.free.append(row)
+            for icao in changed:
+                row = rows.get(icao)
+                if row is None:
+                    if not self.free:
+                        continue
+                    row = rows[icao] = self.free.pop()
+                ac = acs[icao]
+                self.table[row] = (icao.encode(), (ac.get("call") or "").encode()) + tuple(
+                    _number(ac.get(f)) for f in AIRCRAFT_FIELDS
+                )
+        finally:
+            self.header[SEQ] += 1
+
+    def snapshot(self):
+        """Return all aircraft as a dict in the same layout as ``Decode.acs``."""
+        while True:
+            seq = int(self.header[SEQ])
+            if seq % 2 == 0:
+                table = self.table[self.table["icao"] != b""]
+                if int(self.header[SEQ]) == seq:
+                    break
+            time.sleep(0)
+
+        acs = {}
+        for row in table.tolist():
+            ac = {"call": row[1].decode() or None}
+            for f, v in zip(AIRCRAFT_FIELDS, row[2:]):
+                if v != v:
+                    v = None
+                elif v.is_integer():
+                    v = int(v)
+                ac[f] = v
+            acs[row[0].decode()] = ac
+        return acs
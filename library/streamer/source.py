@@ -1,18 +1,15 @@
 import library as pms
 from library.extra.tcpclient import TcpClient
+from library.extra.replay import FileClient
 from library.extra.rtlreader import RtlReader
 
 
-class NetSource(TcpClient):
-    def __init__(self, host, port, rawtype):
-        super(NetSource, self).__init__(host, port, rawtype)
-        self.reset_local_buffer()
+class MessageSource(object):
+    """Forward the long ADS-B and Comm-B messages of a client to the ring.
 
-    def reset_local_buffer(self):
-        self.local_buffer_adsb_msg = []
-        self.local_buffer_adsb_ts = []
-        self.local_buffer_commb_msg = []
-        self.local_buffer_commb_ts = []
+    Mixed in before the client class, whose ``run`` calls
+    ``handle_messages`` with each batch of (message, timestamp) pairs.
+    """
 
     def handle_messages(self, messages):
 
@@ -20,72 +17,36 @@ class NetSource(TcpClient):
             self.stop()
             return
 
+        msgs, ts = [], []
         for msg, t in messages:
             if len(msg) < 28:  # only process long messages
                 continue
 
             df = pms.df(msg)
 
-            if df == 17 or df == 18:
-                self.local_buffer_adsb_msg.append(msg)
-                self.local_buffer_adsb_ts.append(t)
-            elif df == 20 or df == 21:
-                self.local_buffer_commb_msg.append(msg)
-                self.local_buffer_commb_ts.append(t)
-            else:
-                continue
-
-        if len(self.local_buffer_adsb_msg) > 1:
-            self.raw_pipe_in.send(
-                {
-                    "adsb_ts": self.local_buffer_adsb_ts,
-                    "adsb_msg": self.local_buffer_adsb_msg,
-                    "commb_ts": self.local_buffer_commb_ts,
-                    "commb_msg": self.local_buffer_commb_msg,
-                }
-            )
-            self.reset_local_buffer()
-
+            if df in (17, 18, 20, 21):
+                msgs.append(msg)
+                ts.append(t)
 
-class RtlSdrSource(RtlReader):
-    def __init__(self):
-        super(RtlSdrSource, self).__init__()
-        self.reset_local_buffer()
+        # the ring is read by the decode process, no pickling involved
+        self.raw_pipe_in.push(msgs, ts)
 
-    def reset_local_buffer(self):
-        self.local_buffer_adsb_msg = []
-        self.local_buffer_adsb_ts = []
-        self.local_buffer_commb_msg = []
-        self.local_buffer_commb_ts = []
 
-    def handle_messages(self, messages):
-
-        if self.stop_flag.value is True:
-            self.stop()
-            return
+class NetSource(MessageSource, TcpClient):
+    def __init__(self, host, port, rawtype):
+        super(NetSource, self).__init__(host, port, rawtype)
 
-        for msg, t in messages:
-            if len(msg) < 28:  # only process long messages
-                continue
 
-            df = pms.df(msg)
+class FileSource(MessageSource, FileClient):
+    def __init__(self, path, rawtype, speed=1.0):
+        super(FileSource, self).__init__(path, rawtype, speed)
 
-            if df == 17 or df == 18:
-                self.local_buffer_adsb_msg.append(msg)
-                self.local_buffer_adsb_ts.append(t)
-            elif df == 20 or df == 21:
-                self.local_buffer_commb_msg.append(msg)
-                self.local_buffer_commb_ts.append(t)
-            else:
-                continue
 
-        if len(self.local_buffer_adsb_msg) > 1:
-            self.raw_pipe_in.send(
-                {
-                    "adsb_ts": self.local_buffer_adsb_ts,
-                    "adsb_msg": self.local_buffer_adsb_msg,
-                    "commb_ts": self.local_buffer_commb_ts,
-                    "commb_msg": self.local_buffer_commb_msg,
-                }
-            )
-            self.reset_local_buffer()
+class RtlSdrSource(MessageSource, RtlReader):
+    def __init__(self, iq_file=None, iq_format="u8", workers=1, crc_fix_bits=0):
+        super(RtlSdrSource, self).__init__(
+            iq_file=iq_file,
+            iq_format=iq_format,
+            workers=workers,
+            crc_fix_bits=crc_fix_bits,
+        )
@@ -1,16 +1,21 @@
 from model.database.table import BaseTable
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import BigInteger, Column, LargeBinary, String, Integer
 
 
 class Records(BaseTable):
     __tablename__ = "records"
 
-    timestamp = Column(
+    id = Column(
         Integer,
-        name="timestamp",
+        name="id",
         primary_key=True,
         autoincrement=True,
     )
+    timestamp = Column(
+        Integer,
+        name="timestamp",
+        index=True,
+    )
     message = Column(
         String,
         name="item_id",
@@ -23,3 +28,28 @@ class Records(BaseTable):
         String,
         name="icao",
     )
+    mlat = Column(
+        BigInteger,
+        name="mlat",
+    )
+    rssi = Column(
+        Integer,
+        name="rssi",
+    )
+    feed = Column(
+        Integer,
+        name="feed",
+    )
+
+
+class BinaryRecords(Records):
+    """以二进制字节存档报文的记录表
+
+    报文内容以 7 或 14 字节的 BLOB 存储，存储空间为十六进制字符串的一半
+    """
+    __tablename__ = "records_binary"
+
+    message = Column(
+        LargeBinary,
+        name="item_id",
+    )
@@ -0,0 +1,30 @@
+from typing import Union
+
+
+class ADSBFrame:
+    """ADS-B 报文帧
+
+    由分帧器从数据源中切分得到，Raw 格式数据源不含 MLAT 时间戳与信号强度，两者均为 0
+
+    Attributes:
+        message (Union[str, bytes]): 十六进制报文，二进制模式下为 7 或 14 字节的报文内容
+        mlat (int): 接收机 12 MHz MLAT 时间戳
+        rssi (int): 信号强度，Beast 格式原始电平 0-255
+        feed (int): 数据源序号，不同数据源的 MLAT 时间戳互不可比
+        df (int): 报文 DF，由报文路由器标记，未经路由时为 -1
+    """
+    # 每条报文都会创建一个实例，不使用 __dict__ 以减少内存分配
+    __slots__ = ("message", "mlat", "rssi", "feed", "df")
+
+    message: Union[str, bytes]
+    mlat: int
+    rssi: int
+    feed: int
+    df: int
+
+    def __init__(self, message: Union[str, bytes], mlat: int = 0, rssi: int = 0, feed: int = 0):
+        self.message = message
+        self.mlat = mlat
+        self.rssi = rssi
+        self.feed = feed
+        self.df = -1
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class SourceHealth:
+    """数据源健康状态
+
+    Attributes:
+        host (str): 数据源地址
+        port (int): 数据源端口
+        connected (bool): 当前是否已连接
+        reconnects (int): 成功重连次数
+        failures (int): 连续失败次数，连接成功后归零
+        last_error (str): 最近一次错误信息
+        last_seen (int): 最近一次收到数据的毫秒时间戳
+        messages (int): 已收到的报文数量
+        malformed (int): 长度或字符非法的报文数量
+        partial (int): 被截断的报文数量
+        corrected (int): 经 CRC 纠错修复的报文数量
+        uncorrectable (int): CRC 错误且无法纠正的 DF17/18 报文数量
+    """
+    host: str = ""
+    port: int = 0
+    connected: bool = False
+    reconnects: int = 0
+    failures: int = 0
+    last_error: str = ""
+    last_seen: int = 0
+    messages: int = 0
+    malformed: int = 0
+    partial: int = 0
+    corrected: int = 0
+    uncorrectable: int = 0
@@ -12,6 +12,8 @@ class ADSBPacket:
         velocity (float): 速度
         latitude (float): 纬度
         longitude (float): 经度
+        mlat (int): 接收机 12 MHz MLAT 时间戳，仅 Beast 格式数据源提供
+        rssi (int): 信号强度，仅 Beast 格式数据源提供
     """
     icao: str = ""
     message: str = ""
@@ -23,3 +25,5 @@ class ADSBPacket:
     velocity: float = 0
     latitude: float = 0.0
     longitude: float = 0.0
+    mlat: int = 0
+    rssi: int = 0
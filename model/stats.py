@@ -0,0 +1,37 @@
+from typing import Dict
+
+
+class QueueStats:
+    """有界队列统计数据
+
+    Attributes:
+        name (str): 所处的处理环节名称
+        policy (str): 队列满时的处理策略
+        maxsize (int): 队列容量
+        size (int): 当前队列长度
+        high_water (int): 队列长度历史最大值
+        enqueued (int): 已入队的数据数量
+        dropped (int): 因队列已满被丢弃的数据数量
+        coalesced (int): 被同一飞机的新数据覆盖的数据数量
+    """
+    name: str = ""
+    policy: str = ""
+    maxsize: int = 0
+    size: int = 0
+    high_water: int = 0
+    enqueued: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+
+
+class FrameStats:
+    """报文路由统计数据
+
+    Attributes:
+        received (Dict[int, int]): 各 DF 收到的报文数量
+        dropped (Dict[int, int]): 各 DF 因长度不符或 CRC 校验失败被丢弃的报文数量
+    """
+
+    def __init__(self) -> None:
+        self.received: Dict[int, int] = {}
+        self.dropped: Dict[int, int] = {}
@@ -1,6 +1,10 @@
 from typing import List
 from fastapi import WebSocket
+from endpoint.cache import CacheResponse, cache_handler
+from endpoint.frames import FramesResponse, frames_handler
+from endpoint.health import HealthResponse, health_handler
 from endpoint.query import QueryRequest, QueryResponse, query_handler
+from endpoint.queues import QueuesResponse, queues_handler
 from model.router import RouterItem
 from endpoint.socket import socket_handler
 
@@ -30,5 +34,53 @@ API_ROUTERS: List[RouterItem] = [
         "handler": query_handler,
         "summary": "",
         "description": "",
+    }, {
+        "tags": [],
+        "router": f"{API_PREFIX}/health",
+        "method": "get",
+        "model": {
+            "request": None,
+            "response": HealthResponse,
+        },
+        "dependencies": [],
+        "handler": health_handler,
+        "summary": "",
+        "description": "",
+    }, {
+        "tags": [],
+        "router": f"{API_PREFIX}/queues",
+        "method": "get",
+        "model": {
+            "request": None,
+            "response": QueuesResponse,
+        },
+        "dependencies": [],
+        "handler": queues_handler,
+        "summary": "",
+        "description": "",
+    }, {
+        "tags": [],
+        "router": f"{API_PREFIX}/frames",
+        "method": "get",
+        "model": {
+            "request": None,
+            "response": FramesResponse,
+        },
+        "dependencies": [],
+        "handler": frames_handler,
+        "summary": "",
+        "description": "",
+    }, {
+        "tags": [],
+        "router": f"{API_PREFIX}/cache",
+        "method": "get",
+        "model": {
+            "request": None,
+            "response": CacheResponse,
+        },
+        "dependencies": [],
+        "handler": cache_handler,
+        "summary": "",
+        "description": "",
     },
 ]
@@ -1,12 +1,44 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from json import load
+from typing import List
 
 
 @dataclass
 class Source:
-    host: str
-    port: str
-    timeout: float
+    host: str = ""
+    port: int = 0
+    timeout: float = 60
+    format: str = "raw"
+    # 抓包文件路径，非空时回放该文件而不连接网络数据源
+    path: str = ""
+    speed: float = 1.0
+
+
+@dataclass
+class Ingest:
+    mode: str = "thread"
+    dedup_window: int = 500
+    backoff_initial: float = 0.01
+    backoff_max: float = 5.0
+    # DF17/18 报文 CRC 纠错的最大比特数，可选 0、1 或 2，为 0 时不纠错
+    crc_fix_bits: int = 0
+    # 以二进制字节在分帧、校验、解析与存档各环节间传递报文，仅在 API 输出时转换为十六进制
+    binary: bool = False
+    # 各解码函数缓存的解码结果数量，重复报文直接取用缓存结果，为 0 时不缓存
+    decode_cache: int = 0
+
+
+@dataclass
+class Stage:
+    size: int = 10000
+    policy: str = "block"
+
+
+@dataclass
+class Queues:
+    decode: Stage = field(default_factory=lambda: Stage(10000, "block"))
+    archive: Stage = field(default_factory=lambda: Stage(100000, "drop_oldest"))
+    publish: Stage = field(default_factory=lambda: Stage(1000, "coalesce"))
 
 
 @dataclass
@@ -34,13 +66,18 @@ class Settings:
     从指定 JSON 格式文件读取配置，用作应用全局配置
 
     Attributes:
-        source (Source): 数据源配置
+        sources (List[Source]): 数据源配置，可配置多个网络数据源或抓包文件
         server (Server): 服务器配置
+        database (Database): 数据库配置
+        ingest (Ingest): 报文接收配置，包括接收模式、多数据源去重窗口、重连退避时间、CRC 纠错、报文表示形式与解码缓存
+        queues (Queues): 解析、存档与推送各环节的队列容量与队列满时的处理策略
     """
 
-    source: Source = None
+    sources: List[Source] = None
     server: Server = None
     database: Database = None
+    ingest: Ingest = None
+    queues: Queues = None
 
     def parse(self, path: str) -> bool:
         """打开并解析配置文件
@@ -55,15 +92,25 @@ class Settings:
             f = open(path, "r")
             config_data = load(f)
             f.close()
-            self.source = Source(
-                **config_data.get("source_settings")
-            )
+            source_settings = config_data.get("source_settings")
+            if isinstance(source_settings, dict):
+                source_settings = [source_settings]
+            self.sources = [
+                Source(**source) for source in source_settings
+            ]
             self.server = Server(
                 **config_data.get("server_settings")
             )
             self.database = Database(
                 **config_data.get("database_settings")
             )
+            self.ingest = Ingest(
+                **config_data.get("ingest_settings", {})
+            )
+            self.queues = Queues(**{
+                stage: Stage(**queue)
+                for stage, queue in config_data.get("queue_settings", {}).items()
+            })
             return False
         except:
             return True